@@ -1,7 +1,7 @@
 from django.contrib import admin
 from import_export.admin import ImportExportModelAdmin
 from django.utils.html import format_html
-from .models import Partner, BusinessDetails, LocationCoverage, ToursServices, LegalBanking, Tour
+from .models import Partner, BusinessDetails, LocationCoverage, ToursServices, LegalBanking, Tour, ScrapeRun
 
 
 @admin.register(Partner)
@@ -324,7 +324,7 @@ class TourAdmin(ImportExportModelAdmin):
     ]
     list_filter = [
         'tour_type', 'tour_status', 'price_type', 'includes_flights', 'includes_hotels',
-        'includes_meals', 'includes_transfers', 'visa_support', 'created_at'
+        'includes_meals', 'includes_transfers', 'visa_support', 'source_status', 'created_at'
     ]
     search_fields = [
         'title', 'provider_name', 'partner__user__email', 'destinations',
@@ -333,7 +333,10 @@ class TourAdmin(ImportExportModelAdmin):
     ordering = ['-created_at']
     list_per_page = 25
     date_hierarchy = 'created_at'
-    readonly_fields = ['created_at', 'updated_at', 'visibility_score']
+    readonly_fields = [
+        'created_at', 'updated_at', 'visibility_score', 'source_status', 'source_checked_at',
+        'source_etag', 'source_last_modified', 'source_content_hash', 'source_snapshot'
+    ]
     raw_id_fields = ['partner']
     list_editable = ['tour_status', 'price_type']
     
@@ -358,6 +361,10 @@ class TourAdmin(ImportExportModelAdmin):
             'fields': ('cover_image', 'visibility_score'),
             'classes': ('collapse',)
         }),
+        ('Source Page', {
+            'fields': ('source_status', 'source_checked_at', 'source_etag', 'source_last_modified', 'source_content_hash', 'source_snapshot'),
+            'classes': ('collapse',)
+        }),
         ('Timestamps', {
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
@@ -375,3 +382,23 @@ class TourAdmin(ImportExportModelAdmin):
             return obj.title[:50] + '...'
         return obj.title
     get_short_title.short_description = 'Title'
+
+
+@admin.register(ScrapeRun)
+class ScrapeRunAdmin(ImportExportModelAdmin):
+    list_display = [
+        'id', 'domain', 'provider_path', 'llm_provider', 'outcome', 'total_duration',
+        'llm_calls', 'prompt_tokens', 'completion_tokens', 'bytes_fetched', 'created_at'
+    ]
+    list_filter = ['outcome', 'provider_path', 'llm_provider', 'created_at']
+    search_fields = ['url', 'domain', 'error']
+    ordering = ['-created_at']
+    list_per_page = 50
+    date_hierarchy = 'created_at'
+    
+    def has_add_permission(self, request):
+        # Written by the scraping service only
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PartnerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.partner'
+
+    def ready(self):
+        # Tour cache invalidation
+        from . import signals  # noqa: F401
@@ -0,0 +1,96 @@
+import time
+import logging
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from ..scraping_cache import normalize_url
+from ..scraping_service import TourScrapingService
+from ..politeness import HostScheduler, is_allowed_by_robots, ROBOTS_DISALLOWED_ERROR
+from ..bulk_scraping import unique_urls
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _scrape_single_url(url, force_refresh=False):
+    """Scrape one URL with its own service instance, if the site's robots.txt allows it."""
+    if not is_allowed_by_robots(url):
+        return {
+            'success': False,
+            'error': ROBOTS_DISALLOWED_ERROR,
+            'data': {}
+        }
+    scraping_service = TourScrapingService()
+    return scraping_service.extract_tour_details(url, force_refresh=force_refresh)
+
+
+def scrape_tour_urls(urls, max_workers=16, per_domain_limit=4, force_refresh=False):
+    """
+    Scrape many tour URLs concurrently in this process and yield results as they finish.
+    
+    Stand-in for the Celery workers in the politeness check, so it runs
+    without a broker; the bulk scraping endpoint queues Celery jobs with
+    queue_bulk_scrape instead.
+    
+    At most max_workers URLs run at the same time. Every host is throttled by
+    a HostScheduler: at most per_domain_limit concurrent scrapes (counted across
+    all workers) and one scrape start per SCRAPE_HOST_MIN_INTERVAL or robots.txt
+    Crawl-delay. URLs waiting for a busy or throttled host do not hold a
+    worker, so other hosts keep going. URLs disallowed by robots.txt are not
+    scraped. Duplicate URLs (after normalization) are scraped once.
+    
+    Args:
+        urls (list): URLs to scrape
+        max_workers (int): Maximum number of concurrent scrapes
+        per_domain_limit (int): Maximum number of concurrent scrapes per host
+        force_refresh (bool): Ignore cached results and scrape the pages again
+    
+    Yields:
+        tuple: (url, result) in completion order
+    """
+    scheduler = HostScheduler(max_concurrency=per_domain_limit)
+    
+    # Group unique URLs by host, keeping the submitted order
+    pending = OrderedDict()
+    for url in unique_urls(urls):
+        pending.setdefault(urlparse(normalize_url(url)).netloc, deque()).append(url)
+    
+    # Hosts that are busy or throttled are not tried again before this time
+    ready_at = {}
+    futures = {}
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def submit_ready():
+            now = time.monotonic()
+            for domain, queue in pending.items():
+                while queue and len(futures) < max_workers and ready_at.get(domain, 0) <= now:
+                    lease, delay = scheduler.try_acquire(queue[0])
+                    if lease is None:
+                        ready_at[domain] = now + delay
+                        break
+                    url = queue.popleft()
+                    futures[executor.submit(_scrape_single_url, url, force_refresh)] = (url, lease)
+        
+        submit_ready()
+        while futures or any(pending.values()):
+            waiting = [ready_at[domain] for domain, queue in pending.items() if queue and domain in ready_at]
+            timeout = max(0.0, min(waiting) - time.monotonic()) if waiting else None
+            if futures:
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout or 0)
+                done = ()
+            for future in done:
+                url, lease = futures.pop(future)
+                scheduler.release(lease)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Bulk scraping error for URL {url}: {str(e)}")
+                    result = {
+                        'success': False,
+                        'error': f'Failed to scrape URL: {str(e)}',
+                        'data': {}
+                    }
+                yield url, result
+            submit_ready()
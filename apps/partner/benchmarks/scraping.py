@@ -0,0 +1,439 @@
+import gc
+import json
+import time
+import random
+import logging
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.test import override_settings
+from ..scraping_service import TourScrapingService
+from ..html_markdown import parse_page, page_markdown
+from ..http_clients import get_firecrawl_app
+from ..page_signals import PageSignals
+from ..field_extractors import extract_fields
+from .bulk_scraping import scrape_tour_urls
+from ..scrape_telemetry import percentile
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+
+
+class BenchmarkNetworkError(RuntimeError):
+    """Raised when code under benchmark tries to reach the network."""
+
+
+def load_fixtures(directory=FIXTURES_DIR, names=None):
+    """
+    Load recorded tour pages.
+
+    Every fixture is a <name>.html page with a <name>.json sidecar holding the
+    page url, the recorded LLM response and optionally the Firecrawl markdown.
+    Without recorded Firecrawl markdown, the replayed Firecrawl answers with
+    the local markdown of the page and firecrawl_markdown is None.
+
+    Args:
+        directory (Path): Fixture directory
+        names (list): Only load these fixture names
+
+    Returns:
+        list: Fixture dicts with name, url, html, markdown, firecrawl_markdown and llm_response
+    """
+    fixtures = []
+    for html_path in sorted(Path(directory).glob('*.html')):
+        if names and html_path.stem not in names:
+            continue
+        meta = json.loads(html_path.with_suffix('.json').read_text(encoding='utf-8'))
+        html = html_path.read_bytes()
+        markdown = meta.get('markdown') or page_markdown(parse_page(html), meta['url'])
+        fixtures.append({
+            'name': html_path.stem,
+            'url': meta['url'],
+            'html': html,
+            'markdown': markdown,
+            'firecrawl_markdown': meta.get('markdown'),
+            'llm_response': meta.get('llm_response', {}),
+        })
+    return fixtures
+
+
+def record_fixture(url, name, directory=FIXTURES_DIR):
+    """
+    Record a live page as a fixture (needs network access and the configured API keys).
+
+    The LLM response is recorded from a real extraction so that replays stay
+    realistic, and the Firecrawl markdown (when FIRECRAWL_API_KEY is set) so
+    that check_markdown_parity can compare against it offline.
+
+    Args:
+        url (str): Tour page URL
+        name (str): Fixture name
+        directory (Path): Fixture directory
+
+    Returns:
+        Path: Path of the recorded HTML file
+    """
+    service = TourScrapingService()
+    fetched_page = service._fetch_page(url)
+    meta = {'url': url}
+
+    firecrawl_api_key = getattr(settings, 'FIRECRAWL_API_KEY', None)
+    if firecrawl_api_key:
+        scrape_result = get_firecrawl_app(firecrawl_api_key).scrape_url(url, formats=['markdown'], only_main_content=False)
+        if scrape_result.success and scrape_result.markdown:
+            meta['markdown'] = scrape_result.markdown
+
+    result = service.extract_tour_details(url, force_refresh=True)
+    meta['llm_response'] = result.get('data', {}) if result.get('success') else {}
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    html_path = directory / f'{name}.html'
+    html_path.write_bytes(fetched_page.content)
+    html_path.with_suffix('.json').write_text(json.dumps(meta, indent=2, ensure_ascii=False), encoding='utf-8')
+    return html_path
+
+
+class ScrapingBenchmark:
+    """
+    Offline benchmark of the TourScrapingService stages.
+
+    Page fetches, Firecrawl and the LLM providers are replaced by stubs that
+    replay the recorded fixtures with injected latency; any other network
+    access raises BenchmarkNetworkError.
+    """
+
+    def __init__(self, fixtures, iterations=5, firecrawl_latency=1.5, llm_latency=0.8, fetch_latency=0.2, jitter=0.2, seed=42):
+        self.fixtures = fixtures
+        self.iterations = iterations
+        self.firecrawl_latency = firecrawl_latency
+        self.llm_latency = llm_latency
+        self.fetch_latency = fetch_latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.llm_calls = 0
+
+    def _sleep(self, latency):
+        if latency > 0:
+            time.sleep(latency * self.random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def _fixture_for(self, text):
+        # Prompts and requests carry the page URL; match on the longest URL to avoid prefix clashes
+        for fixture in sorted(self.fixtures, key=lambda item: len(item['url']), reverse=True):
+            if fixture['url'] in text:
+                return fixture
+        raise BenchmarkNetworkError(f'No fixture recorded for: {text[:200]}')
+
+    def _stub_get(self, session, url, *args, **kwargs):
+        fixture = self._fixture_for(url)
+        self._sleep(self.fetch_latency)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = fixture['html']
+        response._content_consumed = True
+        response.headers['Content-Type'] = 'text/html; charset=utf-8'
+        response.url = url
+        response.encoding = 'utf-8'
+        return response
+
+    def _stub_firecrawl(self, api_key=None):
+        benchmark = self
+
+        class FirecrawlStub:
+            def scrape_url(self, url, **kwargs):
+                fixture = benchmark._fixture_for(url)
+                benchmark._sleep(benchmark.firecrawl_latency)
+                return SimpleNamespace(success=True, error=None, markdown=fixture['markdown'],
+                                       rawHtml=fixture['html'].decode('utf-8', errors='replace'))
+
+        return FirecrawlStub()
+
+    def _stub_completion(self, service, api_key, prompt, *args, **kwargs):
+        self.llm_calls += 1
+        self._sleep(self.llm_latency)
+        return json.dumps(self._fixture_for(prompt)['llm_response'])
+
+    def _block_network(self, *args, **kwargs):
+        raise BenchmarkNetworkError('Network access is not allowed during the scraping benchmark')
+
+    def _patches(self):
+        return [
+            mock.patch.object(requests.adapters.HTTPAdapter, 'send', self._block_network),
+            mock.patch.object(requests.Session, 'get', lambda session, url, *args, **kwargs: self._stub_get(session, url, *args, **kwargs)),
+            mock.patch('apps.partner.scraping_service.get_firecrawl_app', self._stub_firecrawl),
+            mock.patch.object(TourScrapingService, '_openai_completion', lambda service, *args, **kwargs: self._stub_completion(service, *args, **kwargs)),
+            mock.patch.object(TourScrapingService, '_gemini_completion', lambda service, *args, **kwargs: self._stub_completion(service, *args, **kwargs)),
+        ]
+
+    def stages(self):
+        """
+        Get the benchmarked stages.
+
+        Returns:
+            list: (stage name, settings overrides, function(fixture)) tuples
+        """
+        service = TourScrapingService()
+
+        def parse_html(fixture):
+            return BeautifulSoup(fixture['html'], 'html.parser')
+
+        def parse_page_signals(fixture):
+            return PageSignals.from_html(fixture['html'])
+
+        def extract_basic_info(fixture):
+            return service._extract_basic_info(fixture['page'], fixture['url'])
+
+        def pattern_extraction(fixture):
+            return extract_fields(fixture['markdown'])
+
+        def clean_extracted_data(fixture):
+            return service._clean_extracted_data(json.loads(json.dumps(fixture['llm_response'])))
+
+        def validate_duration(fixture):
+            return service._validate_and_clean_duration(dict(fixture['llm_response']))
+
+        def pipeline(fixture):
+            return TourScrapingService().extract_tour_details(fixture['url'], force_refresh=True)
+
+        offline = {'LLM_CACHE_BACKEND': 'none', 'OPENAI_API_KEY': 'benchmark', 'GEMINI_API_KEY': None, 'SCRAPE_TELEMETRY_ENABLED': False}
+        return [
+            ('parse_html', {}, parse_html),
+            ('parse_page_signals', {}, parse_page_signals),
+            ('extract_basic_info', {}, extract_basic_info),
+            ('pattern_extraction', {}, pattern_extraction),
+            ('clean_extracted_data', {}, clean_extracted_data),
+            ('validate_and_clean_duration', {}, validate_duration),
+            ('pipeline_firecrawl', {**offline, 'FIRECRAWL_API_KEY': 'benchmark', 'SCRAPE_LOCAL_MARKDOWN_ENABLED': False}, pipeline),
+            ('pipeline_firecrawl_llm_only', {**offline, 'FIRECRAWL_API_KEY': 'benchmark', 'SCRAPE_LOCAL_MARKDOWN_ENABLED': False,
+                                             'SCRAPE_PATTERN_EXTRACTION_ENABLED': False}, pipeline),
+            ('pipeline_local_markdown', {**offline, 'FIRECRAWL_API_KEY': 'benchmark', 'SCRAPE_LOCAL_MARKDOWN_ENABLED': True}, pipeline),
+            ('pipeline_manual_fallback', {**offline, 'FIRECRAWL_API_KEY': None}, pipeline),
+        ]
+
+    def run(self, stage_names=None):
+        """
+        Run the benchmark.
+
+        Every stage runs `iterations` timed passes over all fixtures, then one
+        extra pass per fixture under tracemalloc for the peak memory.
+
+        Args:
+            stage_names (list): Only run these stages
+
+        Returns:
+            dict: Per stage: runs, p50/p95/mean/max seconds, pages per second, LLM calls per run and peak memory in KiB
+        """
+        for fixture in self.fixtures:
+            fixture['page'] = PageSignals.from_html(fixture['html'])
+
+        patches = self._patches()
+        for patch in patches:
+            patch.start()
+        results = {}
+        try:
+            for name, overrides, func in self.stages():
+                if stage_names and name not in stage_names:
+                    continue
+                with override_settings(**overrides):
+                    results[name] = self._run_stage(func)
+                logger.info(f"Benchmarked {name}: p50 {results[name]['p50']}s, p95 {results[name]['p95']}s")
+        finally:
+            for patch in reversed(patches):
+                patch.stop()
+        return results
+
+    def _run_stage(self, func):
+        durations = []
+        llm_calls = self.llm_calls
+        for _ in range(self.iterations):
+            for fixture in self.fixtures:
+                start_time = time.perf_counter()
+                func(fixture)
+                durations.append(time.perf_counter() - start_time)
+        llm_calls = self.llm_calls - llm_calls
+
+        peak_memory = 0
+        for fixture in self.fixtures:
+            gc.collect()
+            tracemalloc.start()
+            try:
+                func(fixture)
+                peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        return {
+            'runs': len(durations),
+            'p50': round(percentile(durations, 50), 5),
+            'p95': round(percentile(durations, 95), 5),
+            'mean': round(sum(durations) / len(durations), 5) if durations else 0.0,
+            'max': round(max(durations), 5) if durations else 0.0,
+            'pages_per_second': round(len(durations) / sum(durations), 2) if sum(durations) else 0.0,
+            'llm_calls_per_run': round(llm_calls / len(durations), 2) if durations else 0.0,
+            'peak_memory_kib': round(peak_memory / 1024, 1),
+        }
+
+
+def compare_with_baseline(results, baseline, max_regression=0.2):
+    """
+    Find stages whose p95 got slower than a previous run by more than max_regression.
+
+    Args:
+        results (dict): Output of ScrapingBenchmark.run
+        baseline (dict): Earlier output of ScrapingBenchmark.run
+        max_regression (float): Allowed slowdown as a fraction (0.2 = 20%)
+
+    Returns:
+        list: (stage, baseline p95, current p95) for every regressed stage
+    """
+    regressions = []
+    for stage, stats in results.items():
+        previous = baseline.get(stage)
+        if previous and previous['p95'] > 0 and stats['p95'] > previous['p95'] * (1 + max_regression):
+            regressions.append((stage, previous['p95'], stats['p95']))
+    return regressions
+
+
+class StandInSite:
+    """
+    Local HTTP server standing in for an operator website, for offline politeness checks.
+
+    Every page request is answered with the same HTML after an artificial
+    delay; the server records when requests start and how many run at once.
+    """
+
+    def __init__(self, html, delay=0.2, robots_txt='User-agent: *\nAllow: /\n'):
+        self.html = html
+        self.delay = delay
+        self.robots_txt = robots_txt
+        self.request_starts = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/robots.txt':
+                    self._respond(site.robots_txt.encode('utf-8'), 'text/plain')
+                    return
+                with site._lock:
+                    site.request_starts.append(time.monotonic())
+                    site.active += 1
+                    site.max_active = max(site.max_active, site.active)
+                try:
+                    time.sleep(site.delay)
+                    self._respond(site.html, 'text/html; charset=utf-8')
+                finally:
+                    with site._lock:
+                        site.active -= 1
+
+            def _respond(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        """Start serving on a free localhost port."""
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def min_start_gap(self):
+        """Shortest time between two page request starts, in seconds."""
+        starts = sorted(self.request_starts)
+        return min((later - earlier for earlier, later in zip(starts, starts[1:])), default=0.0)
+
+
+def run_politeness_check(html, sites=3, urls_per_site=4, delay=0.2, slow_delay=None, disallowed_per_site=1, per_domain_limit=2, max_workers=8):
+    """
+    Bulk scrape stand-in sites and report how the per-host politeness held up.
+
+    The first site answers after slow_delay seconds to show that a slow host
+    does not stall the others. Every site disallows /private/ in its robots.txt.
+    No Firecrawl or LLM calls are made (manual pipeline without API keys).
+
+    Args:
+        html (bytes): Page served by every site
+        sites (int): Number of stand-in sites (hosts)
+        urls_per_site (int): Allowed URLs per site
+        delay (float): Response delay of the sites in seconds
+        slow_delay (float): Response delay of the first site (defaults to delay)
+        disallowed_per_site (int): Extra URLs per site under /private/
+        per_domain_limit (int): Concurrent scrapes per host
+        max_workers (int): Concurrent scrapes overall
+
+    Returns:
+        dict: Per site requests, max concurrency, min start gap and finish time; plus totals
+    """
+    robots_txt = 'User-agent: *\nDisallow: /private/\n'
+    stand_ins = [
+        StandInSite(html, delay=slow_delay if index == 0 and slow_delay else delay, robots_txt=robots_txt).start()
+        for index in range(sites)
+    ]
+    try:
+        urls = []
+        for site in stand_ins:
+            urls += [f'{site.base_url}/tour-{index}' for index in range(urls_per_site)]
+            urls += [f'{site.base_url}/private/tour-{index}' for index in range(disallowed_per_site)]
+        # Interleave hosts like a real bulk import would
+        urls.sort(key=lambda url: url.rsplit('-', 1)[-1])
+
+        offline = {
+            'FIRECRAWL_API_KEY': None, 'OPENAI_API_KEY': None, 'GEMINI_API_KEY': None,
+            'LLM_CACHE_BACKEND': 'none', 'SCRAPE_HEDGE_ENABLED': False, 'SCRAPE_TELEMETRY_ENABLED': False,
+        }
+        finished = {}
+        disallowed = 0
+        start_time = time.monotonic()
+        with override_settings(**offline):
+            for url, result in scrape_tour_urls(urls, max_workers=max_workers, per_domain_limit=per_domain_limit, force_refresh=True):
+                host = url.split('/')[2]
+                finished[host] = time.monotonic() - start_time
+                if '/private/' in url and not result.get('success'):
+                    disallowed += 1
+
+        return {
+            'total_seconds': round(time.monotonic() - start_time, 3),
+            'disallowed': disallowed,
+            'sites': [
+                {
+                    'host': site.base_url,
+                    'delay': site.delay,
+                    'page_requests': len(site.request_starts),
+                    'max_concurrent': site.max_active,
+                    'min_start_gap': round(site.min_start_gap(), 3),
+                    'finished_after': round(finished.get(site.base_url.split('/')[2], 0.0), 3),
+                }
+                for site in stand_ins
+            ],
+        }
+    finally:
+        for site in stand_ins:
+            site.stop()
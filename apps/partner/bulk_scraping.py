@@ -0,0 +1,94 @@
+import time
+import logging
+from celery import group
+from celery.result import GroupResult
+from django.conf import settings
+from .scraping_cache import normalize_url
+from .tasks import scrape_tour_details_task
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def unique_urls(urls):
+    """Drop URLs that are duplicates after normalization, keeping the submitted order."""
+    seen = set()
+    unique = []
+    for url in urls:
+        key = normalize_url(url)
+        if key not in seen:
+            seen.add(key)
+            unique.append(url)
+    return unique
+
+
+def queue_bulk_scrape(urls, force_refresh=False):
+    """
+    Queue one background scrape job per unique URL as a Celery group.
+
+    The jobs run on the scraping queue with the per-host politeness of
+    single scrape jobs, so no web worker is held while they run. The group
+    is saved in the result backend, so its progress can be read back from
+    any web worker with get_bulk_scrape_job.
+
+    Args:
+        urls (list): URLs to scrape
+        force_refresh (bool): Ignore cached results and scrape the pages again
+
+    Returns:
+        tuple: (GroupResult, list of (url, job id) in submitted order)
+    """
+    urls = unique_urls(urls)
+    job = group(scrape_tour_details_task.s(url, force_refresh=force_refresh) for url in urls).apply_async()
+    job.save()
+    return job, [(url, child.id) for url, child in zip(urls, job.results)]
+
+
+def get_bulk_scrape_job(job_id):
+    """Get a saved bulk scrape group by id, or None when unknown or expired."""
+    return GroupResult.restore(job_id, app=scrape_tour_details_task.app)
+
+
+def iter_finished_jobs(job, poll_interval=None, keepalive_interval=15, timeout=None):
+    """
+    Yield the jobs of a bulk scrape as they finish.
+
+    The unfinished jobs are checked in the result backend every poll_interval
+    seconds (SCRAPE_BULK_STREAM_POLL_INTERVAL), so finished jobs are reported
+    in completion order, not in submitted order. Stops after timeout seconds
+    (SCRAPE_BULK_STREAM_TIMEOUT) even when jobs are still queued or running;
+    their results can still be read with get_bulk_scrape_job.
+
+    Args:
+        job (GroupResult): Bulk scrape returned by queue_bulk_scrape
+        poll_interval (float): Seconds between two checks of the unfinished jobs
+        keepalive_interval (float): Seconds without a finished job before a keepalive
+        timeout (float): Seconds after which to stop waiting
+
+    Yields:
+        AsyncResult or None: A finished job, or None as a keepalive
+    """
+    poll_interval = poll_interval or getattr(settings, 'SCRAPE_BULK_STREAM_POLL_INTERVAL', 1)
+    timeout = timeout or getattr(settings, 'SCRAPE_BULK_STREAM_TIMEOUT', 30 * 60)
+    deadline = time.monotonic() + timeout
+    last_event = time.monotonic()
+    pending = list(job.results)
+
+    while pending:
+        unfinished = []
+        for child in pending:
+            if child.ready():
+                last_event = time.monotonic()
+                yield child
+            else:
+                unfinished.append(child)
+        pending = unfinished
+        if not pending:
+            break
+        if time.monotonic() >= deadline:
+            logger.warning(f"Stopped streaming bulk scrape {job.id} with {len(pending)} jobs unfinished")
+            break
+        if time.monotonic() - last_event >= keepalive_interval:
+            last_event = time.monotonic()
+            yield None
+        time.sleep(poll_interval)
@@ -0,0 +1,150 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+from .models import Tour
+from .serializers import TourCreateSerializer, TourUpdateSerializer
+from .tour_cache import bump_partner_version
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _item_error(index, errors, tour_id=None):
+    error = {'index': index}
+    if tour_id is not None:
+        error['id'] = tour_id
+    error['errors'] = errors
+    return error
+
+
+def validate_tour_items(partner, items):
+    """
+    Validate tours to create or update without touching the database.
+
+    Items with an "id" update that tour (partial update, TourUpdateSerializer
+    rules); items without one create a tour (TourCreateSerializer rules).
+    One serializer per kind validates every item, so the fields are only
+    built once per request.
+
+    Args:
+        partner (Partner): Owner of the tours
+        items (list): Tour payloads in the camelCase API format
+
+    Returns:
+        tuple: (creates, updates, errors) where creates is a list of
+            (index, validated_data), updates a dict of tour id -> (index, validated_data)
+            and errors a list of {index, id?, errors}
+    """
+    create_serializer = TourCreateSerializer()
+    update_serializer = TourUpdateSerializer(partial=True)
+    creates, updates, errors = [], {}, []
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(_item_error(index, {'non_field_errors': ['Expected an object.']}))
+            continue
+
+        data = dict(item)
+        tour_id = data.pop('id', None)
+        if tour_id is None:
+            data['user_id'] = partner.user_id
+            serializer = create_serializer
+        else:
+            try:
+                tour_id = int(tour_id)
+            except (TypeError, ValueError):
+                errors.append(_item_error(index, {'id': ['A valid integer is required.']}))
+                continue
+            if tour_id in updates:
+                errors.append(_item_error(index, {'id': ['This tour is already updated by another item.']}, tour_id))
+                continue
+            serializer = update_serializer
+
+        try:
+            validated_data = serializer.run_validation(data)
+        except serializers.ValidationError as e:
+            errors.append(_item_error(index, serializers.as_serializer_error(e), tour_id))
+            continue
+
+        if tour_id is None:
+            validated_data.pop('user_id', None)
+            creates.append((index, validated_data))
+        else:
+            updates[tour_id] = (index, validated_data)
+
+    return creates, updates, errors
+
+
+def bulk_write_tours(partner, items, all_or_nothing=False):
+    """
+    Create and update many tours of a partner in one transaction.
+
+    All items are validated first. New tours are inserted with bulk_create
+    and changed tours written with one bulk_update, both in batches of
+    TOUR_BULK_BATCH_SIZE, with their visibility scores computed in the same
+    pass (Tour.save() is bypassed). Since bulk writes send no model signals,
+    the partner's tour cache is invalidated once the transaction commits.
+
+    Args:
+        partner (Partner): Owner of the tours
+        items (list): Tour payloads; items with an "id" update that tour
+        all_or_nothing (bool): Write nothing when any item is invalid
+
+    Returns:
+        dict: created and updated ({index, id} per written item) and errors ({index, id?, errors} per rejected item)
+    """
+    creates, updates, errors = validate_tour_items(partner, items)
+    report = {'created': [], 'updated': [], 'errors': errors}
+    if all_or_nothing and errors:
+        return report
+
+    batch_size = getattr(settings, 'TOUR_BULK_BATCH_SIZE', 500)
+    with transaction.atomic():
+        tours = []
+        if updates:
+            # Lock the tours so concurrent edits are not overwritten with stale values
+            tours = Tour.objects.select_for_update().filter(partner=partner).in_bulk(list(updates))
+            for tour_id, (index, _) in updates.items():
+                if tour_id not in tours:
+                    errors.append(_item_error(index, {'id': ['Tour not found.']}, tour_id))
+            errors.sort(key=lambda error: error['index'])
+            if all_or_nothing and errors:
+                return report
+
+        new_tours = []
+        for index, validated_data in creates:
+            tour = Tour(partner=partner, **validated_data)
+            tour.visibility_score = tour.calculate_visibility_score()
+            new_tours.append(tour)
+        if new_tours:
+            Tour.objects.bulk_create(new_tours, batch_size=batch_size)
+            report['created'] = [
+                {'index': index, 'id': tour.id} for (index, _), tour in zip(creates, new_tours)
+            ]
+
+        if tours:
+            now = timezone.now()
+            fields = {'visibility_score', 'updated_at'}
+            for tour_id, tour in tours.items():
+                index, validated_data = updates[tour_id]
+                for attr, value in validated_data.items():
+                    setattr(tour, attr, value)
+                    fields.add(attr)
+                tour.visibility_score = tour.calculate_visibility_score()
+                tour.updated_at = now
+            Tour.objects.bulk_update(list(tours.values()), sorted(fields), batch_size=batch_size)
+            report['updated'] = sorted(
+                ({'index': updates[tour_id][0], 'id': tour_id} for tour_id in tours),
+                key=lambda item: item['index']
+            )
+
+        if new_tours or tours:
+            transaction.on_commit(lambda: bump_partner_version(partner.id))
+
+    logger.info(
+        f"Bulk tour write for partner {partner.id}: {len(report['created'])} created, "
+        f"{len(report['updated'])} updated, {len(errors)} rejected"
+    )
+    return report
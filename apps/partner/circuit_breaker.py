@@ -0,0 +1,242 @@
+import time
+import logging
+from django.core.cache import cache
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# External providers used by the scraping service
+SCRAPING_PROVIDERS = ('firecrawl', 'openai', 'gemini')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for an external provider with its state kept in the Django cache.
+    
+    Keeping the state in the cache lets every gunicorn and Celery worker see
+    the same state (use CACHE_REDIS_URL in production). Every counter is its
+    own cache key updated with cache.incr, so concurrent workers never lose
+    counts. Calls are counted in fixed windows of CIRCUIT_BREAKER_WINDOW
+    seconds: once at least CIRCUIT_BREAKER_MIN_CALLS calls were made and the
+    share of failed or slow calls reaches CIRCUIT_BREAKER_FAILURE_THRESHOLD
+    the breaker opens and callers skip the provider. After
+    CIRCUIT_BREAKER_RESET_TIMEOUT seconds a single probe call is let through
+    (half-open, granted with cache.add): success closes the breaker, failure
+    opens it again.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.cache_key = f"circuit_breaker:{name}"
+        self.opened_key = f"{self.cache_key}:opened_at"
+        self.probe_key = f"{self.cache_key}:probe"
+        self.error_key = f"{self.cache_key}:last_error"
+        self.failure_threshold = getattr(settings, 'CIRCUIT_BREAKER_FAILURE_THRESHOLD', 0.5)
+        self.min_calls = getattr(settings, 'CIRCUIT_BREAKER_MIN_CALLS', 5)
+        self.window_seconds = getattr(settings, 'CIRCUIT_BREAKER_WINDOW', 60)
+        self.reset_timeout = getattr(settings, 'CIRCUIT_BREAKER_RESET_TIMEOUT', 30)
+        self.slow_call_seconds = getattr(settings, 'CIRCUIT_BREAKER_SLOW_CALL_SECONDS', {}).get(name, 30)
+        # The probe lock lasts as long as a call may take before it counts as slow
+        self.probe_timeout = max(self.reset_timeout, self.slow_call_seconds)
+        # Keep the open state well beyond the reset timeout so it survives quiet periods
+        self.state_timeout = max(self.window_seconds, self.reset_timeout) * 10
+    
+    def _window_keys(self, now=None):
+        window = int((now or time.time()) // self.window_seconds)
+        prefix = f"{self.cache_key}:window:{window}"
+        return {
+            'calls': f"{prefix}:calls",
+            'failures': f"{prefix}:failures",
+            'slow_calls': f"{prefix}:slow_calls",
+            'latency_ms': f"{prefix}:latency_ms",
+        }
+    
+    def _total_keys(self):
+        return {
+            'total_calls': f"{self.cache_key}:total_calls",
+            'total_failures': f"{self.cache_key}:total_failures",
+            'times_opened': f"{self.cache_key}:times_opened",
+        }
+    
+    def _incr(self, key, delta=1, timeout=None):
+        try:
+            # add() is a no-op when the counter exists, incr() is atomic on Redis and locmem
+            cache.add(key, 0, timeout)
+            return cache.incr(key, delta)
+        except Exception as e:
+            logger.error(f"Circuit breaker cache write error for {self.name}: {str(e)}")
+            return None
+    
+    def _get_opened_at(self):
+        try:
+            return cache.get(self.opened_key)
+        except Exception as e:
+            # Fail closed: a cache outage must not stop calls to the provider
+            logger.error(f"Circuit breaker cache read error for {self.name}: {str(e)}")
+            return None
+    
+    def _state(self, opened_at):
+        if opened_at is None:
+            return CLOSED
+        return HALF_OPEN if time.time() - opened_at >= self.reset_timeout else OPEN
+    
+    def allow_request(self):
+        """
+        Check whether a call to the provider may be made.
+        
+        Returns:
+            bool: False while the breaker is open, True otherwise (one probe when half-open)
+        """
+        state = self._state(self._get_opened_at())
+        if state == CLOSED:
+            return True
+        if state == OPEN:
+            return False
+        
+        # Only one worker gets to probe; the probe lock expires in case the probe never reports back
+        try:
+            allowed = cache.add(self.probe_key, True, self.probe_timeout)
+        except Exception as e:
+            logger.error(f"Circuit breaker probe lock error for {self.name}: {str(e)}")
+            return False
+        if allowed:
+            logger.info(f"Circuit breaker for {self.name} is half-open, probing provider")
+        return allowed
+    
+    def _record(self, latency, failed):
+        now = time.time()
+        window = self._window_keys(now)
+        # Window counters outlive their window so the previous one can still be read
+        window_timeout = self.window_seconds * 2
+        slow = latency >= self.slow_call_seconds
+        self._incr(window['calls'], timeout=window_timeout)
+        self._incr(window['latency_ms'], int(latency * 1000), timeout=window_timeout)
+        if failed:
+            self._incr(window['failures'], timeout=window_timeout)
+        if slow:
+            self._incr(window['slow_calls'], timeout=window_timeout)
+        totals = self._total_keys()
+        self._incr(totals['total_calls'])
+        if failed:
+            self._incr(totals['total_failures'])
+        return window, slow
+    
+    def record_success(self, latency):
+        """Record a successful call and its latency in seconds."""
+        window, slow = self._record(latency, failed=False)
+        if self._state(self._get_opened_at()) != HALF_OPEN:
+            self._evaluate(window)
+        elif slow:
+            self._open(f'Probe call took {latency:.1f}s', reopen=True)
+        else:
+            self._close(window)
+    
+    def record_failure(self, latency, error=''):
+        """Record a failed call, its latency in seconds and the error message."""
+        window, _ = self._record(latency, failed=True)
+        try:
+            cache.set(self.error_key, str(error)[:500], None)
+        except Exception as e:
+            logger.error(f"Circuit breaker cache write error for {self.name}: {str(e)}")
+        
+        if self._state(self._get_opened_at()) == HALF_OPEN:
+            self._open(error, reopen=True)
+        else:
+            self._evaluate(window)
+    
+    def _get_window(self, window):
+        try:
+            values = cache.get_many(list(window.values()))
+        except Exception as e:
+            logger.error(f"Circuit breaker cache read error for {self.name}: {str(e)}")
+            values = {}
+        return {name: values.get(key, 0) for name, key in window.items()}
+    
+    def _evaluate(self, window):
+        counts = self._get_window(window)
+        if counts['calls'] < self.min_calls:
+            return
+        error_rate = (counts['failures'] + counts['slow_calls']) / counts['calls']
+        if error_rate >= self.failure_threshold:
+            self._open(f'Error rate {error_rate:.0%} over {counts["calls"]} calls')
+    
+    def _open(self, reason, reopen=False):
+        try:
+            if reopen:
+                cache.set(self.opened_key, time.time(), self.state_timeout)
+                opened = True
+            else:
+                # Several workers may reach the threshold together; the first one opens the breaker
+                opened = cache.add(self.opened_key, time.time(), self.state_timeout)
+        except Exception as e:
+            logger.error(f"Circuit breaker cache write error for {self.name}: {str(e)}")
+            return
+        if opened:
+            logger.warning(f"Circuit breaker for {self.name} opened: {reason}")
+            self._incr(self._total_keys()['times_opened'])
+        self._release_probe()
+    
+    def _close(self, window):
+        logger.info(f"Circuit breaker for {self.name} closed after successful probe")
+        try:
+            # Start from an empty window, so the failures that opened the breaker do not trip it again
+            cache.delete_many([self.opened_key, self.probe_key, *window.values()])
+        except Exception as e:
+            logger.error(f"Circuit breaker cache write error for {self.name}: {str(e)}")
+    
+    def _release_probe(self):
+        try:
+            cache.delete(self.probe_key)
+        except Exception as e:
+            logger.error(f"Circuit breaker probe release error for {self.name}: {str(e)}")
+    
+    def reset(self):
+        """Close the breaker and clear all counters."""
+        try:
+            cache.delete_many([
+                self.opened_key, self.probe_key, self.error_key,
+                *self._window_keys().values(), *self._total_keys().values()
+            ])
+        except Exception as e:
+            logger.error(f"Circuit breaker reset error for {self.name}: {str(e)}")
+    
+    def snapshot(self):
+        """
+        Get the breaker state and counters for monitoring.
+        
+        Returns:
+            dict: State, window counters, error rate, average latency and totals
+        """
+        window = self._window_keys()
+        totals = self._total_keys()
+        try:
+            values = cache.get_many([self.opened_key, self.error_key, *window.values(), *totals.values()])
+        except Exception as e:
+            logger.error(f"Circuit breaker cache read error for {self.name}: {str(e)}")
+            values = {}
+        counts = {name: values.get(key, 0) for name, key in {**window, **totals}.items()}
+        opened_at = values.get(self.opened_key)
+        calls = counts['calls']
+        return {
+            'state': self._state(opened_at),
+            'opened_at': opened_at,
+            'window_calls': calls,
+            'window_failures': counts['failures'],
+            'window_slow_calls': counts['slow_calls'],
+            'error_rate': round((counts['failures'] + counts['slow_calls']) / calls, 3) if calls else 0.0,
+            'avg_latency': round(counts['latency_ms'] / 1000 / calls, 3) if calls else 0.0,
+            'total_calls': counts['total_calls'],
+            'total_failures': counts['total_failures'],
+            'times_opened': counts['times_opened'],
+            'last_error': values.get(self.error_key, ''),
+        }
+
+
+def get_circuit_breaker_states():
+    """Get a snapshot of the circuit breaker of every scraping provider."""
+    return {name: CircuitBreaker(name).snapshot() for name in SCRAPING_PROVIDERS}
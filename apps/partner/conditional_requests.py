@@ -0,0 +1,93 @@
+import hashlib
+import logging
+from calendar import timegm
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Bump when the tour serializers change, so clients holding old ETags get the new payload
+TOUR_ETAG_VERSION = 1
+
+
+def _make_etag(*parts):
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+    return quote_etag(digest)
+
+
+def query_fingerprint(request):
+    """Every query parameter (filters, ordering, cursor, fields, ...) of a request, in a stable order."""
+    return sorted((key, sorted(values)) for key, values in request.query_params.lists())
+
+
+def tour_list_validators(queryset, request):
+    """
+    Compute the ETag, Last-Modified and size of a tour list with one aggregate query.
+
+    The ETag covers the newest updated_at and the number of tours in the
+    filtered set, so edits, additions and deletions all change it, plus the
+    query parameters of the request.
+
+    Args:
+        queryset (QuerySet): Filtered tours, before pagination
+        request (Request): The list request
+
+    Returns:
+        tuple: (etag, last_modified datetime or None, number of tours in the filtered set)
+    """
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), count=Count('id'))
+    last_modified = stats['last_modified']
+    etag = _make_etag(
+        'tour-list', TOUR_ETAG_VERSION, stats['count'],
+        last_modified.isoformat() if last_modified else '', query_fingerprint(request)
+    )
+    return etag, last_modified, stats['count']
+
+
+def tour_detail_validators(tour_id, updated_at):
+    """
+    Compute the ETag and Last-Modified of one tour.
+
+    Args:
+        tour_id (int): Tour id
+        updated_at (datetime): Tour.updated_at
+
+    Returns:
+        tuple: (etag, last_modified datetime)
+    """
+    return _make_etag('tour', TOUR_ETAG_VERSION, tour_id, updated_at.isoformat()), updated_at
+
+
+def not_modified_response(request, etag, last_modified):
+    """
+    Answer If-None-Match / If-Modified-Since requests whose resource did not change.
+
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110), so
+    changes within the one-second resolution of Last-Modified are still
+    detected by ETag-aware clients.
+
+    Args:
+        request (Request): The request
+        etag (str): Current ETag
+        last_modified (datetime or None): Current modification time
+
+    Returns:
+        HttpResponse or None: 304 Not Modified response, or None when the full response must be sent
+    """
+    timestamp = timegm(last_modified.utctimetuple()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    """Add the ETag, Last-Modified and revalidation headers to a response."""
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(timegm(last_modified.utctimetuple()))
+    # Partner data: never stored by shared caches, always revalidated by the client
+    response['Cache-Control'] = 'private, no-cache'
+    return response
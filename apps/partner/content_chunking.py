@@ -0,0 +1,200 @@
+import re
+import logging
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Rough size of an LLM token for English text and markdown
+CHARS_PER_TOKEN = 4
+
+# Sections longer than this are split further on paragraphs
+MAX_SECTION_CHARS = 1200
+
+PRICE_PATTERN = re.compile(r'(₹|rs\.?\s?\d|inr|\$|usd|€|eur|£)\s?[\d,]+', re.IGNORECASE)
+PRICE_WORDS_PATTERN = re.compile(r'\b(price|cost|per person|starting from|onwards|tariff|package cost)\b', re.IGNORECASE)
+DURATION_PATTERN = re.compile(r'\b\d+\s*(days?|d)\b|\b\d+\s*(nights?|n)\b', re.IGNORECASE)
+DAY_PATTERN = re.compile(r'\bday\s*\d+\b', re.IGNORECASE)
+SECTION_PATTERN = re.compile(r'\b(itinerary|inclusions?|exclusions?|included|excluded|highlights?|overview)\b', re.IGNORECASE)
+HIGHLIGHTS_PATTERN = re.compile(r'\b(highlights?|inclusions?|included|experiences?|what you.ll (do|see))\b', re.IGNORECASE)
+MONTH_PATTERN = re.compile(r'\b(january|february|march|april|may|june|july|august|september|october|november|december|'
+                           r'jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)\b', re.IGNORECASE)
+DEPARTURE_PATTERN = re.compile(r'\b(departure|departs|batch|dates?|season|best time)\b', re.IGNORECASE)
+LOCATION_PATTERN = re.compile(r'\b(start|starts|starting point|pick-?up|drop|ends?|arrive|departure cit(y|ies))\b', re.IGNORECASE)
+PLACE_PATTERN = re.compile(r'\b(destinations?|visit|sightseeing|hotel|stay|transfers?|meals?|breakfast|trek|tour)\b', re.IGNORECASE)
+CONTACT_PATTERN = re.compile(r'\b(contact|call us|whatsapp|email|phone)\b|\+?\d[\d\s-]{8,}\d', re.IGNORECASE)
+
+# (pattern, weight) signals for sections that hold tour fields
+RELEVANCE_SIGNALS = [
+    (PRICE_PATTERN, 4.0),
+    (PRICE_WORDS_PATTERN, 2.0),
+    (DURATION_PATTERN, 3.0),
+    (DAY_PATTERN, 2.0),
+    (SECTION_PATTERN, 3.0),
+    (MONTH_PATTERN, 1.5),
+    (DEPARTURE_PATTERN, 1.5),
+    (PLACE_PATTERN, 1.0),
+    (CONTACT_PATTERN, 1.0),
+]
+
+# Signals for the sections that can fill one specific TourExtractionSchema field
+FIELD_SIGNALS = {
+    'startingPrice': [(PRICE_PATTERN, 4.0), (PRICE_WORDS_PATTERN, 2.0)],
+    'durationDays': [(DURATION_PATTERN, 4.0), (DAY_PATTERN, 1.0)],
+    'durationNights': [(DURATION_PATTERN, 4.0), (DAY_PATTERN, 1.0)],
+    'destinations': [(DAY_PATTERN, 2.0), (SECTION_PATTERN, 1.0), (PLACE_PATTERN, 2.0)],
+    'highlights': [(HIGHLIGHTS_PATTERN, 4.0), (SECTION_PATTERN, 1.0)],
+    'departureMonths': [(MONTH_PATTERN, 3.0), (DEPARTURE_PATTERN, 2.0)],
+    'departureCities': [(DEPARTURE_PATTERN, 2.0), (LOCATION_PATTERN, 2.0)],
+    'tourStartLocation': [(LOCATION_PATTERN, 3.0), (DAY_PATTERN, 1.0)],
+    'tourDropLocation': [(LOCATION_PATTERN, 3.0), (DAY_PATTERN, 1.0)],
+    'contactLink': [(CONTACT_PATTERN, 4.0)],
+}
+
+# Signals for boilerplate sections
+NOISE_SIGNALS = [
+    (re.compile(r'\b(cookies?|privacy policy|terms (of|and) (use|conditions)|copyright|all rights reserved)\b', re.IGNORECASE), 3.0),
+    (re.compile(r'\b(log ?in|sign ?(in|up)|subscribe|newsletter|follow us|download (the )?app)\b', re.IGNORECASE), 2.0),
+]
+MARKDOWN_LINK_PATTERN = re.compile(r'\[([^\]]*)\]\([^)]*\)')
+
+
+def estimate_tokens(text):
+    """Estimate the number of LLM tokens in a text."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def split_sections(text):
+    """
+    Split markdown or plain page text into sections.
+
+    Markdown is split on headings, plain text on blank lines. Sections longer
+    than MAX_SECTION_CHARS are split further on paragraphs and lines.
+
+    Args:
+        text (str): Page content
+
+    Returns:
+        list: Non-empty sections in page order
+    """
+    text = re.sub(r'\n[ \t]*\n(?:[ \t]*\n)+', '\n\n', text or '')
+    if re.search(r'^#{1,6} ', text, re.MULTILINE):
+        sections = re.split(r'\n(?=#{1,6} )', text)
+    else:
+        sections = text.split('\n\n')
+
+    result = []
+    for section in sections:
+        section = section.strip()
+        if not section:
+            continue
+        if len(section) <= MAX_SECTION_CHARS:
+            result.append(section)
+            continue
+        result.extend(_split_long_section(section))
+    return result
+
+
+def _split_long_section(section):
+    """Split a long section into pieces of at most MAX_SECTION_CHARS, keeping its heading on the first piece."""
+    pieces, current = [], ''
+    for block in re.split(r'\n\n|\n', section):
+        block = block.strip()
+        if not block:
+            continue
+        while len(block) > MAX_SECTION_CHARS:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(block[:MAX_SECTION_CHARS])
+            block = block[MAX_SECTION_CHARS:]
+        if current and len(current) + len(block) + 1 > MAX_SECTION_CHARS:
+            pieces.append(current)
+            current = ''
+        current = f'{current}\n{block}' if current else block
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def score_section(section, signals=None):
+    """
+    Score how likely a section is to hold tour fields (price, duration, itinerary, dates).
+
+    Args:
+        section (str): One section from split_sections
+        signals (list): (pattern, weight) pairs to score on, RELEVANCE_SIGNALS by default
+
+    Returns:
+        float: Relevance score, higher is better
+    """
+    score = 0.0
+    for pattern, weight in signals or RELEVANCE_SIGNALS:
+        # Diminishing returns so one long list of months does not dominate
+        matches = len(pattern.findall(section))
+        score += weight * min(matches, 5) ** 0.5
+    for pattern, weight in NOISE_SIGNALS:
+        score -= weight * min(len(pattern.findall(section)), 5)
+
+    # Menus and link lists: mostly link text
+    link_text = sum(len(match.group(1)) for match in MARKDOWN_LINK_PATTERN.finditer(section))
+    if link_text > len(section) * 0.5:
+        score -= 3.0
+    if section.lstrip().startswith('#'):
+        score += 0.5
+    return score
+
+
+def select_relevant_content(text, token_budget, signals=None):
+    """
+    Pack the most relevant sections of a page into a token budget.
+
+    The start of the first section (usually the title and intro) is always kept;
+    the other sections are chosen by score per token and returned in page order.
+
+    Args:
+        text (str): Page content as markdown or plain text
+        token_budget (int): Maximum number of tokens to return
+        signals (list): (pattern, weight) pairs to score on, RELEVANCE_SIGNALS by default
+
+    Returns:
+        str: Selected sections joined by blank lines
+    """
+    text = text or ''
+    if estimate_tokens(text) <= token_budget:
+        return text.strip()
+
+    sections = split_sections(text)
+    if not sections:
+        return ''
+
+    # The lead only gets a fifth of the budget, so a title followed by a menu cannot crowd out the rest
+    lead_chars = token_budget * CHARS_PER_TOKEN // 5
+    if len(sections[0]) > lead_chars:
+        sections[0] = sections[0][:lead_chars].rsplit('\n', 1)[0]
+    selected = {0}
+    used = estimate_tokens(sections[0])
+
+    ranked = sorted(
+        ((score_section(section, signals), index) for index, section in enumerate(sections) if index),
+        key=lambda item: (item[0] / estimate_tokens(sections[item[1]]) ** 0.5, item[0]),
+        reverse=True
+    )
+    for score, index in ranked:
+        if score <= 0:
+            break
+        tokens = estimate_tokens(sections[index])
+        if used + tokens <= token_budget:
+            selected.add(index)
+            used += tokens
+
+    logger.debug(f"Selected {len(selected)} of {len(sections)} sections ({used} of {token_budget} tokens)")
+    return '\n\n'.join(sections[index] for index in sorted(selected))
+
+
+def signals_for_fields(fields):
+    """Combine the FIELD_SIGNALS of several fields, keeping the highest weight per pattern."""
+    weights = {}
+    for field in fields:
+        for pattern, weight in FIELD_SIGNALS.get(field, []):
+            weights[pattern] = max(weight, weights.get(pattern, 0))
+    return list(weights.items()) or None
@@ -0,0 +1,389 @@
+import re
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MONTHS = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+
+# Fields a page needs before the pipeline may skip the LLM on deterministic extraction alone
+REGEX_REQUIRED_FIELDS = ('title', 'destinations', 'durationDays', 'startingPrice')
+
+# Destinations recognised in tour titles
+KNOWN_DESTINATIONS = [
+    'Bali', 'Thailand', 'Singapore', 'Maldives', 'Dubai', 'Europe', 'India', 'Japan', 'Korea', 'Australia',
+    'New Zealand', 'USA', 'Canada', 'Mexico', 'Brazil', 'Argentina', 'South Africa', 'Egypt', 'Morocco', 'Turkey',
+    'Greece', 'Italy', 'Spain', 'France', 'Germany', 'Netherlands', 'Belgium', 'Switzerland', 'Austria',
+    'Czech Republic', 'Poland', 'Hungary', 'Romania', 'Bulgaria', 'Croatia', 'Slovenia', 'Slovakia', 'Lithuania',
+    'Latvia', 'Estonia', 'Finland', 'Sweden', 'Norway', 'Denmark', 'Iceland', 'Ireland', 'UK', 'Portugal', 'Malta',
+    'Cyprus', 'Vietnam', 'Malaysia', 'Sri Lanka', 'Nepal', 'Bhutan', 'Kerala', 'Goa', 'Ladakh', 'Kashmir',
+    'Rajasthan', 'Himachal', 'Sikkim', 'Andaman', 'Uttarakhand', 'Meghalaya'
+]
+
+NUMBER_PATTERN = re.compile(r'(\d+)')
+PHONE_PATTERN = re.compile(r'\+?[\d\s\-\(\)]{10,}')
+EMAIL_PATTERN = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+MARKDOWN_TITLE_PATTERN = re.compile(r'^#\s+(.+?)\s*#*\s*$', re.MULTILINE)
+DESTINATION_PATTERN = re.compile(r'\b(' + '|'.join(re.escape(name) for name in KNOWN_DESTINATIONS) + r')\b', re.IGNORECASE)
+# "Destinations: Kochi, Munnar" / "Region:" followed by the value on the same or the next line
+DESTINATION_LABEL_PATTERN = re.compile(r'^[\W_]*(destinations?|regions?|places covered|cities covered)[\W_]*:\s*(.*)$', re.IGNORECASE)
+DESTINATION_SEPARATOR_PATTERN = re.compile(r'\s*(?:[,;|/]|\band\b)\s*')
+
+# (rule, pattern, days group, nights group, confidence) in priority order
+DURATION_RULES = [
+    ('days_nights', re.compile(r'\b(\d{1,2})\s*days?\s*(?:[/&,|-]|and)?\s*(\d{1,2})\s*nights?\b', re.IGNORECASE), 1, 2, 0.95),
+    ('nights_days', re.compile(r'\b(\d{1,2})\s*nights?\s*(?:[/&,|-]|and)?\s*(\d{1,2})\s*days?\b', re.IGNORECASE), 2, 1, 0.95),
+    ('short_nights_days', re.compile(r'\b(\d{1,2})\s*N\s*/\s*(\d{1,2})\s*D\b', re.IGNORECASE), 2, 1, 0.9),
+    ('short_days_nights', re.compile(r'\b(\d{1,2})\s*D\s*/\s*(\d{1,2})\s*N\b', re.IGNORECASE), 1, 2, 0.9),
+    ('days', re.compile(r'\b(\d{1,2})[\s-]*days?\b', re.IGNORECASE), 1, None, 0.7),
+    ('nights', re.compile(r'\b(\d{1,2})[\s-]*nights?\b', re.IGNORECASE), None, 1, 0.6),
+]
+
+CURRENCIES = {
+    '₹': 'INR', 'rs': 'INR', 'rs.': 'INR', 'inr': 'INR', 'rupees': 'INR',
+    '$': 'USD', 'us$': 'USD', 'usd': 'USD',
+    '€': 'EUR', 'eur': 'EUR',
+    '£': 'GBP', 'gbp': 'GBP',
+}
+# Prices in other currencies than INR are left to the LLM
+FOREIGN_PRICE_CONFIDENCE = 0.5
+PRICE_MULTIPLIERS = {'k': 1000, 'lakh': 100000, 'lakhs': 100000, 'lac': 100000, 'lacs': 100000}
+_AMOUNT = r'(\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?)'
+PRICE_PREFIX_PATTERN = re.compile(
+    r'(₹|us\$|\$|€|£|(?<![a-z])(?:rs\.?|inr|usd|eur|gbp))\s*' + _AMOUNT + r'(?:\s*(k|lakhs?|lacs?)\b)?',
+    re.IGNORECASE
+)
+PRICE_SUFFIX_PATTERN = re.compile(_AMOUNT + r'\s*(k|lakhs?|lacs?)?\s*(?:/-\s*)?(inr|rupees|usd|eur|gbp)\b', re.IGNORECASE)
+PRICE_CONTEXT_PATTERN = re.compile(r'\b(price|priced|cost|per person|per head|pp|starting|starts|from|onwards|package|tariff|only)\b', re.IGNORECASE)
+# Amounts next to these words are not the tour price
+PRICE_EXCLUDE_PATTERN = re.compile(r'\b(save|saving|off|discount|early bird|was|worth|deposit|advance|booking amount|gst|tax)\b', re.IGNORECASE)
+
+# Capitalised month names only, so that the verb "may" is not read as a month
+MONTH_PATTERN = re.compile(
+    r'\b(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|'
+    r'Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\b'
+)
+DEPARTURE_CONTEXT_PATTERN = re.compile(r'\b(departures?|departs|departing|batch(es)?|dates?|season|best time|available|schedule)\b', re.IGNORECASE)
+
+# (field, pattern) keywords for the inclusion flags
+INCLUSION_KEYWORDS = [
+    ('includesFlights', re.compile(r'\b(flights?|air\s?fares?|air tickets?|airline)\b', re.IGNORECASE)),
+    ('includesHotels', re.compile(r'\b(hotels?|accommodations?|resorts?|homestays?|houseboats?|camps?|stays?)\b', re.IGNORECASE)),
+    ('includesMeals', re.compile(r'\b(meals?|breakfasts?|lunch(es)?|dinners?)\b', re.IGNORECASE)),
+    ('includesTransfers', re.compile(r'\b(transfers?|pick-?ups?|drops?|transport(ation)?|cabs?)\b', re.IGNORECASE)),
+    ('visaSupport', re.compile(r'\bvisas?\b', re.IGNORECASE)),
+]
+INCLUDE_HEADING_PATTERN = re.compile(r"^[\W_]*(inclusions?|includes?|included|what'?s included|package includes|cost includes)[\W_]*$", re.IGNORECASE)
+EXCLUDE_HEADING_PATTERN = re.compile(r"^[\W_]*(exclusions?|excludes?|excluded|not included|what'?s not included|cost excludes)[\W_]*$", re.IGNORECASE)
+EXCLUDE_LINE_PATTERN = re.compile(r'\b(not included|excluded|exclusions?|extra cost|at (your|own) (cost|expense)|on your own|not covered|payable)\b', re.IGNORECASE)
+CLAUSE_SEPARATOR_PATTERN = re.compile(r'(?<=[.;!])\s+')
+INCLUDE_LINE_PATTERN = re.compile(r'\b(includ(es|ed|ing)|inclusive|complimentary)\b', re.IGNORECASE)
+
+
+@dataclass
+class FieldMatch:
+    """A field value found by a deterministic extractor."""
+    value: Any
+    confidence: float
+    rule: str
+
+
+def first_number(value):
+    """Get the first integer in a string, or 0."""
+    match = NUMBER_PATTERN.search(str(value))
+    return int(match.group(1)) if match else 0
+
+
+def extract_title(text):
+    """Get the first markdown H1 as the tour title."""
+    match = MARKDOWN_TITLE_PATTERN.search(text or '')
+    if not match:
+        return {}
+    return {'title': FieldMatch(match.group(1).strip(), 0.9, 'markdown_h1')}
+
+
+def match_known_destinations(text):
+    """Get the KNOWN_DESTINATIONS mentioned in a text, in order of appearance."""
+    canonical = {name.lower(): name for name in KNOWN_DESTINATIONS}
+    return list(dict.fromkeys(canonical[match.lower()] for match in DESTINATION_PATTERN.findall(text or '')))
+
+
+def extract_destinations(text, title=''):
+    """
+    Find the destinations from a "Destinations:"/"Region:" label, or else from KNOWN_DESTINATIONS in the title.
+
+    Args:
+        text (str): Page text or markdown
+        title (str): Tour title
+
+    Returns:
+        dict: destinations FieldMatch, empty when nothing was found
+    """
+    lines = [line.strip().strip('*').strip() for line in (text or '').splitlines() if line.strip()]
+    for index, line in enumerate(lines):
+        match = DESTINATION_LABEL_PATTERN.match(line)
+        if not match:
+            continue
+        value = match.group(2) or (lines[index + 1] if index + 1 < len(lines) else '')
+        destinations = [part.strip(' *.') for part in DESTINATION_SEPARATOR_PATTERN.split(value)]
+        destinations = [part for part in destinations if 2 < len(part) <= 40]
+        if destinations:
+            return {'destinations': FieldMatch(destinations, 0.9, 'destination_label')}
+
+    destinations = match_known_destinations(title)
+    if not destinations:
+        return {}
+    return {'destinations': FieldMatch(destinations, 0.85, 'known_destination')}
+
+
+def extract_duration(text):
+    """
+    Find the tour duration ("5 Days 4 Nights", "4N/5D", "7 days", ...).
+
+    The first rule with matches wins; its confidence is scaled by how many of
+    the matches agree, and halved when nights do not fit the days.
+
+    Args:
+        text (str): Page text or markdown
+
+    Returns:
+        dict: durationDays and durationNights FieldMatch, empty when nothing was found
+    """
+    for rule, pattern, days_group, nights_group, confidence in DURATION_RULES:
+        candidates = []
+        for match in pattern.finditer(text or ''):
+            days = int(match.group(days_group)) if days_group else 0
+            nights = int(match.group(nights_group)) if nights_group else 0
+            if not days:
+                days = nights + 1
+            elif not nights_group:
+                nights = max(0, days - 1)
+            if 0 < days <= 60:
+                candidates.append((days, nights))
+        if not candidates:
+            continue
+
+        (days, nights), count = Counter(candidates).most_common(1)[0]
+        score = confidence * count / len(candidates)
+        if not nights <= days <= nights + 1:
+            score /= 2
+        return {
+            'durationDays': FieldMatch(days, round(score, 3), rule),
+            'durationNights': FieldMatch(nights, round(score, 3), rule),
+        }
+    return {}
+
+
+def _price_candidates(text):
+    for pattern, currency_group, amount_group, multiplier_group in (
+        (PRICE_PREFIX_PATTERN, 1, 2, 3),
+        (PRICE_SUFFIX_PATTERN, 3, 1, 2),
+    ):
+        for match in pattern.finditer(text):
+            currency = CURRENCIES.get(match.group(currency_group).lower())
+            amount = float(match.group(amount_group).replace(',', ''))
+            if multiplier_group and match.group(multiplier_group):
+                amount *= PRICE_MULTIPLIERS[match.group(multiplier_group).lower()]
+            if not currency or amount <= 0 or (currency == 'INR' and amount < 100):
+                continue
+            before = text[max(0, match.start() - 40):match.start()]
+            after = text[match.end():match.end() + 25]
+            if PRICE_EXCLUDE_PATTERN.search(before[-25:]) or PRICE_EXCLUDE_PATTERN.search(after[:12]):
+                continue
+            in_context = bool(PRICE_CONTEXT_PATTERN.search(before) or PRICE_CONTEXT_PATTERN.search(after))
+            yield match.start(), amount, currency, in_context
+
+
+def extract_price(text):
+    """
+    Find the starting price, with its currency (₹, Rs, INR, $, USD, €, £, "25,000 INR", "1.2 lakh").
+
+    Amounts next to price words ("starting from", "per person", ...) are
+    preferred and the lowest of them is the starting price, rupee amounts
+    first. Discounts, deposits and taxes are ignored. startingPrice is
+    stored in rupees and amounts are not converted, so a price in another
+    currency never gets more than FOREIGN_PRICE_CONFIDENCE.
+
+    Args:
+        text (str): Page text or markdown
+
+    Returns:
+        dict: startingPrice FieldMatch (rule holds the currency), empty when nothing was found
+    """
+    candidates = sorted(_price_candidates(text or ''))
+    if not candidates:
+        return {}
+
+    in_context = [candidate for candidate in candidates if candidate[3]]
+    if not in_context:
+        _, amount, currency, _ = candidates[0]
+        return {'startingPrice': FieldMatch(amount, 0.5, f'price:{currency}')}
+
+    rupee_prices = [candidate for candidate in in_context if candidate[2] == 'INR']
+    _, amount, currency, _ = min(rupee_prices or in_context, key=lambda candidate: candidate[1])
+    confidence = 0.9 if len({candidate[2] for candidate in in_context}) == 1 else 0.7
+    if currency != 'INR':
+        confidence = min(confidence, FOREIGN_PRICE_CONFIDENCE)
+    return {'startingPrice': FieldMatch(amount, confidence, f'price:{currency}')}
+
+
+def _is_heading(line):
+    return line.startswith('#') or (len(line) <= 40 and line.endswith(':'))
+
+
+def _month_name(token):
+    return next(month for month in MONTHS if month.startswith(token[:3]))
+
+
+def extract_departure_months(text):
+    """
+    Find departure months: months on lines that talk about departures, batches or dates.
+
+    Months mentioned anywhere else (publication dates, weather notes) only
+    give a low-confidence match.
+
+    Args:
+        text (str): Page text or markdown
+
+    Returns:
+        dict: departureMonths FieldMatch with full month names in calendar order
+    """
+    departure_months = set()
+    other_months = set()
+    departure_section = False
+    previous_context = False
+    for raw_line in (text or '').splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        context = bool(DEPARTURE_CONTEXT_PATTERN.search(line))
+        months = {_month_name(token) for token in MONTH_PATTERN.findall(line)}
+        if _is_heading(line):
+            departure_section = context
+        if months:
+            # The line itself, its section heading or the label line before it ("Fixed departures:")
+            if context or departure_section or previous_context:
+                departure_months |= months
+            else:
+                other_months |= months
+        previous_context = context
+
+    if departure_months:
+        return {'departureMonths': FieldMatch(sorted(departure_months, key=MONTHS.index), 0.85, 'departure_context')}
+    if other_months:
+        return {'departureMonths': FieldMatch(sorted(other_months, key=MONTHS.index), 0.4, 'month_mention')}
+    return {}
+
+
+def extract_inclusions(text):
+    """
+    Find whether flights, hotels, meals, transfers and visa support are included.
+
+    Keywords under an inclusions/exclusions heading are the strongest
+    evidence; otherwise the line itself has to say "included" or
+    "not included". Fields without any evidence are left out.
+
+    Args:
+        text (str): Page text or markdown
+
+    Returns:
+        dict: includesFlights, includesHotels, includesMeals, includesTransfers and visaSupport FieldMatch
+    """
+    matches = {}
+    section = None
+    for raw_line in (text or '').splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        heading = line.lstrip('#').strip()
+        if INCLUDE_HEADING_PATTERN.match(heading):
+            section = True
+            continue
+        if EXCLUDE_HEADING_PATTERN.match(heading):
+            section = False
+            continue
+        if _is_heading(line):
+            section = None
+
+        for clause in CLAUSE_SEPARATOR_PATTERN.split(line):
+            if EXCLUDE_LINE_PATTERN.search(clause):
+                value, confidence, rule = False, 0.85, 'exclusion_line'
+            elif section is not None:
+                value, confidence, rule = section, 0.9, 'inclusions_section' if section else 'exclusions_section'
+            elif INCLUDE_LINE_PATTERN.search(clause):
+                value, confidence, rule = True, 0.75, 'inclusion_line'
+            else:
+                continue
+
+            for field, pattern in INCLUSION_KEYWORDS:
+                if pattern.search(clause):
+                    # Stronger evidence wins; on a tie anything included ("breakfast" but not "dinner") counts
+                    current = matches.get(field)
+                    if current is None or confidence > current.confidence or (confidence == current.confidence and value):
+                        matches[field] = FieldMatch(value, confidence, rule)
+    return matches
+
+
+def extract_fields(text, title=None):
+    """
+    Run the whole extractor bank over a page.
+
+    Args:
+        text (str): Page text or markdown
+        title (str): Page title when already known; otherwise the markdown H1 is used
+
+    Returns:
+        dict: FieldMatch per tour field that was found
+    """
+    matches = {}
+    if title is None:
+        matches.update(extract_title(text))
+    elif title:
+        matches['title'] = FieldMatch(title, 0.9 if len(title) >= 5 and title != 'Tour Package' else 0.3, 'page_title')
+    matches.update(extract_destinations(text, matches['title'].value if 'title' in matches else ''))
+    matches.update(extract_duration(text))
+    matches.update(extract_price(text))
+    matches.update(extract_departure_months(text))
+    matches.update(extract_inclusions(text))
+    return matches
+
+
+def _is_foreign_price(field, match):
+    return field == 'startingPrice' and match.rule != 'price:INR'
+
+
+def confident_values(matches, min_confidence):
+    """Get the values of the matches at or above min_confidence, leaving out prices that are not in rupees."""
+    return {
+        field: match.value for field, match in matches.items()
+        if match.confidence >= min_confidence and not _is_foreign_price(field, match)
+    }
+
+
+def is_confident(matches, min_confidence, known_data=None, fields=REGEX_REQUIRED_FIELDS):
+    """
+    Check that every required field is either already known or matched with enough confidence.
+
+    Args:
+        matches (dict): Output of extract_fields
+        min_confidence (float): Minimum confidence per field
+        known_data (dict): Values that are already certain (e.g. from structured data)
+        fields (tuple): Required fields
+
+    Returns:
+        bool: True when the LLM can be skipped
+    """
+    known_data = known_data or {}
+    return all(
+        known_data.get(field) or (
+            field in matches and matches[field].value and matches[field].confidence >= min_confidence
+            and not _is_foreign_price(field, matches[field])
+        )
+        for field in fields
+    )
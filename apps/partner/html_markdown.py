@@ -0,0 +1,279 @@
+import re
+import logging
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup, NavigableString, Tag, Comment
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Elements that never carry tour content
+NOISE_TAGS = ['script', 'style', 'noscript', 'template', 'iframe', 'svg', 'canvas', 'form', 'button', 'select', 'input']
+BOILERPLATE_TAGS = ['nav', 'footer', 'header', 'aside']
+BOILERPLATE_PATTERN = re.compile(
+    r'(^|[\s_-])(nav|navbar|menu|footer|header|sidebar|cookie|consent|banner|breadcrumbs?|social|share|'
+    r'newsletter|subscribe|popup|modal|related|comments?|advert|ads)([\s_-]|$)',
+    re.IGNORECASE
+)
+
+# Markers of client-side rendered pages whose HTML holds no content
+SPA_ROOT_SELECTORS = ['#root', '#__next', '#app', '#__nuxt', '[ng-app]', '[data-reactroot]']
+JS_REQUIRED_PATTERN = re.compile(r'enable javascript|javascript (is )?required|requires javascript', re.IGNORECASE)
+
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'ul', 'ol', 'li', 'table', 'tr', 'dl', 'dt', 'dd',
+    'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'br', 'hr', 'figure', 'figcaption'
+}
+
+
+def parse_page(content):
+    """Parse fetched HTML with the parser of the local markdown path (lxml)."""
+    return BeautifulSoup(content, 'lxml')
+
+
+def page_markdown(soup, url):
+    """
+    Convert the main content of a parsed page to markdown.
+
+    Removes the boilerplate and noise elements from soup, so read anything
+    else needed from the page (e.g. JSON-LD scripts) first.
+
+    Args:
+        soup (BeautifulSoup): Page parsed with parse_page
+        url (str): Page URL, to make links absolute
+
+    Returns:
+        str: Markdown of the main content
+    """
+    return html_to_markdown(extract_main_content(soup), base_url=url)
+
+
+def is_static_page(soup, min_text_length=1500):
+    """
+    Decide whether a page is server-rendered enough to skip Firecrawl.
+
+    A page counts as static when its visible text is long enough and it is
+    not an empty single-page-app shell or a "please enable JavaScript" page.
+
+    Args:
+        soup (BeautifulSoup): Parsed page
+        min_text_length (int): Minimum visible text length in characters
+
+    Returns:
+        bool: True if the HTML alone holds the page content
+    """
+    body = soup.body or soup
+    scripts = body.find_all('script')
+    script_length = sum(len(script.get_text()) for script in scripts)
+
+    text = ' '.join(
+        str(node) for node in body.find_all(string=True)
+        if not isinstance(node, Comment) and node.parent.name not in NOISE_TAGS
+    )
+    text_length = len(re.sub(r'\s+', ' ', text).strip())
+    if text_length < min_text_length:
+        return False
+
+    for noscript in body.find_all('noscript'):
+        if JS_REQUIRED_PATTERN.search(noscript.get_text()) and text_length < min_text_length * 2:
+            return False
+
+    for selector in SPA_ROOT_SELECTORS:
+        root = body.select_one(selector)
+        if root is not None and len(root.get_text(strip=True)) < min_text_length / 3:
+            return False
+
+    # Mostly inline script (hydration state, bundles) with a little text around it
+    return script_length < text_length * 4
+
+
+def extract_main_content(soup):
+    """
+    Find the main content block of a page, readability style.
+
+    Removes scripts, navigation, footers and other boilerplate in place, then
+    picks <main>/<article> or the block with the most non-link text.
+
+    Args:
+        soup (BeautifulSoup): Parsed page, modified in place
+
+    Returns:
+        Tag: Element holding the main content
+    """
+    for element in soup.find_all(NOISE_TAGS):
+        element.decompose()
+    for comment in soup.find_all(string=lambda node: isinstance(node, Comment)):
+        comment.extract()
+
+    for element in soup.find_all(BOILERPLATE_TAGS):
+        # Tour pages often put the title inside <header>
+        if not element.find('h1'):
+            element.decompose()
+    for element in soup.find_all(True):
+        if element.decomposed or element.name in ('html', 'body', 'main', 'article') or element.find('h1'):
+            continue
+        marker = ' '.join(element.get('class') or []) + ' ' + (element.get('id') or '')
+        if marker.strip() and BOILERPLATE_PATTERN.search(marker):
+            element.decompose()
+
+    body = soup.body or soup
+    candidate = body.find('main') or body.find(attrs={'role': 'main'})
+    if candidate is None:
+        articles = body.find_all('article')
+        if len(articles) == 1:
+            candidate = articles[0]
+    if candidate is None:
+        candidate = _best_scoring_block(body)
+
+    # Keep the page heading when the content block starts below it
+    heading = body.find('h1')
+    if heading is not None and candidate is not body and not candidate.find('h1'):
+        candidate.insert(0, heading.extract())
+    return candidate
+
+
+def _best_scoring_block(body):
+    """Pick the block with the most text that is not link text, preferring the body when nothing stands out."""
+    best, best_score = body, 0
+    body_length = len(body.get_text(strip=True)) or 1
+    for block in body.find_all(['div', 'section']):
+        text_length = len(block.get_text(strip=True))
+        if text_length < body_length * 0.5:
+            continue
+        link_length = sum(len(link.get_text(strip=True)) for link in block.find_all('a'))
+        score = text_length - link_length * 2 - len(block.find_all(['div', 'section']))
+        if score > best_score:
+            best, best_score = block, score
+    return best
+
+
+def html_to_markdown(element, base_url=''):
+    """
+    Convert an HTML element to markdown for the AI extraction prompt.
+
+    Args:
+        element (Tag): Element to convert, usually from extract_main_content
+        base_url (str): Page URL used to resolve relative links
+
+    Returns:
+        str: Markdown content
+    """
+    parts = []
+    _render(element, parts, base_url)
+    markdown = ''.join(parts)
+    markdown = re.sub(r'[ \t]+\n', '\n', markdown)
+    markdown = re.sub(r'\n{3,}', '\n\n', markdown)
+    return markdown.strip()
+
+
+def _render(node, parts, base_url, list_depth=0):
+    for child in node.children:
+        if isinstance(child, NavigableString):
+            if isinstance(child, Comment):
+                continue
+            text = re.sub(r'\s+', ' ', str(child))
+            if text.strip() or (parts and not parts[-1].endswith((' ', '\n'))):
+                parts.append(text)
+            continue
+        if not isinstance(child, Tag):
+            continue
+
+        name = child.name
+        if re.fullmatch(r'h[1-6]', name):
+            parts.append(f"\n\n{'#' * int(name[1])} {_inline_text(child)}\n\n")
+        elif name in ('ul', 'ol'):
+            parts.append('\n')
+            for index, item in enumerate(child.find_all('li', recursive=False), 1):
+                bullet = f'{index}.' if name == 'ol' else '-'
+                parts.append(f"{'  ' * list_depth}{bullet} ")
+                _render(item, parts, base_url, list_depth + 1)
+                parts.append('\n')
+            parts.append('\n')
+        elif name == 'table':
+            parts.append('\n\n' + _render_table(child) + '\n\n')
+        elif name == 'a':
+            text = _inline_text(child)
+            href = child.get('href', '')
+            if text and href and not href.startswith(('#', 'javascript:')):
+                parts.append(f'[{text}]({urljoin(base_url, href)})')
+            elif text:
+                parts.append(text)
+        elif name in ('strong', 'b'):
+            text = _inline_text(child)
+            if text:
+                parts.append(f'**{text}**')
+        elif name == 'img':
+            alt = child.get('alt', '').strip()
+            if alt:
+                parts.append(f'![{alt}]({urljoin(base_url, child.get("src", ""))})')
+        elif name == 'br':
+            parts.append('\n')
+        elif name == 'hr':
+            parts.append('\n\n---\n\n')
+        elif name in BLOCK_TAGS:
+            parts.append('\n\n')
+            _render(child, parts, base_url, list_depth)
+            parts.append('\n\n')
+        else:
+            _render(child, parts, base_url, list_depth)
+
+
+def _render_table(table):
+    rows = []
+    for row in table.find_all('tr'):
+        cells = [_inline_text(cell).replace('|', '/') for cell in row.find_all(['th', 'td'])]
+        if cells:
+            rows.append('| ' + ' | '.join(cells) + ' |')
+    if len(rows) > 1:
+        columns = rows[0].count('|') - 1
+        rows.insert(1, '|' + ' --- |' * columns)
+    return '\n'.join(rows)
+
+
+def _inline_text(element):
+    return re.sub(r'\s+', ' ', element.get_text(' ')).strip()
+
+
+def markdown_parity(local_markdown, reference_markdown):
+    """
+    Compare local markdown with a reference (e.g. Firecrawl) by word overlap.
+
+    Args:
+        local_markdown (str): Markdown from html_to_markdown
+        reference_markdown (str): Markdown from the reference converter
+
+    Returns:
+        dict: recall (share of reference words found locally) and precision
+    """
+    def words(markdown):
+        # Ignore link targets and markdown syntax, only compare the visible words
+        markdown = re.sub(r'\]\([^)]*\)', ']', markdown)
+        return set(re.findall(r'\w{3,}', markdown.lower()))
+
+    local_words = words(local_markdown)
+    reference_words = words(reference_markdown)
+    common = local_words & reference_words
+    return {
+        'recall': round(len(common) / len(reference_words), 3) if reference_words else 1.0,
+        'precision': round(len(common) / len(local_words), 3) if local_words else 0.0,
+        'local_words': len(local_words),
+        'reference_words': len(reference_words),
+    }
+
+
+def check_markdown_parity(content, url, reference_markdown, min_text_length=1500):
+    """
+    Convert a fetched page like the local markdown path and compare it with a reference.
+
+    Args:
+        content (bytes): Page HTML
+        url (str): Page URL
+        reference_markdown (str): Firecrawl markdown of the same page
+        min_text_length (int): SCRAPE_LOCAL_MARKDOWN_MIN_TEXT
+
+    Returns:
+        dict: markdown_parity report, plus static (whether the local path would be used) and the local markdown
+    """
+    soup = parse_page(content)
+    static = is_static_page(soup, min_text_length)
+    local_markdown = page_markdown(soup, url)
+    return {**markdown_parity(local_markdown, reference_markdown), 'static': static, 'markdown': local_markdown}
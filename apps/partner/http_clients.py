@@ -0,0 +1,120 @@
+import os
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Process-level registry of pooled clients, emptied in forked children (gunicorn/Celery prefork workers)
+# so that a child never reuses sockets, TLS sessions or gRPC channels created by its parent.
+_clients = {}
+_lock = threading.Lock()
+
+
+# Page fetch sessions, one per thread: a Session is not thread-safe, while the pooled adapter they share is
+_local = threading.local()
+
+def _reset_after_fork():
+    global _lock, _local
+    _clients.clear()
+    _lock = threading.Lock()
+    _local = threading.local()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _get_or_create(key, factory):
+    client = _clients.get(key)
+    if client is None:
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                client = factory()
+                _clients[key] = client
+                logger.debug(f"Created pooled client: {key[0]}")
+    return client
+
+
+def _build_http_adapter():
+    # Only connection errors are retried: the request never reached the site, so retrying
+    # costs little, while retrying read timeouts and 5xx answers would multiply the fetch time
+    retries = getattr(settings, 'SCRAPE_HTTP_RETRIES', 2)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=False,
+        status=0,
+        other=0,
+        backoff_factor=getattr(settings, 'SCRAPE_HTTP_BACKOFF', 0.5),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False,
+    )
+    return HTTPAdapter(
+        pool_connections=getattr(settings, 'SCRAPE_HTTP_POOL_CONNECTIONS', 20),
+        pool_maxsize=getattr(settings, 'SCRAPE_HTTP_POOL_MAXSIZE', 32),
+        max_retries=retry,
+    )
+
+
+def get_http_session():
+    """
+    Get the requests session of the current thread used to fetch tour pages.
+
+    Every thread gets its own session, since requests.Session is not
+    thread-safe, but all sessions of the process share one adapter, so
+    connections are kept alive per host (SCRAPE_HTTP_POOL_MAXSIZE per pool).
+    Cookies are never stored, so one website's cookies are not sent on later
+    fetches. Connection errors are retried with exponential backoff.
+
+    Returns:
+        requests.Session: Session of the current thread
+    """
+    adapter = _get_or_create(('http_adapter',), _build_http_adapter)
+    session = getattr(_local, 'session', None)
+    if session is None or session.get_adapter('https://') is not adapter:
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'User-Agent': USER_AGENT})
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        _local.session = session
+    return session
+
+
+def get_firecrawl_app(api_key):
+    """Get a reused FirecrawlApp for an API key."""
+    from firecrawl import FirecrawlApp
+    return _get_or_create(('firecrawl', api_key), lambda: FirecrawlApp(api_key=api_key))
+
+
+def get_openai_client(api_key):
+    """
+    Get a reused OpenAI client for an API key.
+
+    The client keeps its HTTP connection pool, so warm requests skip the TLS handshake.
+    """
+    def build():
+        import openai
+        return openai.OpenAI(
+            api_key=api_key,
+            max_retries=getattr(settings, 'SCRAPE_HTTP_RETRIES', 2),
+        )
+    return _get_or_create(('openai', api_key), build)
+
+
+def get_gemini_model(api_key, model_name):
+    """Get a reused Gemini GenerativeModel for an API key and model name."""
+    def build():
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(model_name)
+    return _get_or_create(('gemini', api_key, model_name), build)
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from django.core.cache import cache
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('hits', 'misses', 'sets', 'evictions')
+
+
+def prompt_key(provider, model, prompt):
+    """Return the cache key for a completion: provider + model + SHA-256 of the prompt."""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    return f"{provider}:{model}:{prompt_hash}"
+
+
+class LLMResponseCache(ABC):
+    """
+    Base class for LLM response caches.
+
+    Responses are stored as the raw completion text under prompt_key() for
+    ttl seconds. How max_entries is enforced depends on the backend.
+    """
+
+    backend = 'base'
+
+    def __init__(self, max_entries=5000, ttl=7 * 24 * 60 * 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+    def get(self, provider, model, prompt):
+        """
+        Get a cached completion.
+
+        Args:
+            provider (str): Provider name (openai or gemini)
+            model (str): Model name
+            prompt (str): Full prompt text
+
+        Returns:
+            str or None: Cached completion text, or None on a miss
+        """
+        key = prompt_key(provider, model, prompt)
+        try:
+            response = self._get(key)
+        except Exception as e:
+            logger.error(f"LLM cache read error: {str(e)}")
+            response = None
+        self._count('hits' if response is not None else 'misses')
+        return response
+
+    def set(self, provider, model, prompt, response):
+        """Cache a completion text."""
+        key = prompt_key(provider, model, prompt)
+        try:
+            evicted = self._set(key, response)
+        except Exception as e:
+            logger.error(f"LLM cache write error: {str(e)}")
+            return
+        self._count('sets')
+        if evicted:
+            self._count('evictions', evicted)
+
+    def stats(self):
+        """Get the hit/miss/set/eviction counters and the number of cached entries."""
+        stats = {counter: self._read_counter(counter) for counter in COUNTERS}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['entries'] = self._entry_count()
+        stats['max_entries'] = self.max_entries
+        stats['backend'] = self.backend
+        return stats
+
+    @abstractmethod
+    def _get(self, key):
+        """Return the cached response for a key, or None."""
+
+    @abstractmethod
+    def _set(self, key, response):
+        """Store a response and return the number of evicted entries."""
+
+    @abstractmethod
+    def _entry_count(self):
+        """Return the number of cached responses, or None when the backend cannot tell."""
+
+    @abstractmethod
+    def _count(self, counter, amount=1):
+        """Add to one of COUNTERS."""
+
+    @abstractmethod
+    def _read_counter(self, counter):
+        """Return the value of one of COUNTERS."""
+
+
+class DiskLLMResponseCache(LLMResponseCache):
+    """
+    LLM response cache in a local directory, one JSON file per response (for development).
+
+    File modification times track recency: a hit touches the file. Listing the
+    directory is only done every PRUNE_EVERY writes, when expired files and the
+    least recently used files over max_entries are removed, so the directory
+    may briefly hold up to PRUNE_EVERY extra entries. Counters are kept per process.
+    """
+
+    backend = 'disk'
+    PRUNE_EVERY = 100
+    _lock = threading.Lock()
+    _counters = {counter: 0 for counter in COUNTERS}
+    _writes_since_prune = 0
+
+    def __init__(self, directory, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()}.json"
+
+    def _get(self, key):
+        path = self._path(key)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                return None
+            entry = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return entry['response']
+
+    def _set(self, key, response):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+        tmp_path.write_text(json.dumps({'key': key, 'response': response}), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            DiskLLMResponseCache._writes_since_prune += 1
+            if self._writes_since_prune < self.PRUNE_EVERY:
+                return 0
+            DiskLLMResponseCache._writes_since_prune = 0
+        return self._prune()
+
+    def _prune(self):
+        now = time.time()
+        files = []
+        for file in self.directory.glob('*.json'):
+            try:
+                files.append((file.stat().st_mtime, file))
+            except FileNotFoundError:
+                continue
+        files.sort()
+
+        evicted = 0
+        for index, (mtime, file) in enumerate(files):
+            if index >= len(files) - self.max_entries and now - mtime <= self.ttl:
+                break
+            file.unlink(missing_ok=True)
+            evicted += 1
+        return evicted
+
+    def _entry_count(self):
+        return sum(1 for _ in self.directory.glob('*.json'))
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def _read_counter(self, counter):
+        return self._counters[counter]
+
+
+class DjangoLLMResponseCache(LLMResponseCache):
+    """
+    LLM response cache in the Django cache (Redis in production), shared by all workers.
+
+    Entries expire after ttl seconds and the cache backend evicts them under
+    memory pressure (configure Redis with an LRU maxmemory-policy), so
+    max_entries is not enforced here and lookups never write.
+    """
+
+    backend = 'django'
+    KEY_PREFIX = 'llm_cache'
+
+    def _cache_key(self, key):
+        return f"{self.KEY_PREFIX}:response:{key}"
+
+    def _get(self, key):
+        return cache.get(self._cache_key(key))
+
+    def _set(self, key, response):
+        cache.set(self._cache_key(key), response, self.ttl)
+        return 0
+
+    def _entry_count(self):
+        return None
+
+    def _count(self, counter, amount=1):
+        key = f"{self.KEY_PREFIX}:stats:{counter}"
+        try:
+            cache.add(key, 0, None)
+            cache.incr(key, amount)
+        except Exception as e:
+            logger.error(f"LLM cache counter error: {str(e)}")
+
+    def _read_counter(self, counter):
+        return cache.get(f"{self.KEY_PREFIX}:stats:{counter}", 0)
+
+
+def get_llm_response_cache():
+    """
+    Get the LLM response cache configured by LLM_CACHE_BACKEND.
+
+    Returns:
+        LLMResponseCache or None: disk or django backend, or None when caching is disabled
+    """
+    backend = getattr(settings, 'LLM_CACHE_BACKEND', 'django')
+    options = {
+        'max_entries': getattr(settings, 'LLM_CACHE_MAX_ENTRIES', 5000),
+        'ttl': getattr(settings, 'LLM_CACHE_TTL', 7 * 24 * 60 * 60),
+    }
+    if backend == 'disk':
+        return DiskLLMResponseCache(getattr(settings, 'LLM_CACHE_DIR', settings.BASE_DIR / '.llm_cache'), **options)
+    if backend == 'django':
+        return DjangoLLMResponseCache(**options)
+    return None
+
+
+def get_llm_cache_stats():
+    """Get the counters of the configured LLM response cache, or None when it is disabled."""
+    llm_cache = get_llm_response_cache()
+    return llm_cache.stats() if llm_cache else None
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.partner.benchmarks.scraping import ScrapingBenchmark, load_fixtures, record_fixture, compare_with_baseline, FIXTURES_DIR
+import json
+
+class Command(BaseCommand):
+    help = 'Benchmark the tour scraping stages offline against recorded page fixtures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5, help='Timed passes over all fixtures per stage')
+        parser.add_argument('--stages', nargs='+', help='Only run these stages')
+        parser.add_argument('--fixtures', nargs='+', help='Only use these fixture names')
+        parser.add_argument('--fixtures-dir', type=str, default=str(FIXTURES_DIR), help='Directory with <name>.html and <name>.json fixtures')
+        parser.add_argument('--firecrawl-latency', type=float, default=1.5, help='Injected Firecrawl latency in seconds')
+        parser.add_argument('--llm-latency', type=float, default=0.8, help='Injected LLM latency in seconds')
+        parser.add_argument('--fetch-latency', type=float, default=0.2, help='Injected page fetch latency in seconds')
+        parser.add_argument('--no-latency', action='store_true', help='Do not inject any latency (CPU cost only)')
+        parser.add_argument('--output', type=str, help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', type=str, help='JSON results of an earlier run to compare p95 against')
+        parser.add_argument('--max-regression', type=float, default=0.2, help='Allowed p95 slowdown against the baseline (0.2 = 20%%)')
+        parser.add_argument('--record', type=str, metavar='URL', help='Record a live page as a new fixture instead of benchmarking')
+        parser.add_argument('--name', type=str, help='Fixture name for --record')
+
+    def handle(self, *args, **options):
+        if options['record']:
+            if not options['name']:
+                raise CommandError('--name is required with --record')
+            path = record_fixture(options['record'], options['name'], options['fixtures_dir'])
+            self.stdout.write(self.style.SUCCESS(f"✅ Recorded fixture: {path}"))
+            return
+
+        fixtures = load_fixtures(options['fixtures_dir'], options['fixtures'])
+        if not fixtures:
+            raise CommandError(f"No fixtures found in {options['fixtures_dir']}")
+
+        latency = 0 if options['no_latency'] else 1
+        benchmark = ScrapingBenchmark(
+            fixtures,
+            iterations=options['iterations'],
+            firecrawl_latency=options['firecrawl_latency'] * latency,
+            llm_latency=options['llm_latency'] * latency,
+            fetch_latency=options['fetch_latency'] * latency,
+        )
+        self.stdout.write(f"Benchmarking {len(fixtures)} fixture(s), {options['iterations']} iteration(s) per stage")
+        results = benchmark.run(options['stages'])
+
+        self.stdout.write(
+            f"\n{'Stage':<30} {'Runs':>5} {'p50 (s)':>10} {'p95 (s)':>10} {'Mean (s)':>10} "
+            f"{'Pages/s':>10} {'LLM/run':>8} {'Peak KiB':>10}"
+        )
+        for stage, stats in results.items():
+            self.stdout.write(
+                f"{stage:<30} {stats['runs']:>5} {stats['p50']:>10.4f} {stats['p95']:>10.4f} "
+                f"{stats['mean']:>10.4f} {stats.get('pages_per_second', 0):>10.1f} "
+                f"{stats.get('llm_calls_per_run', 0):>8.2f} {stats['peak_memory_kib']:>10.1f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"\nResults written to {options['output']}")
+
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+            regressions = compare_with_baseline(results, baseline, options['max_regression'])
+            if regressions:
+                for stage, previous, current in regressions:
+                    self.stdout.write(self.style.ERROR(f"❌ {stage}: p95 {previous:.4f}s -> {current:.4f}s"))
+                raise CommandError(f'{len(regressions)} stage(s) regressed by more than {options["max_regression"]:.0%}')
+            self.stdout.write(self.style.SUCCESS('✅ No regressions against the baseline'))
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.conf import settings
+from apps.partner.scraping_service import TourScrapingService
+from apps.partner.html_markdown import check_markdown_parity
+from apps.partner.http_clients import get_firecrawl_app
+from apps.partner.benchmarks.scraping import load_fixtures, FIXTURES_DIR
+import json
+
+class Command(BaseCommand):
+    help = 'Compare the local HTML to markdown conversion with Firecrawl output for live or recorded fixture pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', type=str, help='Live page URLs (needs FIRECRAWL_API_KEY)')
+        parser.add_argument('--fixtures', nargs='*', help='Check recorded fixtures offline (all of them when no names are given)')
+        parser.add_argument('--fixtures-dir', type=str, default=str(FIXTURES_DIR), help='Directory with <name>.html and <name>.json fixtures')
+        parser.add_argument('--min-recall', type=float, default=0.8, help='Share of Firecrawl words the local markdown must contain')
+        parser.add_argument('--show-markdown', action='store_true', help='Print both markdown versions')
+
+    def handle(self, *args, **options):
+        if options['fixtures'] is None and not options['urls']:
+            raise CommandError('Pass page URLs or --fixtures')
+
+        pages = []
+        if options['fixtures'] is not None:
+            for fixture in load_fixtures(options['fixtures_dir'], options['fixtures'] or None):
+                if fixture['firecrawl_markdown'] is None:
+                    self.stdout.write(self.style.WARNING(f"⚠️ No Firecrawl markdown recorded for fixture: {fixture['name']}"))
+                    continue
+                pages.append((fixture['url'], fixture['html'], fixture['firecrawl_markdown']))
+
+        failures = 0
+        if options['urls']:
+            firecrawl_api_key = getattr(settings, 'FIRECRAWL_API_KEY', None)
+            if not firecrawl_api_key:
+                raise CommandError('FIRECRAWL_API_KEY is required to compare live pages against Firecrawl')
+
+            app = get_firecrawl_app(firecrawl_api_key)
+            service = TourScrapingService()
+            for url in options['urls']:
+                # Same download as the local markdown path: streamed, capped and HTML only
+                fetched_page = service._fetch_page(url)
+                scrape_result = app.scrape_url(url, formats=["markdown"], only_main_content=False)
+                if not scrape_result.success:
+                    self.stdout.write(self.style.ERROR(f"❌ Firecrawl failed for {url}: {scrape_result.error}"))
+                    failures += 1
+                    continue
+                pages.append((url, fetched_page.content, scrape_result.markdown or ''))
+
+        min_text = getattr(settings, 'SCRAPE_LOCAL_MARKDOWN_MIN_TEXT', 1500)
+        for url, content, firecrawl_markdown in pages:
+            self.stdout.write(f"Comparing markdown for URL: {url}")
+
+            parity = check_markdown_parity(content, url, firecrawl_markdown, min_text)
+            local_markdown = parity.pop('markdown')
+            self.stdout.write(json.dumps(parity, indent=2))
+            if options['show_markdown']:
+                self.stdout.write(f"--- Local markdown ---\n{local_markdown}\n--- Firecrawl markdown ---\n{firecrawl_markdown}")
+
+            if not parity['static']:
+                self.stdout.write(self.style.WARNING('⚠️ Not a static page, Firecrawl would be used'))
+            elif parity['recall'] >= options['min_recall']:
+                self.stdout.write(self.style.SUCCESS('✅ Local markdown matches Firecrawl'))
+            else:
+                self.stdout.write(self.style.ERROR(f"❌ Recall {parity['recall']} is below {options['min_recall']}"))
+                failures += 1
+
+        if failures:
+            raise CommandError(f'{failures} page(s) failed the parity check')
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from apps.partner.benchmarks.scraping import load_fixtures, run_politeness_check
+import json
+
+class Command(BaseCommand):
+    help = 'Check per-host politeness of bulk scraping offline against local stand-in websites'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sites', type=int, default=3, help='Number of stand-in websites')
+        parser.add_argument('--urls-per-site', type=int, default=4, help='Allowed URLs per website')
+        parser.add_argument('--delay', type=float, default=0.2, help='Response delay of the websites in seconds')
+        parser.add_argument('--slow-delay', type=float, default=1.0, help='Response delay of the first (slow) website in seconds')
+        parser.add_argument('--per-host', type=int, default=2, help='Concurrent scrapes per host')
+        parser.add_argument('--min-interval', type=float, default=0.5, help='Seconds between scrape starts per host')
+        parser.add_argument('--fixture', type=str, default='ladakh_group_trek', help='Fixture page served by the websites')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        html = load_fixtures(names=[options['fixture']])[0]['html']
+        with override_settings(SCRAPE_HOST_MIN_INTERVAL=options['min_interval']):
+            report = run_politeness_check(
+                html,
+                sites=options['sites'],
+                urls_per_site=options['urls_per_site'],
+                delay=options['delay'],
+                slow_delay=options['slow_delay'],
+                per_domain_limit=options['per_host'],
+            )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"\n{'Host':<28} {'Delay':>6} {'Requests':>9} {'Max conc.':>10} {'Min gap (s)':>12} {'Done (s)':>9}")
+        failed = False
+        for site in report['sites']:
+            self.stdout.write(
+                f"{site['host']:<28} {site['delay']:>6.2f} {site['page_requests']:>9} {site['max_concurrent']:>10} "
+                f"{site['min_start_gap']:>12.3f} {site['finished_after']:>9.3f}"
+            )
+            failed = failed or site['max_concurrent'] > options['per_host']
+
+        self.stdout.write(f"\nURLs disallowed by robots.txt: {report['disallowed']}")
+        self.stdout.write(f"Total time: {report['total_seconds']}s")
+        if failed:
+            self.stdout.write(self.style.ERROR('❌ A host received more concurrent requests than allowed'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Per-host concurrency limits held'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from apps.partner.models import Tour
+from apps.partner.tour_refresh import refresh_tours, tours_due_for_refresh
+from apps.partner.tasks import refresh_saved_tours_task
+import json
+
+class Command(BaseCommand):
+    help = 'Re-scrape saved tours whose source pages changed (conditional GET + content hash)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tour', type=int, action='append', dest='tour_ids', help='Refresh this tour (repeatable); ignores the minimum age')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum number of tours to refresh')
+        parser.add_argument('--min-age', type=int, default=None, help='Hours since the last check (default: TOUR_REFRESH_MIN_AGE_HOURS)')
+        parser.add_argument('--queue', action='store_true', help='Queue the nightly Celery job instead of refreshing in this process')
+        parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            result = refresh_saved_tours_task.delay()
+            self.stdout.write(self.style.SUCCESS(f'✅ Queued refresh job {result.id}'))
+            return
+
+        if options['tour_ids']:
+            tours = Tour.objects.filter(id__in=options['tour_ids']).exclude(tour_link__isnull=True).exclude(tour_link='')
+        else:
+            tours = tours_due_for_refresh(options['min_age'])
+        if options['limit']:
+            tours = tours[:options['limit']]
+
+        report = refresh_tours(tours)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"\nChecked:   {report['checked']}")
+        self.stdout.write(f"Skipped:   {report['skipped']} (not modified)")
+        self.stdout.write(f"Updated:   {report['updated']}")
+        self.stdout.write(f"Unchanged: {report['unchanged']} (page changed, same details)")
+        self.stdout.write(f"Broken:    {report['broken']}")
+        self.stdout.write(f"Failed:    {report['failed']} (retried on the next run)")
+        if report['broken'] or report['failed']:
+            self.stdout.write(self.style.ERROR('❌ Some tour pages could not be refreshed'))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Tour refresh completed'))
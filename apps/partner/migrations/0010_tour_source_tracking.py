@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0009_update_tour_model'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='source_checked_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Source Last Checked'),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='source_content_hash',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Source Content Hash'),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='source_etag',
+            field=models.CharField(blank=True, default='', max_length=255, verbose_name='Source ETag'),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='source_last_modified',
+            field=models.CharField(blank=True, default='', max_length=64, verbose_name='Source Last-Modified'),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='source_status',
+            field=models.CharField(blank=True, choices=[('unchanged', 'Unchanged'), ('updated', 'Updated'), ('broken', 'Broken')], default='', max_length=20, verbose_name='Source Status'),
+        ),
+    ]
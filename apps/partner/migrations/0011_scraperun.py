@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:37
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0010_tour_source_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapeRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=2048)),
+                ('domain', models.CharField(max_length=255)),
+                ('provider_path', models.CharField(blank=True, default='', help_text='cache, single_flight, local_markdown, firecrawl or manual_fallback', max_length=32)),
+                ('llm_provider', models.CharField(blank=True, default='', help_text='LLM provider that answered, if any', max_length=20)),
+                ('outcome', models.CharField(choices=[('success', 'Success'), ('failed', 'Failed'), ('error', 'Error')], max_length=20)),
+                ('error', models.TextField(blank=True, default='')),
+                ('fallback_reasons', models.JSONField(default=list, help_text='Skipped and failed stages with their reasons')),
+                ('stage_durations', models.JSONField(default=dict, help_text='Seconds spent per pipeline stage')),
+                ('total_duration', models.FloatField(default=0, help_text='Seconds')),
+                ('llm_calls', models.PositiveIntegerField(default=0)),
+                ('llm_cache_hits', models.PositiveIntegerField(default=0)),
+                ('prompt_tokens', models.PositiveIntegerField(default=0)),
+                ('completion_tokens', models.PositiveIntegerField(default=0)),
+                ('bytes_fetched', models.PositiveBigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['domain', 'created_at'], name='partner_scr_domain_c242e6_idx')],
+            },
+        ),
+    ]
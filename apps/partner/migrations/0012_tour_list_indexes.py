@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0011_scraperun'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['partner', 'created_at', 'id'], name='tour_partner_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['partner', 'updated_at', 'id'], name='tour_partner_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0012_tour_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['partner', 'starting_price', 'id'], name='tour_partner_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['partner', 'duration_days', 'id'], name='tour_partner_duration_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['partner', 'visibility_score', 'id'], name='tour_partner_visibility_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 06:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('partner', '0013_tour_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='source_snapshot',
+            field=models.JSONField(blank=True, default=dict, verbose_name='Source Snapshot'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from .validators import validate_document_file
 from .utils import get_secure_upload_path
@@ -186,9 +187,33 @@ class Tour(models.Model):
     # SEO & Visibility
     visibility_score = models.PositiveIntegerField(default=0, verbose_name='Tripsetter Visibility Score')
     
+    # Source page tracking for the scheduled re-scrape
+    SOURCE_STATUS_CHOICES = [
+        ('unchanged', 'Unchanged'),
+        ('updated', 'Updated'),
+        ('broken', 'Broken'),
+    ]
+    source_etag = models.CharField(max_length=255, blank=True, default='', verbose_name='Source ETag')
+    source_last_modified = models.CharField(max_length=64, blank=True, default='', verbose_name='Source Last-Modified')
+    source_content_hash = models.CharField(max_length=64, blank=True, default='', verbose_name='Source Content Hash')
+    source_status = models.CharField(max_length=20, choices=SOURCE_STATUS_CHOICES, blank=True, default='', verbose_name='Source Status')
+    source_checked_at = models.DateTimeField(blank=True, null=True, db_index=True, verbose_name='Source Last Checked')
+    # Page-derived details of the last scrape, to tell them apart from the partner's edits
+    source_snapshot = models.JSONField(blank=True, default=dict, verbose_name='Source Snapshot')
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a partner's tour list (see apps.partner.pagination)
+            models.Index(fields=['partner', 'created_at', 'id'], name='tour_partner_created_idx'),
+            models.Index(fields=['partner', 'updated_at', 'id'], name='tour_partner_updated_idx'),
+            models.Index(fields=['partner', 'starting_price', 'id'], name='tour_partner_price_idx'),
+            models.Index(fields=['partner', 'duration_days', 'id'], name='tour_partner_duration_idx'),
+            models.Index(fields=['partner', 'visibility_score', 'id'], name='tour_partner_visibility_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.partner.user.email})"
     
@@ -216,4 +241,36 @@ class Tour(models.Model):
     
     def save(self, *args, **kwargs):
         self.visibility_score = self.calculate_visibility_score()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+class ScrapeRun(models.Model):
+    """Telemetry of one tour page scrape, written in batches by apps.partner.scrape_telemetry."""
+    OUTCOME_CHOICES = [
+        ('success', 'Success'),
+        ('failed', 'Failed'),
+        ('error', 'Error'),
+    ]
+    url = models.URLField(max_length=2048)
+    domain = models.CharField(max_length=255)
+    provider_path = models.CharField(max_length=32, blank=True, default='', help_text='cache, single_flight, local_markdown, firecrawl or manual_fallback')
+    llm_provider = models.CharField(max_length=20, blank=True, default='', help_text='LLM provider that answered, if any')
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES)
+    error = models.TextField(blank=True, default='')
+    fallback_reasons = models.JSONField(default=list, help_text='Skipped and failed stages with their reasons')
+    stage_durations = models.JSONField(default=dict, help_text='Seconds spent per pipeline stage')
+    total_duration = models.FloatField(default=0, help_text='Seconds')
+    llm_calls = models.PositiveIntegerField(default=0)
+    llm_cache_hits = models.PositiveIntegerField(default=0)
+    prompt_tokens = models.PositiveIntegerField(default=0)
+    completion_tokens = models.PositiveIntegerField(default=0)
+    bytes_fetched = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['domain', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.domain} {self.outcome} ({self.total_duration:.2f}s)"
@@ -0,0 +1,102 @@
+import logging
+from dataclasses import dataclass
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Content types the scraping pipeline can extract tour details from
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UnsupportedContentTypeError(ValueError):
+    """Raised when a URL does not point to an HTML page (PDF, video, image, ...)."""
+
+
+@dataclass
+class FetchedPage:
+    """A page downloaded by fetch_page."""
+    url: str
+    content: bytes
+    content_type: str
+    encoding: str
+    truncated: bool
+    status_code: int = 200
+    etag: str = ''
+    last_modified: str = ''
+
+    @property
+    def not_modified(self):
+        """Whether a conditional request was answered with 304 Not Modified."""
+        return self.status_code == 304
+
+
+def fetch_page(session, url, timeout=10, max_bytes=5 * 1024 * 1024, headers=None):
+    """
+    Download an HTML page, streaming the body and stopping at max_bytes.
+
+    The content type is checked from the response headers before any of the
+    body is read. Compressed bodies are decompressed chunk by chunk, so
+    max_bytes caps the decompressed size as well.
+
+    Conditional requests (If-None-Match/If-Modified-Since in headers) that are
+    answered with 304 Not Modified return an empty page with status_code 304.
+
+    Args:
+        session (requests.Session): Session to download with
+        url (str): Page URL
+        timeout (int): Connect/read timeout in seconds
+        max_bytes (int): Maximum number of (decompressed) bytes to read
+        headers (dict): Extra request headers
+
+    Returns:
+        FetchedPage: Page content, truncated to max_bytes
+
+    Raises:
+        UnsupportedContentTypeError: If the response is not HTML
+        requests.RequestException: On connection errors and HTTP error statuses
+    """
+    response = session.get(url, timeout=timeout, stream=True, headers=headers)
+    try:
+        response.raise_for_status()
+
+        validators = {
+            'status_code': response.status_code,
+            'etag': response.headers.get('ETag', ''),
+            'last_modified': response.headers.get('Last-Modified', ''),
+        }
+        if response.status_code == 304:
+            return FetchedPage(url=response.url or url, content=b'', content_type='', encoding='', truncated=False, **validators)
+
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+        # A missing content type is left to the HTML parser
+        if content_type and content_type not in HTML_CONTENT_TYPES:
+            raise UnsupportedContentTypeError(f'Unsupported content type: {content_type}')
+
+        chunks = []
+        size = 0
+        truncated = False
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                # Stopped at the cap: only a body of exactly max_bytes was read completely
+                truncated = size > max_bytes or response.headers.get('Content-Length') != str(size)
+                break
+
+        content = b''.join(chunks)[:max_bytes]
+        if truncated:
+            logger.warning(f"Page larger than {max_bytes} bytes, truncated: {url}")
+        return FetchedPage(
+            url=response.url or url,
+            content=content,
+            content_type=content_type,
+            encoding=response.encoding or '',
+            truncated=truncated,
+            **validators,
+        )
+    finally:
+        # Drops the connection when the body was not read to the end
+        response.close()
+
@@ -0,0 +1,169 @@
+import logging
+from lxml import etree, html as lxml_html
+from bs4 import BeautifulSoup
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Elements whose text is never page content
+SKIP_TEXT_TAGS = {'script', 'style', 'noscript', 'template'}
+
+
+def _has_class(name):
+    return lambda tag, attrs, classes: name in classes
+
+
+def _class_contains(value):
+    return lambda tag, attrs, classes: value in attrs.get('class', '')
+
+
+def _id_contains(value):
+    return lambda tag, attrs, classes: value in attrs.get('id', '')
+
+
+def _meta(key, value):
+    return lambda tag, attrs, classes: tag == 'meta' and attrs.get(key) == value
+
+
+def _tag(name):
+    return lambda tag, attrs, classes: tag == name
+
+
+# (selector, predicate) pairs in priority order; the selectors are kept for logging and readability
+TITLE_RULES = [
+    ('h1', _tag('h1')),
+    ('h2', _tag('h2')),
+    ('.title', _has_class('title')),
+    ('.tour-title', _has_class('tour-title')),
+    ('[class*="title"]', _class_contains('title')),
+    ('meta[property="og:title"]', _meta('property', 'og:title')),
+    ('meta[name="title"]', _meta('name', 'title')),
+]
+DESCRIPTION_RULES = [
+    ('meta[name="description"]', _meta('name', 'description')),
+    ('meta[property="og:description"]', _meta('property', 'og:description')),
+    ('.description', _has_class('description')),
+    ('.tour-description', _has_class('tour-description')),
+    ('[class*="description"]', _class_contains('description')),
+]
+CONTACT_RULES = [
+    ('.contact', _has_class('contact')),
+    ('.contact-info', _has_class('contact-info')),
+    ('.phone', _has_class('phone')),
+    ('.email', _has_class('email')),
+    ('.address', _has_class('address')),
+    ('[class*="contact"]', _class_contains('contact')),
+    ('[class*="phone"]', _class_contains('phone')),
+    ('[class*="email"]', _class_contains('email')),
+    ('[class*="address"]', _class_contains('address')),
+    ('.footer', _has_class('footer')),
+    ('.header', _has_class('header')),
+    ('.contact-details', _has_class('contact-details')),
+    ('[id*="contact"]', _id_contains('contact')),
+    ('[id*="phone"]', _id_contains('phone')),
+    ('[id*="email"]', _id_contains('email')),
+]
+
+
+def element_value(element):
+    """Get the content of a meta element, or the stripped text of any other element (like get_text(strip=True))."""
+    if element.tag == 'meta':
+        return element.get('content', '')
+    return ''.join(text.strip() for text in element.itertext())
+
+
+class PageSignals:
+    """
+    Everything the manual scraping fallback needs from a page, collected in one lxml traversal.
+
+    Attributes:
+        title_matches (list): First element matching each TITLE_RULES selector (None when nothing matched)
+        description_matches (list): First element matching each DESCRIPTION_RULES selector
+        contact_matches (list): All elements matching each CONTACT_RULES selector, in document order
+        contact_links (list): Text of tel: and mailto: links
+        text (str): Visible page text, one text node per line, capped at max_text_chars
+        structured_elements (list): meta and JSON-LD script elements
+    """
+
+    def __init__(self, root, max_text_chars=100000):
+        self.title_matches = [None] * len(TITLE_RULES)
+        self.description_matches = [None] * len(DESCRIPTION_RULES)
+        self.contact_matches = [[] for _ in CONTACT_RULES]
+        self.contact_links = []
+        self.structured_elements = []
+
+        text_parts = []
+        text_length = 0
+        for event, element in etree.iterwalk(root, events=('start', 'end')):
+            # Text is only generated up to the budget; a tail follows the element's own subtree
+            if text_length < max_text_chars:
+                if event == 'end':
+                    text = element.tail
+                elif isinstance(element.tag, str) and element.tag.lower() not in SKIP_TEXT_TAGS:
+                    text = element.text
+                else:
+                    text = None
+                if text and text.strip():
+                    text_parts.append(text.strip())
+                    text_length += len(text)
+
+            # Comments and processing instructions have a callable tag
+            if event == 'end' or not isinstance(element.tag, str):
+                continue
+
+            tag = element.tag.lower()
+            attrs = element.attrib
+            classes = attrs.get('class', '').split()
+
+            for index, (_, matches) in enumerate(TITLE_RULES):
+                if self.title_matches[index] is None and matches(tag, attrs, classes):
+                    self.title_matches[index] = element
+            for index, (_, matches) in enumerate(DESCRIPTION_RULES):
+                if self.description_matches[index] is None and matches(tag, attrs, classes):
+                    self.description_matches[index] = element
+            for index, (_, matches) in enumerate(CONTACT_RULES):
+                if matches(tag, attrs, classes):
+                    self.contact_matches[index].append(element)
+
+            if tag == 'a' and attrs.get('href', '').startswith(('tel:', 'mailto:')):
+                self.contact_links.append(element_value(element))
+            elif tag == 'meta' or (tag == 'script' and attrs.get('type') == 'application/ld+json'):
+                self.structured_elements.append(element)
+
+        self.text = '\n'.join(text_parts)[:max_text_chars]
+
+    @classmethod
+    def from_html(cls, content, max_text_chars=100000):
+        """
+        Parse HTML with lxml and collect the page signals.
+
+        Args:
+            content (bytes or str): Fetched HTML
+            max_text_chars (int): Maximum length of the collected page text
+
+        Returns:
+            PageSignals: Collected signals
+        """
+        try:
+            root = lxml_html.document_fromstring(content)
+        except (etree.ParserError, ValueError) as e:
+            logger.warning(f"lxml could not parse the page: {str(e)}")
+            root = lxml_html.document_fromstring('<html><body></body></html>')
+        return cls(root, max_text_chars)
+
+    def first_value(self, matches):
+        """Return the first non-empty value of the matched elements, in rule priority order."""
+        for element in matches:
+            if element is not None:
+                value = element_value(element)
+                if value:
+                    return value
+        return ''
+
+    def structured_soup(self):
+        """Get a small BeautifulSoup holding only the meta and JSON-LD elements, for _extract_structured_data."""
+        markup = ''.join(
+            etree.tostring(element, encoding='unicode', method='html', with_tail=False)
+            for element in self.structured_elements
+        )
+        return BeautifulSoup(markup, 'html.parser')
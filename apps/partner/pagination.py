@@ -0,0 +1,138 @@
+import json
+import base64
+import binascii
+import logging
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.pagination import BasePagination
+from rest_framework.settings import api_settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class InvalidPageRequest(ValueError):
+    """Raised for an unknown ordering, an invalid cursor or an invalid page size."""
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on (ordering field, id).
+
+    Every page is read with an indexed range condition instead of an OFFSET,
+    so later pages cost the same as the first one and rows inserted while a
+    client pages through the list are neither skipped nor repeated. The
+    cursor is an opaque base64 token holding the ordering, the ordering value
+    and the id of the last row of the previous page.
+
+    Attributes:
+        ordering_fields (dict): Public ordering name -> non-nullable model field
+        default_ordering (str): Ordering used without ?ordering= ('-' prefix for descending)
+        max_page_size (int): Upper bound of ?page_size=
+    """
+    ordering_fields = {}
+    default_ordering = '-createdAt'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE or 20
+        self.ordering = self.default_ordering
+        self.next_cursor = None
+
+    def get_ordering(self, request):
+        """Return the requested ordering, checked against ordering_fields."""
+        ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if ordering.lstrip('-') not in self.ordering_fields:
+            allowed = ', '.join(sorted(self.ordering_fields))
+            raise InvalidPageRequest(f'Invalid ordering. Allowed values: {allowed} (prefix with - for descending).')
+        return ordering
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            page_size = int(value)
+        except ValueError:
+            raise InvalidPageRequest('page_size must be an integer.')
+        if page_size < 1:
+            raise InvalidPageRequest('page_size must be at least 1.')
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, value, pk):
+        payload = json.dumps({'o': self.ordering, 'v': value, 'id': pk}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor, field):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            ordering = payload['o']
+        except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError):
+            raise InvalidPageRequest('Invalid cursor.')
+        if ordering != self.ordering:
+            # A cursor only makes sense for the ordering it was created with
+            raise InvalidPageRequest('Cursor does not match the requested ordering.')
+        try:
+            return field.to_python(payload['v']), int(payload['id'])
+        except (ValueError, TypeError, KeyError, DjangoValidationError):
+            raise InvalidPageRequest('Invalid cursor.')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Get one page of a queryset.
+
+        Args:
+            queryset (QuerySet): Filtered queryset, not ordered yet
+            request (Request): Request with the optional cursor, ordering and page_size parameters
+
+        Returns:
+            list: Rows of the page (one extra row is read to detect the next page)
+
+        Raises:
+            InvalidPageRequest: On an unknown ordering, an invalid cursor or an invalid page size
+        """
+        self.ordering = self.get_ordering(request)
+        page_size = self.get_page_size(request)
+        descending = self.ordering.startswith('-')
+        field_name = self.ordering_fields[self.ordering.lstrip('-')]
+        prefix = '-' if descending else ''
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor, queryset.model._meta.get_field(field_name))
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field_name}__{lookup}': value}) | Q(**{field_name: value, f'pk__{lookup}': pk})
+            )
+
+        rows = list(queryset.order_by(f'{prefix}{field_name}', f'{prefix}pk')[:page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            self.next_cursor = self.encode_cursor(getattr(last, field_name), last.pk)
+        return rows
+
+    def get_pagination_data(self):
+        """Pagination details of the last paginated page."""
+        return {
+            'nextCursor': self.next_cursor,
+            'hasMore': self.next_cursor is not None,
+            'ordering': self.ordering,
+        }
+
+
+class TourKeysetPagination(KeysetPagination):
+    """Keyset pagination of a partner's tours, backed by one (partner, ordering field, id) index per ordering."""
+    ordering_fields = {
+        'createdAt': 'created_at',
+        'updatedAt': 'updated_at',
+        'startingPrice': 'starting_price',
+        'durationDays': 'duration_days',
+        'visibilityScore': 'visibility_score',
+    }
+    default_ordering = '-createdAt'
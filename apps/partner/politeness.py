@@ -0,0 +1,206 @@
+import math
+import time
+import random
+import uuid
+import logging
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+from django.core.cache import cache
+from django.conf import settings
+from .http_clients import get_http_session, USER_AGENT
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Only the first 500 KiB of a robots.txt are parsed (RFC 9309)
+ROBOTS_MAX_BYTES = 500 * 1024
+
+ROBOTS_DISALLOWED_ERROR = "Scraping this page is disallowed by the website's robots.txt"
+
+
+def _host(url):
+    return urlsplit(url).netloc.lower()
+
+
+def _robots_cache_key(host):
+    return f"scrape_robots:{host}"
+
+
+def _fetch_robots(url):
+    parts = urlsplit(url)
+    robots_url = f"{parts.scheme}://{parts.netloc}/robots.txt"
+    try:
+        response = get_http_session().get(robots_url, timeout=getattr(settings, 'SCRAPE_ROBOTS_TIMEOUT', 5), stream=True)
+        try:
+            body = response.raw.read(ROBOTS_MAX_BYTES, decode_content=True) if response.status_code == 200 else b''
+        finally:
+            response.close()
+        return {'status': response.status_code, 'body': body.decode('utf-8', errors='replace')}
+    except Exception as e:
+        logger.warning(f"Could not fetch {robots_url}: {str(e)}")
+        return {'status': None, 'body': ''}
+
+
+def _build_parser(entry):
+    parser = RobotFileParser()
+    status = entry['status']
+    if status in (401, 403):
+        parser.disallow_all = True
+    elif status != 200:
+        # Missing robots.txt (4xx) allows everything; unreachable ones (5xx, errors) are not held against the site
+        parser.allow_all = True
+    else:
+        parser.parse(entry['body'].splitlines())
+    return parser
+
+
+def get_robots_parser(url, fetch=True):
+    """
+    Get the parsed robots.txt of a URL's host, cached for SCRAPE_ROBOTS_TTL.
+
+    Args:
+        url (str): Any URL on the host
+        fetch (bool): Download robots.txt on a cache miss; when False, return None instead
+
+    Returns:
+        RobotFileParser or None: Parsed rules
+    """
+    key = _robots_cache_key(_host(url))
+    try:
+        entry = cache.get(key)
+    except Exception as e:
+        logger.error(f"Robots cache read error: {str(e)}")
+        entry = None
+
+    if entry is None:
+        if not fetch:
+            return None
+        entry = _fetch_robots(url)
+        # Unreachable robots.txt files are retried sooner
+        if entry['status'] is None or entry['status'] >= 500:
+            ttl = getattr(settings, 'SCRAPE_ROBOTS_ERROR_TTL', 10 * 60)
+        else:
+            ttl = getattr(settings, 'SCRAPE_ROBOTS_TTL', 24 * 60 * 60)
+        try:
+            cache.set(key, entry, ttl)
+        except Exception as e:
+            logger.error(f"Robots cache write error: {str(e)}")
+    return _build_parser(entry)
+
+
+def is_allowed_by_robots(url):
+    """Check a URL against its host's robots.txt (always True with SCRAPE_ROBOTS_ENABLED=False)."""
+    if not getattr(settings, 'SCRAPE_ROBOTS_ENABLED', True):
+        return True
+    allowed = get_robots_parser(url).can_fetch(USER_AGENT, url)
+    if not allowed:
+        logger.info(f"Disallowed by robots.txt: {url}")
+    return allowed
+
+
+def cached_crawl_delay(url):
+    """Get the Crawl-delay of a host from an already cached robots.txt, without any network access."""
+    if not getattr(settings, 'SCRAPE_ROBOTS_ENABLED', True):
+        return 0
+    parser = get_robots_parser(url, fetch=False)
+    delay = parser.crawl_delay(USER_AGENT) if parser else None
+    try:
+        return float(delay or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@dataclass
+class HostLease:
+    """A concurrency slot on a host, held while one scrape runs."""
+    host: str
+    key: str
+    token: str
+
+
+def deferral_countdown(delay, deferrals):
+    """
+    Seconds before a Celery job deferred by a busy host tries again.
+
+    The wait doubles with every deferral, up to SCRAPE_HOST_MAX_DEFER_DELAY
+    (about the length of a scrape), and is jittered so that the jobs waiting
+    for the same host do not all come back at once. It is never shorter than
+    the delay asked for by the scheduler.
+
+    Args:
+        delay (float): Seconds to wait returned by HostScheduler.try_acquire
+        deferrals (int): Number of times the job was already deferred
+
+    Returns:
+        float: Countdown in seconds
+    """
+    cap = getattr(settings, 'SCRAPE_HOST_MAX_DEFER_DELAY', 60)
+    backoff = min(cap, getattr(settings, 'SCRAPE_HOST_POLL_INTERVAL', 0.5) * 2 ** deferrals)
+    return max(delay, random.uniform(backoff / 2, backoff))
+
+
+class HostScheduler:
+    """
+    Per-host politeness shared by all workers through the Django cache.
+
+    A host runs at most max_concurrency scrapes at the same time and starts at
+    most one scrape per min_interval window (or per robots.txt Crawl-delay,
+    when that is longer). Concurrency slots are cache keys that expire after
+    SCRAPE_JOB_TIME_LIMIT, so slots of a killed worker are freed on their own.
+    """
+
+    def __init__(self, max_concurrency=None, min_interval=None):
+        self.max_concurrency = max_concurrency or getattr(settings, 'SCRAPE_HOST_MAX_CONCURRENCY', 2)
+        self.min_interval = getattr(settings, 'SCRAPE_HOST_MIN_INTERVAL', 1.0) if min_interval is None else min_interval
+        self.lease_timeout = getattr(settings, 'SCRAPE_JOB_TIME_LIMIT', 210)
+        self.poll_interval = getattr(settings, 'SCRAPE_HOST_POLL_INTERVAL', 0.5)
+
+    def try_acquire(self, url):
+        """
+        Try to start a scrape of a URL now.
+
+        Args:
+            url (str): URL to scrape
+
+        Returns:
+            tuple: (HostLease, 0) when the scrape may start, (None, seconds to wait) when the host is busy or throttled
+        """
+        if not getattr(settings, 'SCRAPE_POLITENESS_ENABLED', True):
+            return HostLease(_host(url), '', ''), 0
+
+        host = _host(url)
+        token = uuid.uuid4().hex
+        try:
+            slot_key = None
+            for index in range(self.max_concurrency):
+                key = f"scrape_host:{host}:slot:{index}"
+                if cache.add(key, token, self.lease_timeout):
+                    slot_key = key
+                    break
+            if slot_key is None:
+                return None, self.poll_interval
+
+            interval = max(self.min_interval, cached_crawl_delay(url))
+            if interval > 0:
+                now = time.time()
+                window = int(now // interval)
+                # Whole seconds, since the Redis backend truncates timeouts
+                if not cache.add(f"scrape_host:{host}:window:{window}", token, max(1, math.ceil(interval * 2))):
+                    cache.delete(slot_key)
+                    return None, (window + 1) * interval - now
+            return HostLease(host, slot_key, token), 0
+        except Exception as e:
+            logger.error(f"Host scheduler cache error: {str(e)}")
+            # Fail open: politeness must not stop scraping when the cache is down
+            return HostLease(host, '', ''), 0
+
+    def release(self, lease):
+        """Free the concurrency slot of a finished scrape."""
+        if not lease or not lease.key:
+            return
+        try:
+            if cache.get(lease.key) == lease.token:
+                cache.delete(lease.key)
+        except Exception as e:
+            logger.error(f"Host scheduler cache error: {str(e)}")
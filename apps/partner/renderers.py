@@ -0,0 +1,52 @@
+import json
+import logging
+from rest_framework.renderers import BaseRenderer
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class StreamingRenderer(BaseRenderer):
+    """
+    Accept header support for views that return a StreamingHttpResponse.
+
+    DRF negotiates the renderer before the view runs and answers 406 when no
+    renderer matches the Accept header, even though a streamed response is
+    never rendered. Listing one of these renderers on such a view lets
+    clients ask for the media type they will receive. Only the view's own
+    Response objects (errors) go through render(), as JSON text.
+    """
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data).encode(self.charset)
+
+
+class EventStreamRenderer(StreamingRenderer):
+    """Server-Sent Events (EventSource always sends Accept: text/event-stream)."""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return f"event: error\ndata: {json.dumps(data)}\n\n".encode(self.charset)
+
+
+class CSVRenderer(StreamingRenderer):
+    """CSV files streamed by the tour export."""
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(StreamingRenderer):
+    """Newline-delimited JSON (JSON Lines), one object per line."""
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return super().render(data, accepted_media_type, renderer_context) + b'\n'
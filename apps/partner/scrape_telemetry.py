@@ -0,0 +1,313 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import timedelta
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.db import connections, InterfaceError, OperationalError
+from django.db.models import Avg, Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import ScrapeRun
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def percentile(values, percent):
+    """Return the percentile of a list of numbers (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class ScrapeRunRecorder:
+    """
+    Collects the telemetry of one extract_tour_details call.
+
+    Fed by TourScrapingService from its stage reports, page fetches and LLM
+    calls. Thread-safe, since the hedged extraction paths share one service;
+    anything reported after finish() (a losing hedged path) is ignored.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.started_at = timezone.now()
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._finished = False
+        self.provider_path = ''
+        self.llm_provider = ''
+        self.stage_durations = {}
+        self.fallback_reasons = []
+        self.llm_calls = 0
+        self.llm_cache_hits = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.bytes_fetched = 0
+
+    def on_stage(self, stage, state, details):
+        """Record the duration of a finished stage and the reason of a skipped or failed one."""
+        with self._lock:
+            if self._finished:
+                return
+            duration = details.get('duration')
+            if duration is not None:
+                self.stage_durations[stage] = round(self.stage_durations.get(stage, 0) + duration, 3)
+            reason = details.get('reason') or details.get('error')
+            if state in ('skipped', 'failed') and reason:
+                self.fallback_reasons.append(f"{stage}: {reason}")
+
+    def set_path(self, path):
+        """Record the extraction path whose result is returned."""
+        with self._lock:
+            if not self._finished:
+                self.provider_path = path
+
+    def add_bytes(self, count):
+        with self._lock:
+            if not self._finished:
+                self.bytes_fetched += count
+
+    def add_llm_call(self, provider, prompt_tokens=0, completion_tokens=0, cached=False):
+        """Record an LLM completion, answered by the provider or the LLM response cache."""
+        with self._lock:
+            if self._finished:
+                return
+            if cached:
+                self.llm_cache_hits += 1
+                return
+            self.llm_calls += 1
+            self.prompt_tokens += prompt_tokens or 0
+            self.completion_tokens += completion_tokens or 0
+
+    def set_llm_provider(self, provider):
+        with self._lock:
+            if not self._finished:
+                self.llm_provider = provider
+
+    def finish(self, result):
+        """
+        Close the recording.
+
+        Args:
+            result (dict or None): Extraction result, None when the extraction raised
+
+        Returns:
+            dict or None: ScrapeRun field values, None if already finished
+        """
+        with self._lock:
+            if self._finished:
+                return None
+            self._finished = True
+            if result is None:
+                outcome, error = 'error', 'Extraction raised an exception'
+            elif result.get('success'):
+                outcome, error = 'success', ''
+            else:
+                outcome, error = 'failed', str(result.get('error') or '')
+            if result and result.get('coalesced'):
+                self.provider_path = 'single_flight'
+            return {
+                'url': self.url[:2048],
+                'domain': urlsplit(self.url).netloc.lower()[:255],
+                'provider_path': self.provider_path,
+                'llm_provider': self.llm_provider,
+                'outcome': outcome,
+                'error': error,
+                'fallback_reasons': self.fallback_reasons,
+                'stage_durations': self.stage_durations,
+                'total_duration': round(time.monotonic() - self._start, 3),
+                'llm_calls': self.llm_calls,
+                'llm_cache_hits': self.llm_cache_hits,
+                'prompt_tokens': self.prompt_tokens,
+                'completion_tokens': self.completion_tokens,
+                'bytes_fetched': self.bytes_fetched,
+                'created_at': self.started_at,
+            }
+
+
+# Runs waiting to be written, flushed by a background thread every SCRAPE_TELEMETRY_FLUSH_INTERVAL
+# seconds or as soon as SCRAPE_TELEMETRY_BATCH_SIZE runs are buffered
+_buffer = deque()
+_buffer_lock = threading.Lock()
+_flush_event = threading.Event()
+_flusher = None
+
+
+def _reset_after_fork():
+    # Runs buffered in the parent are written by the parent
+    global _buffer_lock, _flush_event, _flusher
+    _buffer.clear()
+    _buffer_lock = threading.Lock()
+    _flush_event = threading.Event()
+    _flusher = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _flush_loop():
+    while True:
+        _flush_event.wait(getattr(settings, 'SCRAPE_TELEMETRY_FLUSH_INTERVAL', 5))
+        _flush_event.clear()
+        flush_scrape_runs()
+        # The flusher's connection is idle until the next batch
+        connections.close_all()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _buffer_lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=_flush_loop, name='scrape-telemetry', daemon=True)
+            _flusher.start()
+
+
+def record_scrape_run(run):
+    """
+    Buffer a finished scrape run for the next batch write.
+
+    Never blocks on the database. When writes keep failing, the oldest runs
+    are dropped beyond SCRAPE_TELEMETRY_MAX_BUFFER.
+
+    Args:
+        run (dict): ScrapeRun field values from ScrapeRunRecorder.finish
+    """
+    if not run or not getattr(settings, 'SCRAPE_TELEMETRY_ENABLED', True):
+        return
+    with _buffer_lock:
+        _buffer.append(run)
+        while len(_buffer) > getattr(settings, 'SCRAPE_TELEMETRY_MAX_BUFFER', 5000):
+            _buffer.popleft()
+        full = len(_buffer) >= getattr(settings, 'SCRAPE_TELEMETRY_BATCH_SIZE', 50)
+    _ensure_flusher()
+    if full:
+        _flush_event.set()
+
+
+def flush_scrape_runs():
+    """
+    Write all buffered scrape runs with one bulk insert.
+
+    When the database cannot be reached, the runs go back to the front of the
+    buffer for the next flush (the oldest are dropped beyond
+    SCRAPE_TELEMETRY_MAX_BUFFER). Runs the database rejects are dropped.
+
+    Returns:
+        int: Number of runs written
+    """
+    with _buffer_lock:
+        runs = list(_buffer)
+        _buffer.clear()
+    if not runs:
+        return 0
+    try:
+        ScrapeRun.objects.bulk_create([ScrapeRun(**run) for run in runs], batch_size=500)
+        return len(runs)
+    except (OperationalError, InterfaceError) as e:
+        logger.error(f"Could not write {len(runs)} scrape runs, retrying on the next flush: {str(e)}")
+        with _buffer_lock:
+            _buffer.extendleft(reversed(runs))
+            while len(_buffer) > getattr(settings, 'SCRAPE_TELEMETRY_MAX_BUFFER', 5000):
+                _buffer.popleft()
+        return 0
+    except Exception as e:
+        # Telemetry must never break scraping: a batch the database rejects would fail again, so it is dropped
+        logger.error(f"Could not write {len(runs)} scrape runs: {str(e)}")
+        return 0
+
+
+atexit.register(flush_scrape_runs)
+
+
+def _totals():
+    return {
+        'runs': Count('id'),
+        'succeeded': Count('id', filter=Q(outcome='success')),
+        'avg_duration': Avg('total_duration'),
+        'llm_calls': Sum('llm_calls'),
+        'llm_cache_hits': Sum('llm_cache_hits'),
+        'prompt_tokens': Sum('prompt_tokens'),
+        'completion_tokens': Sum('completion_tokens'),
+        'bytes_fetched': Sum('bytes_fetched'),
+    }
+
+
+def get_scrape_run_stats(days=7, domain=None, top_domains=50):
+    """
+    Aggregate scrape runs of the last days by day, by domain and by pipeline stage.
+
+    Counts and sums are computed in the database. Stage latency percentiles
+    are computed from the SCRAPE_TELEMETRY_STATS_SAMPLE most recent runs.
+
+    Args:
+        days (int): Number of days to look back
+        domain (str): Only include runs of this domain
+        top_domains (int): Number of domains (most runs first) in by_domain
+
+    Returns:
+        dict: totals, by_day, by_domain, provider_paths, stages and tokens_per_extraction
+    """
+    runs = ScrapeRun.objects.filter(created_at__gte=timezone.now() - timedelta(days=days))
+    if domain:
+        runs = runs.filter(domain=domain.lower())
+
+    totals = runs.aggregate(**_totals())
+    by_day = list(
+        runs.annotate(day=TruncDate('created_at'))
+        .values('day')
+        .annotate(**_totals())
+        .order_by('day')
+    )
+    by_domain = list(
+        runs.values('domain')
+        .annotate(**_totals())
+        .order_by('-runs', 'domain')[:top_domains]
+    )
+    provider_paths = {
+        row['provider_path'] or 'unknown': row['runs']
+        for row in runs.values('provider_path').annotate(runs=Count('id')).order_by('-runs')
+    }
+    llm_runs = runs.filter(llm_calls__gt=0).aggregate(
+        prompt=Avg('prompt_tokens'),
+        completion=Avg('completion_tokens'),
+    )
+
+    sample = runs.order_by('-created_at').values_list('total_duration', 'stage_durations')[
+        :getattr(settings, 'SCRAPE_TELEMETRY_STATS_SAMPLE', 10000)
+    ]
+    durations = {'total': []}
+    for total_duration, stage_durations in sample:
+        durations['total'].append(total_duration)
+        for stage, duration in (stage_durations or {}).items():
+            durations.setdefault(stage, []).append(duration)
+    stages = {
+        stage: {
+            'count': len(values),
+            'p50': round(percentile(values, 50), 3),
+            'p95': round(percentile(values, 95), 3),
+        }
+        for stage, values in durations.items()
+    }
+
+    return {
+        'days': days,
+        'totals': totals,
+        'by_day': by_day,
+        'by_domain': by_domain,
+        'provider_paths': provider_paths,
+        'stages': stages,
+        'tokens_per_extraction': {
+            'prompt': round(llm_runs['prompt'] or 0, 1),
+            'completion': round(llm_runs['completion'] or 0, 1),
+        },
+    }
@@ -0,0 +1,213 @@
+import time
+import uuid
+import hashlib
+import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from django.core.cache import cache
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track the visitor and never change the page content
+TRACKING_PARAMS = {
+    'gclid', 'dclid', 'fbclid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', 'ref', 'ref_src', 'srsltid',
+}
+TRACKING_PARAM_PREFIXES = ('utm_',)
+
+
+def normalize_url(url):
+    """
+    Normalize a URL so that equivalent tour links share one cache entry.
+    
+    Lowercases the scheme and host, drops the fragment and tracking
+    parameters, sorts the remaining query parameters and strips the
+    trailing slash from the path.
+    
+    Args:
+        url (str): URL as pasted by the partner
+    
+    Returns:
+        str: Normalized URL
+    """
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        path,
+        urlencode(sorted(query)),
+        ''
+    ))
+
+
+def content_hash(content):
+    """Return a SHA-256 hex digest of fetched page content (markdown or HTML)."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def _url_cache_key(url):
+    return f"scrape_result:url:{content_hash(normalize_url(url))}"
+
+
+def _content_cache_key(content):
+    return f"scrape_result:content:{content_hash(content)}"
+
+
+def _lock_key(url):
+    return f"scrape_lock:url:{content_hash(normalize_url(url))}"
+
+
+def _flight_result_key(url, token):
+    return f"scrape_flight:url:{content_hash(normalize_url(url))}:{token}"
+
+
+def get_cached_result(url):
+    """
+    Get a cached extraction result for a URL.
+    
+    Args:
+        url (str): Tour URL (normalized before lookup)
+    
+    Returns:
+        dict or None: Cached result marked with cached=True, or None on a miss
+    """
+    try:
+        result = cache.get(_url_cache_key(url))
+    except Exception as e:
+        logger.error(f"Scrape cache read error: {str(e)}")
+        return None
+    
+    if result is None:
+        return None
+    
+    logger.info(f"Scrape cache hit for URL: {url}")
+    return {**result, 'cached': True}
+
+
+def cache_result(url, result):
+    """Cache a successful extraction result for a URL."""
+    if not result or not result.get('success'):
+        return
+    
+    timeout = getattr(settings, 'SCRAPE_CACHE_TTL', 6 * 60 * 60)
+    try:
+        cache.set(_url_cache_key(url), result, timeout)
+    except Exception as e:
+        logger.error(f"Scrape cache write error: {str(e)}")
+
+
+def get_cached_content_data(content):
+    """
+    Get extracted tour data for page content that has been processed before.
+    
+    Args:
+        content (str or bytes): Fetched markdown or HTML
+    
+    Returns:
+        dict or None: Cleaned tour data, or None on a miss
+    """
+    if not content:
+        return None
+    try:
+        return cache.get(_content_cache_key(content))
+    except Exception as e:
+        logger.error(f"Scrape content cache read error: {str(e)}")
+        return None
+
+
+def cache_content_data(content, data):
+    """Cache cleaned tour data keyed on the hash of the fetched page content."""
+    if not content or not data:
+        return
+    
+    timeout = getattr(settings, 'SCRAPE_CONTENT_CACHE_TTL', 7 * 24 * 60 * 60)
+    try:
+        cache.set(_content_cache_key(content), data, timeout)
+    except Exception as e:
+        logger.error(f"Scrape content cache write error: {str(e)}")
+
+
+def acquire_scrape_lock(url):
+    """
+    Try to become the single worker scraping a URL (keyed on the normalized URL).
+    
+    The lock expires after SCRAPE_SINGLE_FLIGHT_TIMEOUT seconds, so a crashed
+    leader never blocks the URL for longer than that.
+    
+    Args:
+        url (str): Tour URL
+    
+    Returns:
+        str or None: Lock token when acquired, None when another worker holds the lock
+    """
+    token = uuid.uuid4().hex
+    timeout = getattr(settings, 'SCRAPE_SINGLE_FLIGHT_TIMEOUT', 120)
+    try:
+        # cache.add only sets missing keys, atomically on Redis and LocMem
+        if cache.add(_lock_key(url), token, timeout):
+            return token
+        return None
+    except Exception as e:
+        logger.error(f"Scrape lock error: {str(e)}")
+        # Without a working cache every caller scrapes on its own
+        return token
+
+
+def release_scrape_lock(url, token, result):
+    """
+    Publish the leader's result to the waiting callers and release the lock.
+    
+    Failed results are shared too, so that followers do not all retry a page
+    that just failed; they are kept only briefly since followers are already waiting.
+    
+    Args:
+        url (str): Tour URL
+        token (str): Token returned by acquire_scrape_lock
+        result (dict or None): Extraction result, None when the leader raised
+    """
+    try:
+        if result is not None:
+            cache.set(_flight_result_key(url, token), result, getattr(settings, 'SCRAPE_SINGLE_FLIGHT_RESULT_TTL', 60))
+        if cache.get(_lock_key(url)) == token:
+            cache.delete(_lock_key(url))
+    except Exception as e:
+        logger.error(f"Scrape lock release error: {str(e)}")
+
+
+def wait_for_scrape_result(url, timeout):
+    """
+    Wait for the worker holding the lock of a URL to publish its result.
+    
+    Args:
+        url (str): Tour URL
+        timeout (float): Maximum number of seconds to wait
+    
+    Returns:
+        dict or None: The leader's result marked with coalesced=True, or None when the
+        lock was released without a result (the leader failed) or the wait timed out
+    """
+    poll_interval = getattr(settings, 'SCRAPE_SINGLE_FLIGHT_POLL_INTERVAL', 0.5)
+    deadline = time.monotonic() + timeout
+    try:
+        token = cache.get(_lock_key(url))
+        while token is not None:
+            result = cache.get(_flight_result_key(url, token))
+            if result is not None:
+                logger.info(f"Shared the result of a concurrent scrape for URL: {url}")
+                return {**result, 'coalesced': True}
+            if cache.get(_lock_key(url)) != token or time.monotonic() >= deadline:
+                # The leader may have published just before releasing the lock
+                result = cache.get(_flight_result_key(url, token))
+                return {**result, 'coalesced': True} if result is not None else None
+            time.sleep(min(poll_interval, max(0.0, deadline - time.monotonic())))
+    except Exception as e:
+        logger.error(f"Scrape lock wait error: {str(e)}")
+    return None
@@ -0,0 +1,76 @@
+import queue
+import logging
+import threading
+from .scraping_service import TourScrapingService
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Sentinel put on the event queue once the extraction has finished
+_DONE = object()
+
+
+def iter_extraction_events(url, force_refresh=False, keepalive_interval=15):
+    """
+    Run the tour extraction in a background thread and yield its progress.
+    
+    Events are (event, payload) tuples:
+        stage    - a pipeline stage started, completed, failed or was skipped
+        preview  - cheap deterministic fields (title, summary, duration, contact)
+        result   - the final extraction result
+        keepalive - nothing happened for keepalive_interval seconds (payload is None)
+    
+    The preview comes from the first page the pipeline fetches itself (the
+    local markdown path, or the manual fallback), so the form can be filled
+    in long before Firecrawl and the LLM answer without fetching the page twice.
+    
+    Args:
+        url (str): The URL to scrape
+        force_refresh (bool): Ignore cached results and scrape the page again
+        keepalive_interval (int): Seconds between keepalive events
+    
+    Yields:
+        tuple: (event, payload)
+    """
+    events = queue.Queue()
+    preview_sent = threading.Event()
+    
+    def send_preview(data):
+        if data and not preview_sent.is_set():
+            preview_sent.set()
+            events.put(('preview', data))
+    
+    def on_stage(stage, state, details):
+        payload = {'stage': stage, 'state': state, **details}
+        data = payload.pop('data', None)
+        events.put(('stage', payload))
+        if stage in ('preview', 'basic_info') and state == 'completed':
+            send_preview(data)
+    
+    def run_extraction():
+        try:
+            scraping_service = TourScrapingService(stage_callback=on_stage)
+            result = scraping_service.extract_tour_details(url, force_refresh=force_refresh)
+        except Exception as e:
+            logger.error(f"Streaming extraction error for URL {url}: {str(e)}")
+            result = {
+                'success': False,
+                'error': f'Failed to scrape URL: {str(e)}',
+                'data': {}
+            }
+        # A preview arriving after the result is of no use to the client
+        preview_sent.set()
+        events.put(('result', result))
+        events.put(_DONE)
+    
+    threading.Thread(target=run_extraction, daemon=True).start()
+    
+    while True:
+        try:
+            item = events.get(timeout=keepalive_interval)
+        except queue.Empty:
+            yield 'keepalive', None
+            continue
+        if item is _DONE:
+            break
+        yield item
@@ -1,16 +1,36 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import re
 import json
 from urllib.parse import urlparse
 import logging
-from typing import Dict, Any, Optional
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Callable
 from django.conf import settings
-from firecrawl import FirecrawlApp
 from pydantic import BaseModel
+from .scraping_cache import (
+    get_cached_result, cache_result, get_cached_content_data, cache_content_data,
+    acquire_scrape_lock, release_scrape_lock, wait_for_scrape_result
+)
+from .circuit_breaker import CircuitBreaker
+from .html_markdown import is_static_page, parse_page, page_markdown
+from .content_chunking import select_relevant_content, signals_for_fields
+from .llm_cache import get_llm_response_cache
+from .page_signals import PageSignals, element_value
+from .field_extractors import (
+    extract_fields, extract_duration, confident_values, is_confident, match_known_destinations,
+    first_number, PHONE_PATTERN, EMAIL_PATTERN
+)
+from .page_fetcher import fetch_page, FetchedPage
+from .http_clients import get_http_session, get_firecrawl_app, get_openai_client, get_gemini_model
+from .scrape_telemetry import ScrapeRunRecorder, record_scrape_run
 
 logger = logging.getLogger(__name__)
 
+OPENAI_MODEL = 'gpt-4o-mini'
+GEMINI_MODEL = 'gemini-2.0-flash-exp'
+
 class TourExtractionSchema(BaseModel):
     """Schema for extracting tour details from web pages."""
     tourLink: str
@@ -41,147 +61,697 @@ class TourExtractionSchema(BaseModel):
     discountDetails: str = ""
     promotionalTagline: str = ""
 
+# schema.org types that describe a bookable tour, most specific first
+STRUCTURED_DATA_TOUR_TYPES = ('TouristTrip', 'Trip', 'Product', 'Event')
+STRUCTURED_DATA_OFFER_TYPES = ('Offer', 'AggregateOffer')
+
+# Fields that decide whether structured data alone is good enough to skip the LLM
+STRUCTURED_DATA_KEY_FIELDS = ('title', 'destinations', 'durationDays', 'startingPrice', 'summary', 'providerName')
+
+MONTH_NAMES = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+
+# Fields worth a targeted follow-up prompt when empty; booleans are left out since False is a valid answer
+GAP_FILL_FIELDS = (
+    'title', 'destinations', 'durationDays', 'durationNights', 'summary', 'highlights', 'startingPrice',
+    'departureMonths', 'departureCities', 'tourStartLocation', 'tourDropLocation', 'contactLink'
+)
+
+# Expected JSON value format of every field in the AI extraction prompt
+EXTRACTION_FIELD_FORMATS = {
+    'tourLink': '"{url}"',
+    'title': '"Tour title"',
+    'destinations': '["destination1", "destination2"]',
+    'durationDays': 'number',
+    'durationNights': 'number',
+    'tourType': '"FIT|Group|Customizable"',
+    'providerName': '"Provider name"',
+    'contactLink': '"Contact URL or empty string"',
+    'tourStatus': '"Live|Draft|Coming Soon"',
+    'categories': '["category1", "category2"]',
+    'tags': '["tag1", "tag2"]',
+    'summary': '"Brief tour description"',
+    'highlights': '["highlight1", "highlight2"]',
+    'startingPrice': 'price_in_decimal',
+    'priceType': '"Starting From|Fixed"',
+    'departureCities': '["city1", "city2"]',
+    'tourStartLocation': '"Starting location"',
+    'tourDropLocation': '"Ending location"',
+    'departureMonths': '["January", "February"]',
+    'includesFlights': 'true/false',
+    'includesHotels': 'true/false',
+    'includesMeals': 'true/false',
+    'includesTransfers': 'true/false',
+    'visaSupport': 'true/false',
+    'offersType': '["Early Bird Offer", "Group Discount"]',
+    'discountDetails': '"Discount description"',
+    'promotionalTagline': '"Promotional message"',
+}
+
+class ExtractionCancelled(Exception):
+    """Raised in a hedged extraction path before its next paid call once another path has answered."""
+
+
 class TourScrapingService:
     """Service for scraping tour details from URLs."""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, stage_callback: Optional[Callable[[str, str, Dict[str, Any]], None]] = None):
+        # Optional hook called as stage_callback(stage, state, details) while the pipeline runs
+        self.stage_callback = stage_callback
+        # Stage start times and cancel flag, per thread: the hedged paths run concurrently
+        self._path_state = threading.local()
+        # Telemetry of the running extract_tour_details call
+        self.telemetry = None
+    
+    @property
+    def _stage_started(self) -> Dict[str, float]:
+        """Start times of the running stages of the current extraction path."""
+        if not hasattr(self._path_state, 'stage_started'):
+            self._path_state.stage_started = {}
+        return self._path_state.stage_started
+    
+    def _is_cancelled(self) -> bool:
+        """Whether the current extraction path lost the hedged race."""
+        cancelled = getattr(self._path_state, 'cancelled', None)
+        return cancelled is not None and cancelled.is_set()
+    
+    def _check_cancelled(self) -> None:
+        """Stop a losing hedged path before it fetches a page or calls Firecrawl or an LLM."""
+        if self._is_cancelled():
+            raise ExtractionCancelled('Another extraction path already answered')
+    
+    def _run_path(self, cancelled: threading.Event, func: Callable, *args):
+        """Run one hedged extraction path in a worker thread, with its own stage state and cancel flag."""
+        self._path_state.cancelled = cancelled
+        self._path_state.stage_started = {}
+        return func(*args)
+    
+    @property
+    def session(self):
+        """Requests session of the current thread; the hedged paths run in their own threads."""
+        return get_http_session()
+    
+    def _report_stage(self, stage: str, state: str, **details) -> None:
+        """
+        Report progress of a pipeline stage to the stage callback.
+        
+        Args:
+            stage (str): Stage name (single_flight, local_markdown, preview, firecrawl, pattern_extraction, ai_extraction, gap_fill, cleaning, manual_fetch, basic_info, ai_enhancement)
+            state (str): One of started, completed, failed or skipped
+            **details: Extra information for the stage (error, data, ...)
+        """
+        if self._is_cancelled():
+            # A losing path no longer reports progress
+            return
+        now = time.time()
+        if state == 'started':
+            self._stage_started[stage] = now
+        elif stage in self._stage_started:
+            details.setdefault('duration', round(now - self._stage_started.pop(stage), 3))
+        
+        if self.telemetry:
+            self.telemetry.on_stage(stage, state, details)
+        if not self.stage_callback:
+            return
+        try:
+            self.stage_callback(stage, state, details)
+        except Exception as e:
+            # Progress reporting must never break the extraction itself
+            logger.error(f"Stage callback failed for {stage}: {str(e)}")
+    
+    def _fail_open_stages(self, error: str, stages: Optional[tuple] = None) -> None:
+        """Mark stages that were started but never finished as failed (all of them, or only the given ones)."""
+        for stage in list(self._stage_started):
+            if stages is None or stage in stages:
+                self._report_stage(stage, 'failed', error=error)
     
-    def extract_tour_details(self, url: str) -> Dict[str, Any]:
+    def extract_tour_details(self, url: str, force_refresh: bool = False,
+                             fetched_page: Optional[FetchedPage] = None) -> Dict[str, Any]:
         """
-        Extract tour details from a given URL using Firecrawl.
+        Extract tour details from a given URL, using the scrape result cache.
+        
+        Every call is recorded as a ScrapeRun (path taken, stage durations, tokens,
+        bytes fetched), buffered and written in batches off the request path.
         
         Args:
             url (str): The URL to scrape
+            force_refresh (bool): Ignore cached results and scrape the page again
+            fetched_page (Optional[FetchedPage]): Page the caller already downloaded, used
+                instead of fetching it again by the local markdown and manual paths
             
         Returns:
             Dict[str, Any]: Extracted tour details
         """
+        self.telemetry = ScrapeRunRecorder(url)
+        result = None
         try:
-            logger.info(f"Starting tour extraction for URL: {url}")
+            result = self._extract_with_single_flight(url, force_refresh, fetched_page)
+            return result
+        finally:
+            record_scrape_run(self.telemetry.finish(result))
+    
+    def _extract_with_single_flight(self, url: str, force_refresh: bool = False,
+                                    fetched_page: Optional[FetchedPage] = None) -> Dict[str, Any]:
+        """Extract tour details from the result cache, a concurrent scrape of the same URL, or a new scrape."""
+        if not force_refresh:
+            cached_result = get_cached_result(url)
+            if cached_result:
+                self._report_stage('cache', 'completed', hit=True)
+                self.telemetry.set_path('cache')
+                return cached_result
+        
+        if not getattr(settings, 'SCRAPE_SINGLE_FLIGHT_ENABLED', True):
+            return self._extract_and_cache(url, force_refresh, fetched_page)
+        
+        # Single flight: one caller scrapes a URL, concurrent callers wait for its result
+        deadline = time.monotonic() + getattr(settings, 'SCRAPE_SINGLE_FLIGHT_TIMEOUT', 120)
+        while time.monotonic() < deadline:
+            token = acquire_scrape_lock(url)
+            if token:
+                result = None
+                try:
+                    result = self._extract_and_cache(url, force_refresh, fetched_page)
+                    return result
+                finally:
+                    release_scrape_lock(url, token, result)
+            
+            self._report_stage('single_flight', 'started')
+            result = wait_for_scrape_result(url, deadline - time.monotonic())
+            if result is not None:
+                self._report_stage('single_flight', 'completed')
+                return result
+            # The leader failed without a result: try to take over
+            self._report_stage('single_flight', 'failed', error='Concurrent scrape did not finish')
+        
+        logger.warning(f"Timed out waiting for a concurrent scrape, scraping anyway: {url}")
+        return self._extract_and_cache(url, force_refresh, fetched_page)
+    
+    def _extract_and_cache(self, url: str, force_refresh: bool = False,
+                           fetched_page: Optional[FetchedPage] = None) -> Dict[str, Any]:
+        """Extract tour details and cache a successful result."""
+        result = self._extract_tour_details_uncached(url, force_refresh, fetched_page)
+        cache_result(url, result)
+        return result
+    
+    def _extract_tour_details_uncached(self, url: str, force_refresh: bool = False,
+                                       fetched_page: Optional[FetchedPage] = None) -> Dict[str, Any]:
+        """
+        Extract tour details from a given URL using Firecrawl, with the manual scraping fallback.
+        
+        Server-rendered pages are converted to markdown locally first (SCRAPE_LOCAL_MARKDOWN_ENABLED)
+        and only go through Firecrawl when that does not give a complete result. The
+        manual fallback works on the page the local path already fetched, and is not
+        run when the local path already extracted it.
+        
+        With SCRAPE_HEDGE_ENABLED the paths overlap instead of running one after the
+        other (see _hedged_extraction).
+        
+        Args:
+            url (str): The URL to scrape
+            force_refresh (bool): Skip the content-hash cache for the fetched page
+            fetched_page (Optional[FetchedPage]): Page the caller already downloaded
             
-            # Get Firecrawl API key
-            firecrawl_api_key = getattr(settings, 'FIRECRAWL_API_KEY', None)
-            if not firecrawl_api_key:
-                logger.warning("No Firecrawl API key found, falling back to manual scraping")
-                return self._manual_scraping_fallback(url)
+        Returns:
+            Dict[str, Any]: Extracted tour details
+        """
+        logger.info(f"Starting tour extraction for URL: {url}")
+        
+        # Get Firecrawl API key
+        firecrawl_api_key = getattr(settings, 'FIRECRAWL_API_KEY', None)
+        if not firecrawl_api_key:
+            logger.warning("No Firecrawl API key found, falling back to manual scraping")
+            self._report_stage('firecrawl', 'skipped', reason='No Firecrawl API key configured')
+            self._set_telemetry_path('manual_fallback')
+            return self._manual_scraping_fallback(url, force_refresh, fetched_page)
+        
+        if getattr(settings, 'SCRAPE_HEDGE_ENABLED', True):
+            return self._hedged_extraction(url, firecrawl_api_key, force_refresh, fetched_page)
+        
+        # Server-rendered pages do not need Firecrawl to turn them into markdown
+        local_result, page = None, None
+        if getattr(settings, 'SCRAPE_LOCAL_MARKDOWN_ENABLED', True):
+            local_result, fetched_page, page = self._extract_with_local_markdown(url, force_refresh, fetched_page)
+            if self._is_valid_result(local_result):
+                self._set_telemetry_path('local_markdown')
+                return local_result
+        
+        result = self._extract_with_firecrawl(url, firecrawl_api_key, force_refresh)
+        if result:
+            self._set_telemetry_path('firecrawl')
+            return result
+        if local_result:
+            # The page already went through the LLM locally
+            self._set_telemetry_path('local_markdown')
+            return local_result
+        self._set_telemetry_path('manual_fallback')
+        return self._manual_scraping_fallback(url, force_refresh, fetched_page, page)
+    
+    def _hedged_extraction(self, url: str, firecrawl_api_key: str, force_refresh: bool = False,
+                           fetched_page: Optional[FetchedPage] = None) -> Dict[str, Any]:
+        """
+        Race the local markdown, Firecrawl and manual fallback paths within one deadline.
+        
+        The local markdown path (SCRAPE_LOCAL_MARKDOWN_ENABLED) starts first.
+        Firecrawl starts once it finished without a complete result, or when it
+        has not finished within SCRAPE_HEDGE_DELAY seconds. The manual fallback
+        starts when Firecrawl fails or has not answered within SCRAPE_HEDGE_DELAY
+        seconds, on the page the local path fetched; it is skipped when the local
+        path already extracted that page. A fetched_page from the caller is
+        used by both instead of a new download. The first result that passes
+        _is_valid_result wins; the other paths are cancelled, so they make no
+        further paid calls and report no more stages. Nothing is waited for
+        beyond SCRAPE_EXTRACTION_DEADLINE seconds.
+        """
+        hedge_delay = getattr(settings, 'SCRAPE_HEDGE_DELAY', 8)
+        now = time.monotonic()
+        deadline = now + getattr(settings, 'SCRAPE_EXTRACTION_DEADLINE', 90)
+        local_enabled = getattr(settings, 'SCRAPE_LOCAL_MARKDOWN_ENABLED', True)
+        
+        cancelled = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=3)
+        futures = {}
+        
+        def submit(path, func, *args):
+            futures[executor.submit(self._run_path, cancelled, func, *args)] = path
+        
+        # Firecrawl starts at firecrawl_at unless the local path finishes first; fallback_at is set once it started
+        firecrawl_at = now + hedge_delay if local_enabled else now
+        fallback_at = None
+        fallback_started = False
+        local_done = not local_enabled
+        local_result = None
+        local_page = (fetched_page, None)
+        best_result = None
+        last_result = None
+        best_path = last_path = ''
+        
+        if local_enabled:
+            submit('local_markdown', self._extract_with_local_markdown, url, force_refresh, fetched_page)
+        
+        try:
+            while True:
+                now = time.monotonic()
+                if fallback_at is None and (local_done or now >= firecrawl_at):
+                    submit('firecrawl', self._extract_with_firecrawl, url, firecrawl_api_key, force_refresh)
+                    fallback_at = now + hedge_delay
+                
+                # The fallback waits for the local fetch, so the page is only downloaded once
+                if not fallback_started and local_done and fallback_at is not None and now >= fallback_at:
+                    fallback_started = True
+                    if local_result:
+                        logger.info("Page already extracted from local markdown, not starting the manual fallback")
+                    else:
+                        logger.info("Starting manual scraping fallback in parallel with Firecrawl")
+                        submit('manual_fallback', self._manual_scraping_fallback, url, force_refresh, *local_page)
+                
+                if not futures or now >= deadline:
+                    break
+                wake_at = deadline
+                if fallback_at is None:
+                    wake_at = min(wake_at, firecrawl_at)
+                elif not fallback_started and local_done:
+                    wake_at = min(wake_at, fallback_at)
+                done, _ = wait(futures, timeout=max(0, wake_at - now), return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    path = futures.pop(future)
+                    result = future.result()
+                    if path == 'local_markdown':
+                        result, fetched_page, page = result
+                        local_done, local_result, local_page = True, result, (fetched_page, page)
+                    elif path == 'firecrawl':
+                        # Firecrawl failed or gave an incomplete result: no need to wait for the hedge delay
+                        fallback_at = min(fallback_at, time.monotonic())
+                    if self._is_valid_result(result):
+                        logger.info(f"Hedged extraction won by the {path} path")
+                        self._set_telemetry_path(path)
+                        return result
+                    if result:
+                        last_result, last_path = result, path
+                        if result.get('success') and best_result is None:
+                            best_result, best_path = result, path
+        finally:
+            # Threads cannot be killed: the losing paths stop before their next fetch, Firecrawl or LLM call
+            cancelled.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if best_result:
+            self._set_telemetry_path(best_path)
+            return best_result
+        self._set_telemetry_path(last_path)
+        if futures:
+            logger.error(f"Tour extraction deadline exceeded for URL: {url}")
+            return {
+                'success': False,
+                'error': 'Timed out while extracting tour details',
+                'data': {}
+            }
+        return last_result or {
+            'success': False,
+            'error': 'Failed to extract tour details',
+            'data': {}
+        }
+    
+    def _set_telemetry_path(self, path: str) -> None:
+        """Record the extraction path whose result is returned."""
+        if self.telemetry:
+            self.telemetry.set_path(path)
+    
+    def _is_valid_result(self, result: Optional[Dict[str, Any]]) -> bool:
+        """Check that an extraction result is complete enough to return without waiting for another path."""
+        if not result or not result.get('success'):
+            return False
+        data = result.get('data') or {}
+        if data.get('title') in (None, '', 'Tour Package'):
+            return False
+        return bool(data.get('destinations') or data.get('durationDays'))
+    
+    def _extract_with_firecrawl(self, url: str, firecrawl_api_key: str, force_refresh: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Extract tour details using Firecrawl markdown and AI.
+        
+        Args:
+            url (str): The URL to scrape
+            firecrawl_api_key (str): Firecrawl API key
+            force_refresh (bool): Skip the content-hash cache for the fetched page
             
+        Returns:
+            Optional[Dict[str, Any]]: Extracted tour details, or None if this path failed
+        """
+        breaker = CircuitBreaker('firecrawl')
+        if not breaker.allow_request():
+            logger.warning("Circuit breaker open for Firecrawl, skipping to manual scraping")
+            self._report_stage('firecrawl', 'skipped', reason='Circuit breaker open')
+            return None
+        
+        try:
             # Initialize Firecrawl
             logger.info("Initializing Firecrawl...")
-            app = FirecrawlApp(api_key=firecrawl_api_key)
+            self._report_stage('firecrawl', 'started')
+            app = get_firecrawl_app(firecrawl_api_key)
             
-            # Scrape with Firecrawl
+            # Scrape with Firecrawl, never waiting longer than the overall extraction deadline
+            self._check_cancelled()
             logger.info("Scraping with Firecrawl...")
-            scrape_result = app.scrape_url(
-                url,
-                formats=["markdown"],
-                only_main_content=False,
-                timeout=120000
-            )
+            deadline_ms = getattr(settings, 'SCRAPE_EXTRACTION_DEADLINE', 90) * 1000
+            start_time = time.monotonic()
+            try:
+                scrape_result = app.scrape_url(
+                    url,
+                    formats=["markdown", "rawHtml"],
+                    only_main_content=False,
+                    timeout=min(120000, deadline_ms)
+                )
+            except Exception as e:
+                breaker.record_failure(time.monotonic() - start_time, e)
+                raise
             
             if not scrape_result.success:
                 logger.error(f"Firecrawl scraping failed: {scrape_result.error}")
-                return self._manual_scraping_fallback(url)
+                breaker.record_failure(time.monotonic() - start_time, scrape_result.error)
+                self._report_stage('firecrawl', 'failed', error=str(scrape_result.error))
+                return None
+            breaker.record_success(time.monotonic() - start_time)
+            if self.telemetry:
+                self.telemetry.add_bytes(sum(
+                    len(content.encode('utf-8'))
+                    for content in (getattr(scrape_result, 'markdown', None), getattr(scrape_result, 'rawHtml', None))
+                    if content
+                ))
             
             # Extract the markdown data
             if hasattr(scrape_result, 'markdown') and scrape_result.markdown:
                 logger.info("Successfully extracted markdown data with Firecrawl")
+                self._report_stage('firecrawl', 'completed')
                 markdown_content = scrape_result.markdown
                 
-                # Use AI to extract structured data from markdown
-                extracted_data = self._extract_from_markdown_with_ai(markdown_content, url)
+                # JSON-LD / OpenGraph fast path: only ask the LLM for what the markup does not provide
+                structured_data = {}
+                raw_html = getattr(scrape_result, 'rawHtml', None)
+                if raw_html:
+                    structured_soup = BeautifulSoup(raw_html, 'html.parser', parse_only=SoupStrainer(['script', 'meta']))
+                    structured_data = self._extract_structured_data(structured_soup, url)
                 
-                if extracted_data:
-                    # Clean and validate the data
-                    cleaned_data = self._clean_extracted_data(extracted_data)
-                    
-                    return {
-                        'success': True,
-                        'data': cleaned_data,
-                        'message': 'Tour details extracted successfully using Firecrawl + AI'
-                    }
-                else:
-                    logger.warning("AI extraction failed, falling back to manual scraping")
-                    return self._manual_scraping_fallback(url)
+                return self._extract_from_markdown(markdown_content, url, structured_data, force_refresh, source='Firecrawl')
             else:
                 logger.warning("No markdown data found in Firecrawl response, falling back to manual scraping")
-                return self._manual_scraping_fallback(url)
+                self._report_stage('firecrawl', 'failed', error='No markdown data in Firecrawl response')
+                return None
                 
         except Exception as e:
             logger.error(f"Error in Firecrawl extraction: {str(e)}")
-            return self._manual_scraping_fallback(url)
+            self._fail_open_stages(str(e), stages=('firecrawl', 'ai_extraction'))
+            return None
+    
+    def _extract_from_markdown(self, markdown_content: str, url: str, structured_data: Dict[str, Any],
+                               force_refresh: bool = False, source: str = 'Firecrawl') -> Optional[Dict[str, Any]]:
+        """
+        Turn page markdown into tour details: content cache, structured data fast path, AI extraction and cleaning.
+        
+        Args:
+            markdown_content (str): Page content as markdown
+            url (str): The URL being scraped
+            structured_data (Dict[str, Any]): Fields from JSON-LD/OpenGraph markup
+            force_refresh (bool): Skip the content-hash cache
+            source (str): Where the markdown came from, for the result message
+            
+        Returns:
+            Optional[Dict[str, Any]]: Extracted tour details, or None if the AI extraction failed
+        """
+        message = f'Tour details extracted successfully using {source} + AI'
+        
+        # Unchanged page content: reuse the earlier extraction and skip the LLM
+        cached_data = None if force_refresh else get_cached_content_data(markdown_content)
+        if cached_data:
+            self._report_stage('cache', 'completed', hit=True, key='content')
+            return {
+                'success': True,
+                'data': {**cached_data, 'tourLink': url},
+                'message': message
+            }
+        
+        known_data, patterns_confident = self._extract_with_patterns(markdown_content, structured_data)
+        if self._structured_data_coverage(structured_data) >= getattr(settings, 'SCRAPE_STRUCTURED_DATA_MIN_COVERAGE', 0.8):
+            logger.info("Structured data covers the key fields, skipping AI extraction")
+            self._report_stage('ai_extraction', 'skipped', reason='Structured data coverage')
+            extracted_data = known_data
+            ai_extracted = False
+        elif patterns_confident:
+            logger.info("Pattern extraction covers the required fields, skipping AI extraction")
+            self._report_stage('ai_extraction', 'skipped', reason='Pattern extraction confidence')
+            extracted_data = known_data
+            ai_extracted = False
+        else:
+            # Use AI to extract structured data from markdown
+            self._report_stage('ai_extraction', 'started')
+            extracted_data = self._extract_from_markdown_with_ai(markdown_content, url, known_data)
+            ai_extracted = True
+            if extracted_data:
+                self._report_stage('ai_extraction', 'completed')
+                extracted_data = {**extracted_data, **known_data}
+        
+        if not extracted_data:
+            logger.warning(f"AI extraction of {source} markdown failed")
+            self._report_stage('ai_extraction', 'failed', error='AI extraction returned no data')
+            return None
+        
+        # Clean and validate the data
+        self._report_stage('cleaning', 'started')
+        cleaned_data = self._clean_extracted_data(extracted_data)
+        self._report_stage('cleaning', 'completed')
+        if ai_extracted:
+            cleaned_data = self.fill_missing_fields(cleaned_data, markdown_content, url)
+        cache_content_data(markdown_content, cleaned_data)
+        
+        return {
+            'success': True,
+            'data': cleaned_data,
+            'message': message
+        }
     
-    def _extract_from_markdown_with_ai(self, markdown_content: str, url: str) -> Dict[str, Any]:
-        """Extract structured tour data from markdown content using AI."""
+    def _extract_with_local_markdown(self, url: str, force_refresh: bool = False,
+                                     fetched_page: Optional[FetchedPage] = None) -> tuple:
+        """
+        Extract tour details from locally converted markdown, without calling Firecrawl.
+        
+        Only used for server-rendered pages (see is_static_page); pages that need
+        JavaScript rendering are left to Firecrawl. The fetched page is returned
+        as well, so the manual fallback does not download and parse it again.
+        
+        Args:
+            url (str): The URL to scrape
+            force_refresh (bool): Skip the content-hash cache for the fetched page
+            fetched_page (Optional[FetchedPage]): Page the caller already downloaded
+            
+        Returns:
+            tuple: (extracted tour details or None if the page is not static or this path failed,
+                FetchedPage or None, PageSignals or None)
+        """
+        page = None
         try:
-            logger.info("Extracting structured data from markdown using AI...")
+            self._report_stage('local_markdown', 'started')
+            if fetched_page is None:
+                fetched_page = self._fetch_page(url)
+            page = PageSignals.from_html(fetched_page.content, getattr(settings, 'SCRAPE_PAGE_TEXT_MAX_CHARS', 100000))
+            self._report_preview(page, url)
+            soup = parse_page(fetched_page.content)
+            
+            if not is_static_page(soup, getattr(settings, 'SCRAPE_LOCAL_MARKDOWN_MIN_TEXT', 1500)):
+                logger.info("Page needs JavaScript rendering, using Firecrawl")
+                self._report_stage('local_markdown', 'skipped', reason='Page is not server-rendered')
+                return None, fetched_page, page
+            
+            # Structured data first: main content extraction removes the script tags
+            structured_data = self._extract_structured_data(soup, url)
+            markdown_content = page_markdown(soup, url)
+            self._report_stage('local_markdown', 'completed', characters=len(markdown_content))
+            
+            result = self._extract_from_markdown(markdown_content, url, structured_data, force_refresh, source='local markdown')
+            return result, fetched_page, page
             
-            # Get AI API key
-            openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
-            gemini_api_key = getattr(settings, 'GEMINI_API_KEY', None)
+        except Exception as e:
+            logger.error(f"Error in local markdown extraction: {str(e)}")
+            self._fail_open_stages(str(e), stages=('local_markdown', 'ai_extraction', 'cleaning'))
+            return None, fetched_page, page
+    
+    def _extract_with_patterns(self, text: str, structured_data: Dict[str, Any], title: Optional[str] = None) -> tuple:
+        """
+        Run the deterministic extractor bank (see field_extractors) over the page.
+        
+        Args:
+            text (str): Page markdown or text
+            structured_data (Dict[str, Any]): Fields from JSON-LD/OpenGraph, which win over pattern matches
+            title (Optional[str]): Page title when already known; otherwise the markdown H1 is used
             
-            if openai_api_key:
-                return self._extract_with_openai(markdown_content, url, openai_api_key)
-            elif gemini_api_key:
-                return self._extract_with_gemini(markdown_content, url, gemini_api_key)
-            else:
+        Returns:
+            tuple: (structured data plus confident pattern values, whether the required fields are confident enough to skip the LLM)
+        """
+        if not getattr(settings, 'SCRAPE_PATTERN_EXTRACTION_ENABLED', True):
+            return dict(structured_data), False
+        
+        min_confidence = getattr(settings, 'SCRAPE_PATTERN_MIN_CONFIDENCE', 0.85)
+        matches = extract_fields(text, title)
+        self._report_stage('pattern_extraction', 'completed', confidence={field: match.confidence for field, match in matches.items()})
+        known_data = {**confident_values(matches, min_confidence), **structured_data}
+        return known_data, is_confident(matches, min_confidence, structured_data)
+    
+    def _ai_providers(self) -> list:
+        """Get the configured AI providers in order of preference as (name, api_key) pairs."""
+        providers = []
+        openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
+        gemini_api_key = getattr(settings, 'GEMINI_API_KEY', None)
+        if openai_api_key:
+            providers.append(('openai', openai_api_key))
+        if gemini_api_key:
+            providers.append(('gemini', gemini_api_key))
+        return providers
+    
+    def _call_provider(self, provider: str, func: Callable, *args) -> Optional[str]:
+        """
+        Call a provider completion through the provider's circuit breaker.
+        
+        Only transport and API errors (exceptions raised by the completion) count as
+        provider failures. The caller parses the completion outside the breaker, so an
+        answer that is not valid JSON does not open it.
+        
+        Args:
+            provider (str): Provider name (openai or gemini)
+            func (Callable): Completion method (_openai_completion or _gemini_completion)
+            *args: Arguments for the completion method
+            
+        Returns:
+            Optional[str]: Completion text, or None if the call failed or the breaker is open
+            
+        Raises:
+            ExtractionCancelled: When the current hedged path already lost
+        """
+        self._check_cancelled()
+        breaker = CircuitBreaker(provider)
+        if not breaker.allow_request():
+            logger.warning(f"Circuit breaker open for {provider}, skipping provider")
+            return None
+        
+        start_time = time.monotonic()
+        try:
+            ai_response = func(*args)
+        except Exception as e:
+            logger.error(f"{provider} call failed: {str(e)}")
+            breaker.record_failure(time.monotonic() - start_time, e)
+            return None
+        breaker.record_success(time.monotonic() - start_time)
+        if self.telemetry:
+            self.telemetry.set_llm_provider(provider)
+        return ai_response
+    
+    def _extract_from_markdown_with_ai(self, markdown_content: str, url: str, known_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Extract structured tour data from markdown content using AI, trying each provider in turn.
+        
+        Fields in known_data (e.g. from JSON-LD) are not requested from the LLM.
+        """
+        try:
+            logger.info("Extracting structured data from markdown using AI...")
+            
+            providers = self._ai_providers()
+            if not providers:
                 logger.warning("No AI API keys available for markdown extraction")
                 return None
+            
+            # Spend the prompt on pricing/itinerary sections rather than the top of the page
+            markdown_content = select_relevant_content(markdown_content, getattr(settings, 'SCRAPE_PROMPT_TOKEN_BUDGET', 1000))
+            
+            extractors = {
+                'openai': self._extract_with_openai,
+                'gemini': self._extract_with_gemini,
+            }
+            for provider, api_key in providers:
+                extracted_data = extractors[provider](markdown_content, url, api_key, known_data)
+                if extracted_data:
+                    return extracted_data
+            return None
                 
         except Exception as e:
             logger.error(f"Error extracting from markdown with AI: {str(e)}")
             return None
     
-    def _extract_with_openai(self, markdown_content: str, url: str, api_key: str) -> Dict[str, Any]:
-        """Extract tour data from markdown using OpenAI."""
-        try:
-            import openai
-            # Create a fresh OpenAI client without any session interference
-            client = openai.OpenAI(
-                api_key=api_key,
-                # Explicitly avoid any session configuration
-            )
+    def _build_extraction_prompt(self, markdown_content: str, url: str, known_data: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build the markdown extraction prompt.
+        
+        Args:
+            markdown_content (str): Page content as markdown, already trimmed to the prompt token budget
+            url (str): The URL being scraped
+            known_data (Optional[Dict[str, Any]]): Fields already extracted without AI (structured data, patterns); these are left out of the requested JSON
             
-            prompt = f"""
+        Returns:
+            str: Prompt asking for the remaining fields as a JSON object
+        """
+        known_data = {field: value for field, value in (known_data or {}).items() if value}
+        json_fields = ',\n'.join(
+            f'                "{field}": {value_format.replace("{url}", url)}'
+            for field, value_format in EXTRACTION_FIELD_FORMATS.items()
+            if field not in known_data
+        )
+        known_section = ''
+        if known_data:
+            known_section = f"""
+            These fields are already known from the page's structured data and text, do NOT return them:
+            {json.dumps(known_data)}
+            """
+        
+        return f"""
             Extract tour details from the following markdown content and return them as a JSON object.
             
             Markdown content:
-            {markdown_content[:4000]}
+            {markdown_content}
             
             URL: {url}
-            
+            {known_section}
             Please extract and return the following information in JSON format:
             {{
-                "tourLink": "{url}",
-                "title": "Tour title",
-                "destinations": ["destination1", "destination2"],
-                "durationDays": number,
-                "durationNights": number,
-                "tourType": "FIT|Group|Customizable",
-                "providerName": "Provider name",
-                "contactLink": "Contact URL or empty string",
-                "tourStatus": "Live|Draft|Coming Soon",
-                "categories": ["category1", "category2"],
-                "tags": ["tag1", "tag2"],
-                "summary": "Brief tour description",
-                "highlights": ["highlight1", "highlight2"],
-                "startingPrice": price_in_decimal,
-                "priceType": "Starting From|Fixed",
-                "departureCities": ["city1", "city2"],
-                "tourStartLocation": "Starting location",
-                "tourDropLocation": "Ending location",
-                "departureMonths": ["January", "February"],
-                "includesFlights": true/false,
-                "includesHotels": true/false,
-                "includesMeals": true/false,
-                "includesTransfers": true/false,
-                "visaSupport": true/false,
-                "offersType": ["Early Bird Offer", "Group Discount"],
-                "discountDetails": "Discount description",
-                "promotionalTagline": "Promotional message"
+{json_fields}
             }}
             
             CRITICAL INSTRUCTIONS FOR DURATION EXTRACTION:
@@ -207,147 +777,333 @@ class TourScrapingService:
             - Ensure all duration values are integers
             - For price, extract numeric values only (e.g., 25000.00)
             """
-            
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1500,
-                temperature=0.1
-            )
-            
-            ai_response = response.choices[0].message.content.strip()
-            
-            # Try to parse JSON response
-            try:
-                import json
-                extracted_data = json.loads(ai_response)
-                logger.info("Successfully extracted data with OpenAI")
-                return extracted_data
-            except json.JSONDecodeError:
-                logger.error("Failed to parse OpenAI JSON response")
-                return None
-                
-        except Exception as e:
-            logger.error(f"OpenAI extraction failed: {str(e)}")
-            return None
     
-    def _extract_with_gemini(self, markdown_content: str, url: str, api_key: str) -> Dict[str, Any]:
-        """Extract tour data from markdown using Gemini."""
+    def _openai_completion(self, api_key: str, prompt: str, max_tokens: int) -> str:
+        """Get an OpenAI completion for a prompt, from the LLM response cache when possible."""
+        llm_cache = get_llm_response_cache()
+        cached_response = llm_cache.get('openai', OPENAI_MODEL, prompt) if llm_cache else None
+        if cached_response is not None:
+            logger.info("LLM cache hit for OpenAI prompt")
+            self._record_llm_call('openai', cached=True)
+            return cached_response
+        
+        client = get_openai_client(api_key)
+        response = client.chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.1
+        )
+        usage = getattr(response, 'usage', None)
+        self._record_llm_call('openai', getattr(usage, 'prompt_tokens', 0), getattr(usage, 'completion_tokens', 0))
+        ai_response = response.choices[0].message.content.strip()
+        self._cache_completion(llm_cache, 'openai', OPENAI_MODEL, prompt, ai_response)
+        return ai_response
+    
+    def _gemini_completion(self, api_key: str, prompt: str) -> str:
+        """Get a Gemini completion for a prompt, from the LLM response cache when possible."""
+        llm_cache = get_llm_response_cache()
+        cached_response = llm_cache.get('gemini', GEMINI_MODEL, prompt) if llm_cache else None
+        if cached_response is not None:
+            logger.info("LLM cache hit for Gemini prompt")
+            self._record_llm_call('gemini', cached=True)
+            return cached_response
+        
+        # Generate content using Gemini
+        model = get_gemini_model(api_key, GEMINI_MODEL)
+        response = model.generate_content(prompt)
+        usage = getattr(response, 'usage_metadata', None)
+        self._record_llm_call('gemini', getattr(usage, 'prompt_token_count', 0), getattr(usage, 'candidates_token_count', 0))
+        ai_response = response.text.strip()
+        self._cache_completion(llm_cache, 'gemini', GEMINI_MODEL, prompt, ai_response)
+        return ai_response
+    
+    def _record_llm_call(self, provider: str, prompt_tokens: int = 0, completion_tokens: int = 0, cached: bool = False) -> None:
+        """Record an LLM completion and its token usage in the scrape telemetry."""
+        if self.telemetry:
+            self.telemetry.add_llm_call(provider, prompt_tokens, completion_tokens, cached)
+    
+    def _cache_completion(self, llm_cache, provider: str, model: str, prompt: str, ai_response: str) -> None:
+        """Cache a completion; only valid JSON is kept since every prompt asks for a JSON object."""
+        if not llm_cache:
+            return
         try:
-            import google.generativeai as genai
-            
-            # Configure Gemini
-            genai.configure(api_key=api_key)
-            
-            prompt = f"""
-            Extract tour details from the following markdown content and return them as a JSON object.
-            
-            Markdown content:
-            {markdown_content[:4000]}
+            json.loads(ai_response)
+        except json.JSONDecodeError:
+            return
+        llm_cache.set(provider, model, prompt, ai_response)
+    
+    def _find_gaps(self, data: Dict[str, Any]) -> list:
+        """
+        Find the GAP_FILL_FIELDS that are empty or look unreliable after cleaning.
+        
+        Args:
+            data (Dict[str, Any]): Cleaned tour data
             
-            URL: {url}
+        Returns:
+            list: Field names to ask the LLM for again
+        """
+        gaps = [field for field in GAP_FILL_FIELDS if not data.get(field)]
+        
+        # A one day tour has no nights
+        if data.get('durationDays') == 1 and 'durationNights' in gaps:
+            gaps.remove('durationNights')
+        
+        # Low-confidence values: placeholder titles, one-line summaries, impossible durations
+        title = data.get('title') or ''
+        if title and (title == 'Tour Package' or len(title) < 5):
+            gaps.append('title')
+        summary = data.get('summary') or ''
+        if summary and len(summary) < 40:
+            gaps.append('summary')
+        days, nights = data.get('durationDays') or 0, data.get('durationNights') or 0
+        if days and nights and not nights <= days <= nights + 1:
+            gaps.extend(['durationDays', 'durationNights'])
+        
+        return list(dict.fromkeys(gaps))
+    
+    def fill_missing_fields(self, data: Dict[str, Any], content: str, url: str) -> Dict[str, Any]:
+        """
+        Re-ask the LLM for just the missing or low-confidence fields of an extraction.
+        
+        Only the page sections that carry signals for those fields are sent, so the
+        follow-up prompt is a fraction of a full extraction.
+        
+        Args:
+            data (Dict[str, Any]): Cleaned tour data
+            content (str): Page content (markdown or plain text)
+            url (str): The URL being scraped
             
-            Please extract and return the following information in JSON format:
+        Returns:
+            Dict[str, Any]: Tour data with the filled fields merged in (unchanged if nothing could be filled)
+        """
+        if not getattr(settings, 'SCRAPE_GAP_FILL_ENABLED', True) or not content:
+            return data
+        gaps = self._find_gaps(data)
+        providers = self._ai_providers()
+        if not gaps or not providers:
+            return data
+        
+        self._report_stage('gap_fill', 'started', fields=gaps)
+        sections = select_relevant_content(content, getattr(settings, 'SCRAPE_GAP_FILL_TOKEN_BUDGET', 400), signals_for_fields(gaps))
+        prompt = self._build_gap_fill_prompt(sections, url, data, gaps)
+        
+        filled = None
+        for provider, api_key in providers:
+            filled = self._complete_json(provider, prompt, api_key)
+            if filled:
+                break
+        if not isinstance(filled, dict):
+            self._report_stage('gap_fill', 'failed', error='AI gap filling returned no data')
+            return data
+        
+        updates = {field: filled[field] for field in gaps if filled.get(field)}
+        self._report_stage('gap_fill', 'completed', filled=list(updates))
+        if not updates:
+            return data
+        logger.info(f"Filled missing fields with AI: {', '.join(updates)}")
+        return self._clean_extracted_data({**data, **updates})
+    
+    def _build_gap_fill_prompt(self, content: str, url: str, data: Dict[str, Any], fields: list) -> str:
+        """Build the follow-up prompt asking only for the given fields."""
+        json_fields = ',\n'.join(
+            f'                "{field}": {EXTRACTION_FIELD_FORMATS[field].replace("{url}", url)}'
+            for field in fields
+        )
+        known_data = {
+            field: data[field] for field in ('title', 'destinations', 'durationDays', 'durationNights')
+            if data.get(field) and field not in fields
+        }
+        
+        return f"""
+            Some details of this tour could not be extracted yet. Using only the page content below,
+            return a JSON object with exactly these fields:
             {{
-                "tourLink": "{url}",
-                "title": "Tour title",
-                "destinations": ["destination1", "destination2"],
-                "durationDays": number,
-                "durationNights": number,
-                "tourType": "FIT|Group|Customizable",
-                "providerName": "Provider name",
-                "contactLink": "Contact URL or empty string",
-                "tourStatus": "Live|Draft|Coming Soon",
-                "categories": ["category1", "category2"],
-                "tags": ["tag1", "tag2"],
-                "summary": "Brief tour description",
-                "highlights": ["highlight1", "highlight2"],
-                "startingPrice": price_in_decimal,
-                "priceType": "Starting From|Fixed",
-                "departureCities": ["city1", "city2"],
-                "tourStartLocation": "Starting location",
-                "tourDropLocation": "Ending location",
-                "departureMonths": ["January", "February"],
-                "includesFlights": true/false,
-                "includesHotels": true/false,
-                "includesMeals": true/false,
-                "includesTransfers": true/false,
-                "visaSupport": true/false,
-                "offersType": ["Early Bird Offer", "Group Discount"],
-                "discountDetails": "Discount description",
-                "promotionalTagline": "Promotional message"
+{json_fields}
             }}
             
-            CRITICAL INSTRUCTIONS FOR DURATION EXTRACTION:
-            - Look for patterns like "X days Y nights", "X days", "Y nights", "X day tour", "Y night tour"
-            - Extract ONLY numeric values for durationDays and durationNights
-            - If you find "X days Y nights", set durationDays = X and durationNights = Y
-            - If you find only "X days" without nights, set durationDays = X and durationNights = X-1
-            - If you find only "Y nights" without days, set durationDays = Y+1 and durationNights = Y
-            - If no duration found, set both to 0
-            - NEVER return non-numeric values for duration fields
+            Already known about the tour (for context only, do NOT return these): {json.dumps(known_data)}
+            URL: {url}
             
-            TOUR TYPE MAPPING:
-            - "FIT" or "FIT Tour" → "FIT"
-            - "Group" or "Group Tour" → "Group"
-            - "Custom" or "Customizable" → "Customizable"
-            - Default: "FIT"
+            Page content (sections relevant to the missing fields):
+            {content}
             
-            IMPORTANT RULES:
-            - For destinations, only include actual city/destination names
-            - For duration, extract numeric values for days and nights
-            - For contactLink, include URLs or contact information
-            - If any information is not available, use empty strings, empty arrays, or 0 for numbers
+            Important:
+            - Return ONLY valid JSON, no additional text
+            - Use empty strings, empty arrays or 0 when the content does not contain the information
             - Ensure all duration values are integers
             - For price, extract numeric values only (e.g., 25000.00)
             """
+    
+    def _complete_json(self, provider: str, prompt: str, api_key: str) -> Optional[Dict[str, Any]]:
+        """Run a prompt on a provider and parse the JSON answer. Returns None on failure."""
+        if provider == 'openai':
+            ai_response = self._call_provider(provider, self._openai_completion, api_key, prompt, 500)
+        else:
+            ai_response = self._call_provider(provider, self._gemini_completion, api_key, prompt)
+        if ai_response is None:
+            return None
+        try:
+            return json.loads(ai_response)
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse {provider} JSON response")
+            return None
+    
+    def _extract_with_openai(self, markdown_content: str, url: str, api_key: str, known_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Extract tour data from markdown using OpenAI. Returns None on failure."""
+        prompt = self._build_extraction_prompt(markdown_content, url, known_data)
+        
+        ai_response = self._call_provider('openai', self._openai_completion, api_key, prompt, 1500)
+        if ai_response is None:
+            return None
+        
+        # Try to parse JSON response
+        try:
+            extracted_data = json.loads(ai_response)
+            logger.info("Successfully extracted data with OpenAI")
+            return extracted_data
+        except json.JSONDecodeError:
+            logger.error("Failed to parse OpenAI JSON response")
+            return None
+    
+    def _extract_with_gemini(self, markdown_content: str, url: str, api_key: str, known_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Extract tour data from markdown using Gemini. Returns None on failure."""
+        prompt = self._build_extraction_prompt(markdown_content, url, known_data)
+        
+        ai_response = self._call_provider('gemini', self._gemini_completion, api_key, prompt)
+        if ai_response is None:
+            return None
+        
+        # Try to parse JSON response
+        try:
+            extracted_data = json.loads(ai_response)
+            logger.info("Successfully extracted data with Gemini")
+            return extracted_data
+        except json.JSONDecodeError:
+            logger.error("Failed to parse Gemini JSON response")
+            return None
+    
+    def _fetch_page(self, url: str, timeout: int = 10) -> FetchedPage:
+        """
+        Download a page for the local extraction paths.
+        
+        The body is streamed and capped at SCRAPE_MAX_PAGE_BYTES, and anything that
+        is not HTML (PDF, video, ...) is rejected before its body is downloaded.
+        
+        Args:
+            url (str): The URL to fetch
+            timeout (int): Request timeout in seconds
             
-            # Generate content using Gemini
-            model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            response = model.generate_content(prompt)
-            
-            ai_response = response.text.strip()
-            
-            # Try to parse JSON response
-            try:
-                import json
-                extracted_data = json.loads(ai_response)
-                logger.info("Successfully extracted data with Gemini")
-                return extracted_data
-            except json.JSONDecodeError:
-                logger.error("Failed to parse Gemini JSON response")
-                return None
-                
+        Returns:
+            FetchedPage: Page content and metadata
+        """
+        self._check_cancelled()
+        fetched_page = fetch_page(self.session, url, timeout=timeout, max_bytes=getattr(settings, 'SCRAPE_MAX_PAGE_BYTES', 5 * 1024 * 1024))
+        if self.telemetry:
+            self.telemetry.add_bytes(len(fetched_page.content))
+        return fetched_page
+    
+    def _report_preview(self, page: PageSignals, url: str) -> None:
+        """
+        Report the cheap deterministic fields of a fetched page as the 'preview' stage.
+        
+        Lets progress listeners pre-fill the tour form from the page the pipeline
+        already fetched, long before Firecrawl and the LLM answer.
+        
+        Args:
+            page (PageSignals): Parsed page
+            url (str): The URL being scraped
+        """
+        if not self.stage_callback:
+            return
+        try:
+            self._report_stage('preview', 'completed', data=self._extract_basic_info(page, url))
         except Exception as e:
-            logger.error(f"Gemini extraction failed: {str(e)}")
-            return None
+            # The preview is best effort only, the extraction goes on
+            logger.warning(f"Preview extraction failed for URL {url}: {str(e)}")
     
-    def _manual_scraping_fallback(self, url: str) -> Dict[str, Any]:
-        """Fallback to manual scraping when Firecrawl is not available."""
+    def _manual_scraping_fallback(self, url: str, force_refresh: bool = False,
+                                  fetched_page: Optional[FetchedPage] = None,
+                                  page: Optional[PageSignals] = None) -> Dict[str, Any]:
+        """
+        Fallback to manual scraping when Firecrawl is not available.
+        
+        Args:
+            url (str): The URL to scrape
+            force_refresh (bool): Skip the content-hash cache for the fetched page
+            fetched_page (Optional[FetchedPage]): Page already downloaded by the local markdown path or the caller
+            page (Optional[PageSignals]): The same page, already parsed
+            
+        Returns:
+            Dict[str, Any]: Extracted tour details
+        """
         try:
             logger.info("Using manual scraping fallback...")
             
-            # Fetch the webpage
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+            # Fetch the webpage, unless the local markdown path already did
+            if fetched_page is None:
+                self._report_stage('manual_fetch', 'started')
+                fetched_page = self._fetch_page(url)
+                self._report_stage('manual_fetch', 'completed', bytes=len(fetched_page.content), truncated=fetched_page.truncated)
+                page = None
+            
+            # Unchanged page content: reuse the earlier extraction and skip the LLM
+            cached_data = None if force_refresh else get_cached_content_data(fetched_page.content)
+            if cached_data:
+                self._report_stage('cache', 'completed', hit=True, key='content')
+                return {
+                    'success': True,
+                    'data': {**cached_data, 'tourLink': url}
+                }
             
-            # Parse HTML
-            soup = BeautifulSoup(response.content, 'html.parser')
+            # Parse HTML once with lxml, collecting every signal in a single traversal
+            if page is None:
+                page = PageSignals.from_html(fetched_page.content, getattr(settings, 'SCRAPE_PAGE_TEXT_MAX_CHARS', 100000))
             
             # Extract basic information
-            extracted_data = self._extract_basic_info(soup, url)
-            
-            # Use AI to enhance and structure the data
-            enhanced_data = self._enhance_with_ai(extracted_data, soup.get_text()[:3000])
+            self._report_stage('basic_info', 'started')
+            extracted_data = self._extract_basic_info(page, url)
+            structured_data = self._extract_structured_data(page.structured_soup(), url)
+            known_data, patterns_confident = self._extract_with_patterns(page.text, structured_data, title=extracted_data['title'])
+            extracted_data.update(known_data)
+            self._report_stage('basic_info', 'completed', data=dict(extracted_data))
+            
+            if self._structured_data_coverage(structured_data) >= getattr(settings, 'SCRAPE_STRUCTURED_DATA_MIN_COVERAGE', 0.8):
+                logger.info("Structured data covers the key fields, skipping AI enhancement")
+                self._report_stage('ai_enhancement', 'skipped', reason='Structured data coverage')
+                enhanced_data = {'success': True, 'data': extracted_data}
+                ai_enhanced = False
+            elif patterns_confident:
+                logger.info("Pattern extraction covers the required fields, skipping AI enhancement")
+                self._report_stage('ai_enhancement', 'skipped', reason='Pattern extraction confidence')
+                enhanced_data = {'success': True, 'data': extracted_data}
+                ai_enhanced = False
+            else:
+                # Use AI to enhance and structure the data
+                self._report_stage('ai_enhancement', 'started')
+                page_text = select_relevant_content(page.text, getattr(settings, 'SCRAPE_ENHANCE_TOKEN_BUDGET', 750))
+                # Only a provider answer is worth a gap-filling follow-up; the rule-based fallback means both failed
+                enhanced_data, ai_enhanced = self._enhance_with_ai(extracted_data, page_text)
+                self._report_stage('ai_enhancement', 'completed')
+                if enhanced_data and enhanced_data.get('success'):
+                    # Structured markup and confident pattern matches are authoritative for the fields they provide
+                    enhanced_data['data'] = {**enhanced_data['data'], **known_data}
             
             # Clean and validate the data to ensure all comprehensive fields are present
             if enhanced_data and 'data' in enhanced_data:
+                self._report_stage('cleaning', 'started')
                 enhanced_data['data'] = self._clean_extracted_data(enhanced_data['data'])
+                self._report_stage('cleaning', 'completed')
+                if ai_enhanced and enhanced_data.get('success'):
+                    enhanced_data['data'] = self.fill_missing_fields(enhanced_data['data'], page.text, url)
+                if enhanced_data.get('success'):
+                    cache_content_data(fetched_page.content, enhanced_data['data'])
             
             return enhanced_data
             
         except Exception as e:
             logger.error(f"Error in manual scraping fallback: {str(e)}")
+            self._fail_open_stages(str(e), stages=('manual_fetch', 'basic_info', 'ai_enhancement', 'cleaning'))
             return {
                 'success': False,
                 'error': f'Failed to scrape URL: {str(e)}',
@@ -452,11 +1208,7 @@ class TourScrapingService:
                 duration_days = data['durationDays']
                 if isinstance(duration_days, str):
                     # Extract numeric value from string
-                    days_match = re.search(r'(\d+)', str(duration_days))
-                    if days_match:
-                        data['durationDays'] = int(days_match.group(1))
-                    else:
-                        data['durationDays'] = 0
+                    data['durationDays'] = first_number(duration_days)
                 elif isinstance(duration_days, (int, float)):
                     data['durationDays'] = int(duration_days)
                 else:
@@ -469,11 +1221,7 @@ class TourScrapingService:
                 duration_nights = data['durationNights']
                 if isinstance(duration_nights, str):
                     # Extract numeric value from string
-                    nights_match = re.search(r'(\d+)', str(duration_nights))
-                    if nights_match:
-                        data['durationNights'] = int(nights_match.group(1))
-                    else:
-                        data['durationNights'] = 0
+                    data['durationNights'] = first_number(duration_nights)
                 elif isinstance(duration_nights, (int, float)):
                     data['durationNights'] = int(duration_nights)
                 else:
@@ -503,8 +1251,177 @@ class TourScrapingService:
             data['durationNights'] = 0
             return data
     
-    def _extract_basic_info(self, soup: BeautifulSoup, url: str) -> Dict[str, Any]:
-        """Extract basic information from the HTML."""
+    def _extract_structured_data(self, soup: BeautifulSoup, url: str) -> Dict[str, Any]:
+        """
+        Extract tour fields from schema.org JSON-LD and OpenGraph markup.
+        
+        Args:
+            soup (BeautifulSoup): Parsed page (only script and meta tags are needed)
+            url (str): The URL being scraped
+            
+        Returns:
+            Dict[str, Any]: TourExtractionSchema fields found in the markup (empty values left out)
+        """
+        data = {}
+        nodes = self._json_ld_nodes(soup)
+        
+        tour = None
+        for tour_type in STRUCTURED_DATA_TOUR_TYPES:
+            tour = next((node for node in nodes if tour_type in self._json_ld_types(node)), None)
+            if tour:
+                break
+        
+        offers = [node for node in nodes if set(self._json_ld_types(node)) & set(STRUCTURED_DATA_OFFER_TYPES)]
+        if tour:
+            data['title'] = self._json_ld_text(tour.get('name'))
+            data['summary'] = self._json_ld_text(tour.get('description'))
+            for key in ('provider', 'brand', 'organizer', 'seller'):
+                provider = self._json_ld_text(tour.get(key))
+                if provider:
+                    data['providerName'] = provider
+                    break
+            data['destinations'] = self._json_ld_places(tour)
+            
+            days = self._parse_iso_duration_days(tour.get('duration'))
+            if days:
+                data['durationDays'] = days
+                data['durationNights'] = max(0, days - 1)
+            
+            keywords = tour.get('keywords')
+            if isinstance(keywords, str):
+                keywords = [keyword.strip() for keyword in keywords.split(',')]
+            if isinstance(keywords, list):
+                data['tags'] = [keyword for keyword in keywords if isinstance(keyword, str) and keyword]
+            category = tour.get('category') or tour.get('touristType')
+            if isinstance(category, str):
+                category = [category]
+            if isinstance(category, list):
+                data['categories'] = [item for item in category if isinstance(item, str) and item]
+            
+            tour_offers = tour.get('offers')
+            if isinstance(tour_offers, dict):
+                offers.insert(0, tour_offers)
+            elif isinstance(tour_offers, list):
+                offers = [offer for offer in tour_offers if isinstance(offer, dict)] + offers
+            
+            start_dates = [node.get('startDate') for node in nodes if 'Event' in self._json_ld_types(node)]
+            months = set()
+            for start_date in start_dates:
+                match = re.match(r'\d{4}-(\d{2})', str(start_date or ''))
+                if match and 1 <= int(match.group(1)) <= 12:
+                    months.add(int(match.group(1)))
+            data['departureMonths'] = [MONTH_NAMES[month - 1] for month in sorted(months)]
+        
+        # Lowest offer price, "Starting From" unless there is one fixed price
+        prices = []
+        for offer in offers:
+            price = self._parse_price(offer.get('lowPrice') or offer.get('price'))
+            if price:
+                prices.append(price)
+        if prices:
+            data['startingPrice'] = min(prices)
+            data['priceType'] = 'Fixed' if len(prices) == 1 and 'lowPrice' not in offers[0] else 'Starting From'
+        
+        # OpenGraph fills whatever JSON-LD did not provide
+        og = {}
+        for meta in soup.find_all('meta'):
+            key = meta.get('property') or meta.get('name')
+            if key and meta.get('content'):
+                og.setdefault(key.lower(), meta['content'].strip())
+        data['title'] = data.get('title') or og.get('og:title', '')
+        data['summary'] = data.get('summary') or og.get('og:description', '')
+        data['providerName'] = data.get('providerName') or og.get('og:site_name', '')
+        if not data.get('startingPrice'):
+            price = self._parse_price(og.get('product:price:amount') or og.get('og:price:amount'))
+            if price:
+                data['startingPrice'] = price
+        
+        if not data.get('durationDays') and data.get('title'):
+            match = re.search(r'(\d+)\s*days?\s*[/&,-]?\s*(\d+)\s*nights?', data['title'], re.IGNORECASE)
+            if match:
+                data['durationDays'] = int(match.group(1))
+                data['durationNights'] = int(match.group(2))
+        
+        structured_data = {field: value for field, value in data.items() if value}
+        if structured_data:
+            structured_data['tourLink'] = url
+        return structured_data
+    
+    def _structured_data_coverage(self, data: Dict[str, Any]) -> float:
+        """Share of STRUCTURED_DATA_KEY_FIELDS that structured data provided."""
+        covered = sum(1 for field in STRUCTURED_DATA_KEY_FIELDS if data.get(field))
+        return covered / len(STRUCTURED_DATA_KEY_FIELDS)
+    
+    def _json_ld_nodes(self, soup: BeautifulSoup) -> list:
+        """Get all JSON-LD objects on the page, flattening lists and @graph containers."""
+        nodes = []
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                pending = [json.loads(script.string or script.get_text() or '')]
+            except (json.JSONDecodeError, TypeError):
+                continue
+            while pending:
+                item = pending.pop(0)
+                if isinstance(item, list):
+                    pending.extend(item)
+                elif isinstance(item, dict):
+                    nodes.append(item)
+                    if isinstance(item.get('@graph'), list):
+                        pending.extend(item['@graph'])
+        return nodes
+    
+    def _json_ld_types(self, node: Dict[str, Any]) -> list:
+        node_type = node.get('@type', [])
+        return node_type if isinstance(node_type, list) else [node_type]
+    
+    def _json_ld_text(self, value: Any) -> str:
+        """Get a display string from a JSON-LD value that may be a string or an object with a name."""
+        if isinstance(value, list):
+            value = value[0] if value else ''
+        if isinstance(value, dict):
+            value = value.get('name', '')
+        return re.sub(r'\s+', ' ', value).strip() if isinstance(value, str) else ''
+    
+    def _json_ld_places(self, tour: Dict[str, Any]) -> list:
+        """Get destination names from the itinerary or location of a JSON-LD tour."""
+        places = []
+        itinerary = tour.get('itinerary') or tour.get('location') or []
+        if isinstance(itinerary, dict):
+            itinerary = itinerary.get('itemListElement', [itinerary])
+        if not isinstance(itinerary, list):
+            itinerary = [itinerary]
+        
+        for item in itinerary:
+            if isinstance(item, dict) and isinstance(item.get('item'), dict):
+                item = item['item']
+            name = self._json_ld_text(item)
+            if not name and isinstance(item, dict) and isinstance(item.get('address'), dict):
+                name = item['address'].get('addressLocality', '')
+            if name and name not in places:
+                places.append(name)
+        return places
+    
+    def _parse_iso_duration_days(self, value: Any) -> int:
+        """Convert an ISO 8601 duration such as P5D or P1W2D to whole days."""
+        match = re.match(r'P(?:(\d+)W)?(?:(\d+)D)?', str(value or ''))
+        if not match:
+            return 0
+        return int(match.group(1) or 0) * 7 + int(match.group(2) or 0)
+    
+    def _parse_price(self, value: Any) -> float:
+        """Convert a price such as 25000, "25,000.00" or "INR 25000" to a float."""
+        if isinstance(value, (int, float)):
+            return float(value)
+        match = re.search(r'\d[\d,]*(?:\.\d+)?', str(value or ''))
+        if not match:
+            return 0.0
+        try:
+            return float(match.group(0).replace(',', ''))
+        except ValueError:
+            return 0.0
+    
+    def _extract_basic_info(self, page: PageSignals, url: str) -> Dict[str, Any]:
+        """Extract basic information from the signals collected from the HTML."""
         data = {
             'tourLink': url,
             'title': '',
@@ -519,90 +1436,28 @@ class TourScrapingService:
             'summary': ''
         }
         
-        # Extract title
-        title_selectors = [
-            'h1', 'h2', '.title', '.tour-title', '[class*="title"]',
-            'meta[property="og:title"]', 'meta[name="title"]'
-        ]
-        
-        for selector in title_selectors:
-            element = soup.select_one(selector)
-            if element:
-                if element.name == 'meta':
-                    data['title'] = element.get('content', '')
-                else:
-                    data['title'] = element.get_text(strip=True)
-                if data['title']:
-                    break
+        # Extract title: first match of each selector in priority order (see TITLE_RULES)
+        data['title'] = page.first_value(page.title_matches)
         
-        # Extract description
-        desc_selectors = [
-            'meta[name="description"]', 'meta[property="og:description"]',
-            '.description', '.tour-description', '[class*="description"]'
-        ]
-        
-        for selector in desc_selectors:
-            element = soup.select_one(selector)
-            if element:
-                if element.name == 'meta':
-                    data['summary'] = element.get('content', '')
-                else:
-                    data['summary'] = element.get_text(strip=True)
-                if data['summary']:
-                    break
+        # Extract description (see DESCRIPTION_RULES)
+        data['summary'] = page.first_value(page.description_matches)
         
         # Extract provider name from domain or page content
         domain = urlparse(url).netloc
         data['providerName'] = domain.replace('www.', '').split('.')[0].title()
         
-        # Enhanced duration extraction from page content
-        text_content = soup.get_text()
-        duration_patterns = [
-            r'(\d+)\s*days?\s*(\d+)\s*nights?',
-            r'(\d+)\s*nights?\s*(\d+)\s*days?',
-            r'(\d+)\s*day\s*tour',
-            r'(\d+)\s*night\s*tour',
-            r'(\d+)\s*days?',
-            r'(\d+)\s*nights?',
-            r'(\d+)[Nn]/(\d+)[Dd]',
-            r'(\d+)[Dd]/(\d+)[Nn]'
-        ]
-        
-        for pattern in duration_patterns:
-            match = re.search(pattern, text_content, re.IGNORECASE)
-            if match:
-                if len(match.groups()) == 2:
-                    # We have both days and nights
-                    if 'day' in pattern.lower() and 'night' in pattern.lower():
-                        data['durationDays'] = int(match.group(1))
-                        data['durationNights'] = int(match.group(2))
-                    else:
-                        # Handle N/D or D/N format
-                        data['durationNights'] = int(match.group(1))
-                        data['durationDays'] = int(match.group(2))
-                else:
-                    # We have only one value
-                    value = int(match.group(1))
-                    if 'day' in pattern.lower():
-                        data['durationDays'] = value
-                        data['durationNights'] = max(0, value - 1)
-                    else:
-                        data['durationNights'] = value
-                        data['durationDays'] = value + 1
-                break
-        
-        # Look for contact information
-        contact_patterns = [
-            r'\+?[\d\s\-\(\)]{10,}',  # Phone numbers
-            r'[\w\.-]+@[\w\.-]+\.\w+',  # Email addresses
-        ]
+        # Duration from the page content (see field_extractors.DURATION_RULES)
+        text_content = page.text
+        duration = extract_duration(text_content)
+        if duration:
+            data['durationDays'] = duration['durationDays'].value
+            data['durationNights'] = duration['durationNights'].value
         
-        # Get text content and clean it
-        text_content = soup.get_text()
+        # Look for contact information in the page text
         contact_info_parts = []
         
         # Extract phone numbers
-        phone_matches = re.findall(r'\+?[\d\s\-\(\)]{10,}', text_content)
+        phone_matches = PHONE_PATTERN.findall(text_content)
         if phone_matches:
             # Clean and format phone numbers
             for phone in phone_matches[:2]:  # Limit to first 2 phone numbers
@@ -611,25 +1466,17 @@ class TourScrapingService:
                     contact_info_parts.append(cleaned_phone)
         
         # Extract email addresses
-        email_matches = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text_content)
+        email_matches = EMAIL_PATTERN.findall(text_content)
         if email_matches:
             for email in email_matches[:2]:  # Limit to first 2 emails
                 cleaned_email = email.strip()
                 if cleaned_email:
                     contact_info_parts.append(cleaned_email)
         
-        # Also look for contact information in specific elements
-        contact_selectors = [
-            '.contact', '.contact-info', '.phone', '.email', '.address',
-            '[class*="contact"]', '[class*="phone"]', '[class*="email"]',
-            '[class*="address"]', '.footer', '.header', '.contact-details',
-            '[id*="contact"]', '[id*="phone"]', '[id*="email"]'
-        ]
-        
-        for selector in contact_selectors:
-            elements = soup.select(selector)
+        # Also look for contact information in specific elements (see CONTACT_RULES)
+        for elements in page.contact_matches:
             for element in elements:
-                element_text = element.get_text(strip=True)
+                element_text = element_value(element)
                 if element_text and len(element_text) > 5:
                     # Check if it contains contact info
                     if any(char.isdigit() for char in element_text) or '@' in element_text:
@@ -639,13 +1486,7 @@ class TourScrapingService:
                             contact_info_parts.append(cleaned_text)
         
         # Also check for contact info in links (tel: and mailto:)
-        contact_links = soup.find_all('a', href=True)
-        for link in contact_links:
-            href = link.get('href', '')
-            if href.startswith('tel:') or href.startswith('mailto:'):
-                link_text = link.get_text(strip=True)
-                if link_text:
-                    contact_info_parts.append(link_text)
+        contact_info_parts.extend(link_text for link_text in page.contact_links if link_text)
         
         # Combine all contact information
         if contact_info_parts:
@@ -655,40 +1496,39 @@ class TourScrapingService:
         
         return data
     
-    def _enhance_with_ai(self, extracted_data: Dict[str, Any], page_text: str) -> Dict[str, Any]:
-        """Use AI to enhance and structure the extracted data."""
+    def _enhance_with_ai(self, extracted_data: Dict[str, Any], page_text: str) -> tuple:
+        """
+        Use AI to enhance and structure the extracted data.
+        
+        Returns:
+            tuple: The enhancement result and whether an AI provider
+            produced it (False when the rule-based fallback was used)
+        """
         try:
-            # Try OpenAI first, then Gemini as fallback
-            openai_api_key = getattr(settings, 'OPENAI_API_KEY', None)
-            gemini_api_key = getattr(settings, 'GEMINI_API_KEY', None)
-            
-            if openai_api_key:
-                return self._enhance_with_openai(extracted_data, page_text, openai_api_key)
-            elif gemini_api_key:
-                return self._enhance_with_gemini(extracted_data, page_text, gemini_api_key)
-            else:
-                return self._fallback_enhancement(extracted_data)
+            # Try OpenAI first, then Gemini, then the rule-based fallback
+            enhancers = {
+                'openai': self._enhance_with_openai,
+                'gemini': self._enhance_with_gemini,
+            }
+            for provider, api_key in self._ai_providers():
+                enhanced_data = enhancers[provider](extracted_data, page_text, api_key)
+                if enhanced_data:
+                    return enhanced_data, True
+            return self._fallback_enhancement(extracted_data), False
                 
         except Exception as e:
             logger.error(f"AI enhancement failed: {str(e)}")
-            return self._fallback_enhancement(extracted_data)
+            return self._fallback_enhancement(extracted_data), False
     
-    def _enhance_with_openai(self, extracted_data: Dict[str, Any], page_text: str, api_key: str) -> Dict[str, Any]:
-        """Use OpenAI to enhance and structure the extracted data."""
+    def _enhance_with_openai(self, extracted_data: Dict[str, Any], page_text: str, api_key: str) -> Optional[Dict[str, Any]]:
+        """Use OpenAI to enhance and structure the extracted data. Returns None on failure."""
         try:
-            import openai
-            # Create a fresh OpenAI client without any session interference
-            client = openai.OpenAI(
-                api_key=api_key,
-                # Explicitly avoid any session configuration
-            )
-            
             prompt = f"""
             Extract tour details from the following webpage content and structure them for a tour booking form.
             
             Current extracted data: {json.dumps(extracted_data, indent=2)}
             
-            Page content (first 3000 chars): {page_text[:3000]}
+            Page content (most relevant sections): {page_text}
             
             Please extract and structure the following information:
             1. Tour Title (clean, descriptive title)
@@ -729,14 +1569,9 @@ class TourScrapingService:
             If any information is not available, use null or empty values.
             """
             
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=1000,
-                temperature=0.1
-            )
-            
-            ai_response = response.choices[0].message.content.strip()
+            ai_response = self._call_provider('openai', self._openai_completion, api_key, prompt, 1000)
+            if ai_response is None:
+                return None
             
             # Try to parse JSON response
             try:
@@ -759,26 +1594,24 @@ class TourScrapingService:
                     'data': ai_data
                 }
             except json.JSONDecodeError:
-                return self._fallback_enhancement(extracted_data)
+                logger.error("Failed to parse AI enhancement JSON response")
+                return None
                 
+        except ExtractionCancelled:
+            raise
         except Exception as e:
             logger.error(f"OpenAI enhancement failed: {str(e)}")
-            return self._fallback_enhancement(extracted_data)
+            return None
     
-    def _enhance_with_gemini(self, extracted_data: Dict[str, Any], page_text: str, api_key: str) -> Dict[str, Any]:
-        """Use Google Gemini to enhance and structure the extracted data."""
+    def _enhance_with_gemini(self, extracted_data: Dict[str, Any], page_text: str, api_key: str) -> Optional[Dict[str, Any]]:
+        """Use Google Gemini to enhance and structure the extracted data. Returns None on failure."""
         try:
-            import google.generativeai as genai
-            
-            # Configure Gemini
-            genai.configure(api_key=api_key)
-            
             prompt = f"""
             Extract tour details from the following webpage content and structure them for a tour booking form.
             
             Current extracted data: {json.dumps(extracted_data, indent=2)}
             
-            Page content (first 3000 chars): {page_text[:3000]}
+            Page content (most relevant sections): {page_text}
             
             Please extract and structure the following information:
             1. Tour Title (clean, descriptive title)
@@ -819,11 +1652,9 @@ class TourScrapingService:
             If any information is not available, use null or empty values.
             """
             
-            # Generate content using Gemini
-            model = genai.GenerativeModel('gemini-2.0-flash-exp')
-            response = model.generate_content(prompt)
-            
-            ai_response = response.text.strip()
+            ai_response = self._call_provider('gemini', self._gemini_completion, api_key, prompt)
+            if ai_response is None:
+                return None
             
             # Try to parse JSON response
             try:
@@ -846,11 +1677,14 @@ class TourScrapingService:
                     'data': ai_data
                 }
             except json.JSONDecodeError:
-                return self._fallback_enhancement(extracted_data)
+                logger.error("Failed to parse AI enhancement JSON response")
+                return None
                 
+        except ExtractionCancelled:
+            raise
         except Exception as e:
             logger.error(f"Gemini enhancement failed: {str(e)}")
-            return self._fallback_enhancement(extracted_data)
+            return None
     
     def _fallback_enhancement(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
         """Fallback enhancement without AI."""
@@ -859,53 +1693,12 @@ class TourScrapingService:
         summary = extracted_data.get('summary', '')
         
         # Extract destinations from title or summary
-        destinations = []
-        if title:
-            # Simple destination extraction
-            common_destinations = ['Bali', 'Thailand', 'Singapore', 'Maldives', 'Dubai', 'Europe', 'India', 'Japan', 'Korea', 'Australia', 'New Zealand', 'USA', 'Canada', 'Mexico', 'Brazil', 'Argentina', 'South Africa', 'Egypt', 'Morocco', 'Turkey', 'Greece', 'Italy', 'Spain', 'France', 'Germany', 'Netherlands', 'Belgium', 'Switzerland', 'Austria', 'Czech Republic', 'Poland', 'Hungary', 'Romania', 'Bulgaria', 'Croatia', 'Slovenia', 'Slovakia', 'Lithuania', 'Latvia', 'Estonia', 'Finland', 'Sweden', 'Norway', 'Denmark', 'Iceland', 'Ireland', 'UK', 'Portugal', 'Malta', 'Cyprus', 'Iceland']
-            for dest in common_destinations:
-                if dest.lower() in title.lower() or dest.lower() in summary.lower():
-                    destinations.append(dest)
-        
-        # Enhanced duration extraction
-        durationDays = 0
-        durationNights = 0
-        
-        # Look for duration patterns in title and summary
-        duration_text = title + ' ' + summary
-        duration_patterns = [
-            r'(\d+)\s*days?\s*(\d+)\s*nights?',
-            r'(\d+)\s*nights?\s*(\d+)\s*days?',
-            r'(\d+)\s*day\s*tour',
-            r'(\d+)\s*night\s*tour',
-            r'(\d+)\s*days?',
-            r'(\d+)\s*nights?',
-            r'(\d+)[Nn]/(\d+)[Dd]',
-            r'(\d+)[Dd]/(\d+)[Nn]'
-        ]
-        
-        for pattern in duration_patterns:
-            match = re.search(pattern, duration_text, re.IGNORECASE)
-            if match:
-                if len(match.groups()) == 2:
-                    # We have both days and nights
-                    if 'day' in pattern.lower() and 'night' in pattern.lower():
-                        durationDays = int(match.group(1))
-                        durationNights = int(match.group(2))
-                    else:
-                        # Handle N/D or D/N format
-                        durationNights = int(match.group(1))
-                        durationDays = int(match.group(2))
-                else:
-                    # We have only one value
-                    value = int(match.group(1))
-                    if 'day' in pattern.lower():
-                        durationDays = value
-                        durationNights = max(0, value - 1)
-                    else:
-                        durationNights = value
-                        durationDays = value + 1
-                break
+        destinations = match_known_destinations(title + ' ' + summary) if title else []
+        
+        # Duration from title and summary (see field_extractors.DURATION_RULES)
+        duration = extract_duration(title + ' ' + summary)
+        durationDays = duration['durationDays'].value if duration else 0
+        durationNights = duration['durationNights'].value if duration else 0
         
         # Determine tour type
         tourType = 'FIT' # Changed default
@@ -328,6 +328,34 @@ class TourListSerializer(serializers.ModelSerializer):
             'updatedAt',
         ]
 
+    def __init__(self, *args, **kwargs):
+        # Optional sparse fieldset: only serialize the given output fields
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def model_fields_for(cls, fields):
+        """
+        Map output field names to the model columns they read, for QuerySet.only().
+
+        Args:
+            fields (list): Output field names (e.g. ['id', 'title', 'startingPrice'])
+
+        Returns:
+            list: Model field names
+
+        Raises:
+            ValueError: If a field name is unknown
+        """
+        declared = cls().fields
+        unknown = [name for name in fields if name not in declared]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed fields: {', '.join(declared)}")
+        return [declared[name].source for name in fields]
+
 class TourDetailSerializer(serializers.ModelSerializer):
     """Serializer for detailed tour view with all fields."""
     tourLink = serializers.URLField(source='tour_link')
@@ -568,11 +596,25 @@ class LegalBankingResponseSerializer(serializers.Serializer):
     data = LegalBankingSerializer()
 
 
-class TourScrapingRequestSerializer(serializers.Serializer):
-    """Serializer for tour scraping request."""
+class TourScrapingStreamRequestSerializer(serializers.Serializer):
+    """Serializer for streamed tour scraping request (query parameters)."""
     url = serializers.URLField(
         help_text="URL of the tour page to scrape. Must be a complete URL starting with http:// or https://"
     )
+    force_refresh = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Ignore cached results and scrape the page again"
+    )
+
+
+class TourScrapingRequestSerializer(TourScrapingStreamRequestSerializer):
+    """Serializer for tour scraping request."""
+    background = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Queue the scrape as a background job and return a job id instead of waiting for the result"
+    )
 
 
 class TourScrapingResponseSerializer(serializers.Serializer):
@@ -580,3 +622,88 @@ class TourScrapingResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField(help_text="Whether the scraping was successful")
     data = serializers.DictField(help_text="Extracted tour data in the new schema format")
     message = serializers.CharField(help_text="Success or error message")
+
+
+class TourScrapingJobResponseSerializer(serializers.Serializer):
+    """Serializer for a queued tour scraping job."""
+    success = serializers.BooleanField(help_text="Whether the job was queued")
+    message = serializers.CharField(help_text="Success or error message")
+    job_id = serializers.CharField(help_text="Id of the background scrape job")
+
+
+class TourScrapingJobStatusSerializer(serializers.Serializer):
+    """Serializer for the status of a tour scraping job."""
+    success = serializers.BooleanField(help_text="Whether the job status could be read")
+    job_id = serializers.CharField(help_text="Id of the background scrape job")
+    status = serializers.CharField(help_text="Job status: queued, running, completed or failed")
+    stages = serializers.DictField(help_text="State of each pipeline stage (firecrawl, pattern_extraction, ai_extraction, gap_fill, manual_fetch, ...)")
+    data = serializers.DictField(required=False, help_text="Extracted tour data once the job has completed")
+    message = serializers.CharField(required=False, help_text="Result or error message")
+
+
+class TourBulkScrapingRequestSerializer(serializers.Serializer):
+    """Serializer for bulk tour scraping request."""
+    urls = serializers.ListField(
+        child=serializers.URLField(),
+        min_length=1,
+        max_length=200,
+        help_text="URLs of the tour pages to scrape (maximum 200)"
+    )
+    force_refresh = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Ignore cached results and scrape the pages again"
+    )
+
+
+class TourBulkScrapingJobResponseSerializer(serializers.Serializer):
+    """Serializer for the 'queued' event of a bulk scrape stream."""
+    event = serializers.CharField(help_text="queued, then result (one per URL, in completion order, in the format of the job status endpoint plus url), keepalive and done")
+    success = serializers.BooleanField(help_text="Whether the jobs were queued")
+    message = serializers.CharField(help_text="Result or error message")
+    job_id = serializers.CharField(help_text="Id of the bulk scrape, for scrape-tour-details/bulk/{job_id}/")
+    total = serializers.IntegerField(help_text="Number of queued jobs (unique URLs)")
+    jobs = serializers.ListField(child=serializers.DictField(), help_text="url and job_id of every queued job, in submitted order")
+
+
+class TourBulkScrapingStatusSerializer(serializers.Serializer):
+    """Serializer for the progress of a bulk scrape."""
+    success = serializers.BooleanField(help_text="Whether the status could be read")
+    job_id = serializers.CharField(help_text="Id of the bulk scrape")
+    status = serializers.CharField(help_text="running until every job has completed or failed, then completed")
+    total = serializers.IntegerField(help_text="Number of jobs")
+    finished = serializers.IntegerField(help_text="Number of completed or failed jobs")
+    succeeded = serializers.IntegerField(help_text="Number of jobs that extracted tour details")
+    failed = serializers.IntegerField(help_text="Number of failed jobs")
+    results = serializers.ListField(
+        child=serializers.DictField(),
+        help_text="job_id, status, stages and, once finished, url, message and data of every job, in submitted order"
+    )
+
+
+class TourBulkWriteRequestSerializer(serializers.Serializer):
+    """Serializer for bulk tour create/update request."""
+    tours = serializers.ListField(
+        child=serializers.DictField(),
+        min_length=1,
+        max_length=1000,
+        help_text="Tours in the create format (maximum 1000); items with an id update that tour instead (partial update)"
+    )
+    all_or_nothing = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Write nothing when any tour is invalid"
+    )
+
+
+class ScrapingHealthResponseSerializer(serializers.Serializer):
+    """Serializer for scraping provider health."""
+    success = serializers.BooleanField(help_text="Whether the health state could be read")
+    data = serializers.DictField(help_text="Circuit breaker state and counters per provider (firecrawl, openai, gemini)")
+    llm_cache = serializers.DictField(allow_null=True, help_text="LLM response cache hits, misses, sets, evictions and entries (null when disabled)")
+
+
+class ScrapingStatsResponseSerializer(serializers.Serializer):
+    """Serializer for aggregated scrape run telemetry."""
+    success = serializers.BooleanField(help_text="Whether the statistics could be computed")
+    data = serializers.DictField(help_text="Run counts, durations, LLM calls, tokens and bytes fetched in total, by_day and by_domain; provider_paths; p50/p95 seconds per stage; average tokens per LLM extraction")
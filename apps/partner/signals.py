@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Tour
+from .tour_cache import bump_partner_version
+
+
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Tour)
+def invalidate_partner_tour_cache(sender, instance, **kwargs):
+    """Invalidate the partner's cached tour lists and details once the change is committed."""
+    partner_id = instance.partner_id
+    # Bumping before the commit would let a concurrent request cache the old rows under the new version
+    transaction.on_commit(lambda: bump_partner_version(partner_id))
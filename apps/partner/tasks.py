@@ -0,0 +1,179 @@
+import logging
+from celery import shared_task, chord
+from celery.exceptions import SoftTimeLimitExceeded, MaxRetriesExceededError
+from django.conf import settings
+from .scraping_service import TourScrapingService
+from .politeness import HostScheduler, deferral_countdown, is_allowed_by_robots, ROBOTS_DISALLOWED_ERROR
+from .models import Tour
+from .tour_refresh import refresh_tour, tours_due_for_refresh, summarize_outcomes, FAILED, SKIPPED
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+@shared_task(
+    bind=True,
+    name='partner.scrape_tour_details',
+    soft_time_limit=getattr(settings, 'SCRAPE_JOB_SOFT_TIME_LIMIT', 180),
+    time_limit=getattr(settings, 'SCRAPE_JOB_TIME_LIMIT', 210),
+)
+def scrape_tour_details_task(self, url, force_refresh=False):
+    """
+    Run the tour scraping pipeline for a URL in a Celery worker.
+    
+    Progress of every stage is published through the result backend as a
+    PROGRESS state so the job status endpoint can report it while running.
+    
+    Pages disallowed by robots.txt are not scraped. When the website already
+    has SCRAPE_HOST_MAX_CONCURRENCY scrapes running or was scraped less than
+    SCRAPE_HOST_MIN_INTERVAL ago, the task is retried later with a growing
+    countdown instead of holding the worker, so jobs for other websites keep
+    going.
+    
+    Args:
+        url (str): The URL to scrape
+        force_refresh (bool): Ignore cached results and scrape the page again
+    
+    Returns:
+        dict: Scraping result with the per-stage states under 'stages'
+    """
+    stages = {}
+    
+    def on_stage(stage, state, details):
+        stages[stage] = {'state': state, **details}
+        if self.request.id:
+            self.update_state(state='PROGRESS', meta={'url': url, 'stages': stages})
+    
+    if not is_allowed_by_robots(url):
+        return {
+            'success': False,
+            'error': ROBOTS_DISALLOWED_ERROR,
+            'data': {},
+            'url': url,
+            'stages': stages
+        }
+    
+    scheduler = HostScheduler()
+    lease, delay = scheduler.try_acquire(url)
+    if lease is None:
+        try:
+            raise self.retry(
+                countdown=deferral_countdown(delay, self.request.retries),
+                max_retries=getattr(settings, 'SCRAPE_HOST_MAX_DEFERRALS', 20)
+            )
+        except MaxRetriesExceededError:
+            logger.warning(f"Website too busy, giving up scrape job for URL: {url}")
+            return {
+                'success': False,
+                'error': 'Too many scrapes are running for this website, please try again later',
+                'data': {},
+                'url': url,
+                'stages': stages
+            }
+    
+    try:
+        scraping_service = TourScrapingService(stage_callback=on_stage)
+        result = scraping_service.extract_tour_details(url, force_refresh=force_refresh)
+    except SoftTimeLimitExceeded:
+        logger.error(f"Scrape job timed out for URL: {url}")
+        result = {
+            'success': False,
+            'error': 'Scraping took too long and was stopped',
+            'data': {}
+        }
+    finally:
+        scheduler.release(lease)
+    
+    result['url'] = url
+    result['stages'] = stages
+    return result
+
+
+@shared_task(name='partner.refresh_saved_tours')
+def refresh_saved_tours_task():
+    """
+    Nightly beat job: check the source pages of saved tours for changes.
+    
+    Up to TOUR_REFRESH_BATCH_SIZE tours not checked for TOUR_REFRESH_MIN_AGE_HOURS
+    are refreshed in parallel on the scraping queue, and
+    partner.summarize_tour_refresh logs how many were skipped, updated and broken.
+    
+    Returns:
+        dict: Number of queued tours
+    """
+    if not getattr(settings, 'TOUR_REFRESH_ENABLED', True):
+        return {'queued': 0}
+    
+    tour_ids = list(
+        tours_due_for_refresh()
+        .values_list('id', flat=True)[:getattr(settings, 'TOUR_REFRESH_BATCH_SIZE', 1000)]
+    )
+    if tour_ids:
+        chord(refresh_tour_task.s(tour_id) for tour_id in tour_ids)(summarize_tour_refresh_task.s())
+    logger.info(f"Queued source page refresh of {len(tour_ids)} tours")
+    return {'queued': len(tour_ids)}
+
+
+@shared_task(
+    bind=True,
+    name='partner.refresh_tour',
+    soft_time_limit=getattr(settings, 'SCRAPE_JOB_SOFT_TIME_LIMIT', 180),
+    time_limit=getattr(settings, 'SCRAPE_JOB_TIME_LIMIT', 210),
+)
+def refresh_tour_task(self, tour_id):
+    """
+    Refresh one saved tour from its source page, with the per-host politeness of scrape jobs.
+    
+    Args:
+        tour_id (int): Tour to refresh
+    
+    Returns:
+        str: Refresh outcome (skipped, updated, unchanged, broken or failed)
+    """
+    tour = Tour.objects.filter(pk=tour_id).exclude(tour_link__isnull=True).exclude(tour_link='').first()
+    if tour is None:
+        return SKIPPED
+    
+    scheduler = HostScheduler()
+    lease, delay = scheduler.try_acquire(tour.tour_link)
+    if lease is None:
+        try:
+            raise self.retry(
+                countdown=deferral_countdown(delay, self.request.retries),
+                max_retries=getattr(settings, 'SCRAPE_HOST_MAX_DEFERRALS', 20)
+            )
+        except MaxRetriesExceededError:
+            logger.warning(f"Website too busy, giving up refresh of tour {tour_id}")
+            return FAILED
+    
+    try:
+        return refresh_tour(tour)
+    except SoftTimeLimitExceeded:
+        logger.error(f"Refresh of tour {tour_id} timed out")
+        return FAILED
+    except Exception as e:
+        # The chord summary must still run
+        logger.error(f"Tour {tour_id} refresh error: {str(e)}")
+        return FAILED
+    finally:
+        scheduler.release(lease)
+
+
+@shared_task(name='partner.summarize_tour_refresh')
+def summarize_tour_refresh_task(outcomes):
+    """
+    Report the outcomes of a refresh run.
+    
+    Args:
+        outcomes (list): Outcomes of the refresh_tour tasks
+    
+    Returns:
+        dict: Number of tours per outcome, and 'checked'
+    """
+    report = summarize_outcomes(outcomes)
+    logger.info(
+        f"Tour source refresh: {report['checked']} checked, {report['skipped']} skipped, "
+        f"{report['updated']} updated, {report['unchanged']} unchanged, "
+        f"{report['broken']} broken, {report['failed']} failed"
+    )
+    return report
@@ -0,0 +1,1608 @@
+import io
+import os
+import json
+import time
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+import requests
+from bs4 import BeautifulSoup
+from celery import Celery
+from celery.backends.cache import CacheBackend
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ReadTimeoutError
+from apps.authentication.models import User
+from config.celery import app as celery_app
+from .models import Partner, ScrapeRun, Tour
+from .bulk_scraping import iter_finished_jobs
+from .bulk_tours import bulk_write_tours
+from .circuit_breaker import CircuitBreaker, HALF_OPEN
+from .content_chunking import (
+    MAX_SECTION_CHARS, estimate_tokens, select_relevant_content, signals_for_fields, split_sections
+)
+from .benchmarks.scraping import load_fixtures
+from .field_extractors import confident_values, extract_duration, extract_fields, extract_price, is_confident
+from .html_markdown import check_markdown_parity, parse_page
+from .llm_cache import COUNTERS, DiskLLMResponseCache, DjangoLLMResponseCache, get_llm_response_cache, prompt_key
+from .scraping_cache import (
+    acquire_scrape_lock, cache_content_data, cache_result, get_cached_result, normalize_url,
+    release_scrape_lock, wait_for_scrape_result
+)
+from .page_signals import CONTACT_RULES, DESCRIPTION_RULES, TITLE_RULES, PageSignals, element_value
+from .page_fetcher import CHUNK_SIZE, FetchedPage, UnsupportedContentTypeError, fetch_page
+from . import http_clients, scrape_telemetry
+from .politeness import ROBOTS_DISALLOWED_ERROR, HostScheduler, deferral_countdown
+from .scraping_events import iter_extraction_events
+from .scraping_service import GAP_FILL_FIELDS, TourScrapingService
+from .tasks import scrape_tour_details_task
+from .tour_cache import get_or_build, get_partner_version
+from .tour_refresh import UPDATED, UNCHANGED, refresh_tour
+
+TOUR_PAGE = b"""<html><head><title>Goa Beach Escape</title>
+<meta name="description" content="Five sunny days on the beaches of North Goa."></head>
+<body><h1>Goa Beach Escape</h1><p>5 Days / 4 Nights</p></body></html>"""
+
+EXTRACTED_TOUR = {
+    'success': True,
+    'data': {'title': 'Goa Beach Escape', 'destinations': ['Goa'], 'durationDays': 5},
+    'message': 'Tour details extracted successfully'
+}
+
+# Scrapes in these tests must not buffer telemetry: the exit-time flush would run after
+# the test database is gone. ScrapeTelemetryFlushTests turns it back on for itself.
+_telemetry_disabled = override_settings(SCRAPE_TELEMETRY_ENABLED=False)
+
+
+def setUpModule():
+    _telemetry_disabled.enable()
+
+
+def tearDownModule():
+    _telemetry_disabled.disable()
+    scrape_telemetry._buffer.clear()
+
+
+class EagerCeleryMixin:
+    """Run Celery tasks in the test process, with an in-memory result backend."""
+
+    def setUp(self):
+        super().setUp()
+        backend = CacheBackend(app=celery_app, url='memory://')
+        patcher = mock.patch.object(Celery, 'backend', new_callable=mock.PropertyMock, return_value=backend)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        previous = {key: celery_app.conf[key] for key in ('task_always_eager', 'task_store_eager_result')}
+        celery_app.conf.update(task_always_eager=True, task_store_eager_result=True)
+        self.addCleanup(celery_app.conf.update, previous)
+        # Tasks copy task_store_eager_result when they are bound, which may have happened already
+        for name, task in celery_app.tasks.items():
+            if name.startswith('partner.'):
+                patcher = mock.patch.object(type(task), 'store_eager_result', True)
+                patcher.start()
+                self.addCleanup(patcher.stop)
+
+
+def create_verified_partner(email='partner@example.com'):
+    user = User.objects.create_user(
+        email=email, username=email.split('@')[0], password='secret123',
+        first_name='Test', last_name='Partner'
+    )
+    return Partner.objects.create(user=user, is_verified=True)
+
+
+def extract_tour(url, force_refresh=False, fetched_page=None):
+    # The scrape task adds url and stages to the result it gets
+    return json.loads(json.dumps(EXTRACTED_TOUR))
+
+
+class StreamScrapeTourDetailsTests(TestCase):
+    """GET scrape-tour-details/stream/ as consumed by EventSource."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_event_stream_accept_header(self):
+        with mock.patch.object(TourScrapingService, 'extract_tour_details', return_value=EXTRACTED_TOUR):
+            response = self.client.get(
+                '/api/partner/scrape-tour-details/stream/',
+                {'url': 'https://example.com/tours/goa'},
+                HTTP_ACCEPT='text/event-stream'
+            )
+            body = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertIn('event: result', body)
+        self.assertIn('Goa Beach Escape', body)
+
+    def test_invalid_request_with_event_stream_accept_header(self):
+        response = self.client.get('/api/partner/scrape-tour-details/stream/', HTTP_ACCEPT='text/event-stream')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.content.startswith(b'event: error\n'))
+
+    @override_settings(FIRECRAWL_API_KEY='test-key', SCRAPE_LOCAL_MARKDOWN_ENABLED=True)
+    def test_preview_reuses_the_pipeline_fetch(self):
+        page = FetchedPage(
+            url='https://example.com/tours/goa', content=TOUR_PAGE, content_type='text/html',
+            encoding='utf-8', truncated=False
+        )
+        with mock.patch.object(TourScrapingService, '_fetch_page', return_value=page) as fetch_page, \
+                mock.patch.object(TourScrapingService, '_extract_from_markdown', return_value=EXTRACTED_TOUR), \
+                mock.patch('apps.partner.scraping_service.is_static_page', return_value=True):
+            events = dict(iter_extraction_events('https://example.com/tours/goa', force_refresh=True))
+
+        self.assertEqual(fetch_page.call_count, 1)
+        self.assertEqual(events['preview']['title'], 'Goa Beach Escape')
+        self.assertTrue(events['result']['success'])
+        # Telemetry is off for the test module, so nothing is left for the exit-time flush
+        self.assertFalse(scrape_telemetry._buffer)
+
+
+class BulkScrapeTests(EagerCeleryMixin, TestCase):
+    """POST scrape-tour-details/bulk/ and the bulk job status endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        user = User.objects.create_user(
+            email='partner@example.com', username='partner', password='secret123',
+            first_name='Test', last_name='Partner'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        for patcher in (
+            mock.patch('apps.partner.tasks.is_allowed_by_robots', return_value=True),
+            mock.patch.object(TourScrapingService, 'extract_tour_details', side_effect=extract_tour),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.urls = ['https://goa.example.com/tour', 'https://goa.example.com/tour#itinerary', 'https://kerala.example.com/tour']
+
+    def test_results_stream_as_json_lines(self):
+        response = self.client.post('/api/partner/scrape-tour-details/bulk/', {'urls': self.urls}, format='json')
+        events = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([event['event'] for event in events], ['queued', 'result', 'result', 'done'])
+        self.assertEqual(events[0]['total'], 2)
+        self.assertEqual(
+            sorted(event['url'] for event in events[1:3]),
+            ['https://goa.example.com/tour', 'https://kerala.example.com/tour']
+        )
+        self.assertEqual(events[1]['data']['title'], 'Goa Beach Escape')
+        self.assertEqual(events[-1]['status'], 'completed')
+        self.assertEqual(events[-1]['succeeded'], 2)
+
+    def test_results_stream_as_server_sent_events(self):
+        response = self.client.post(
+            '/api/partner/scrape-tour-details/bulk/', {'urls': self.urls}, format='json',
+            HTTP_ACCEPT='text/event-stream'
+        )
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue(body.startswith('event: queued\n'))
+        self.assertEqual(body.count('event: result\n'), 2)
+        self.assertIn('event: done\n', body)
+
+    def test_status_endpoint_lists_jobs_in_submitted_order(self):
+        response = self.client.post('/api/partner/scrape-tour-details/bulk/', {'urls': self.urls}, format='json')
+        queued = json.loads(next(iter(response.streaming_content)))
+
+        response = self.client.get(f"/api/partner/scrape-tour-details/bulk/{queued['job_id']}/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual([result['job_id'] for result in response.data['results']], [job['job_id'] for job in queued['jobs']])
+        self.assertEqual(response.data['succeeded'], 2)
+
+    def test_unknown_bulk_job(self):
+        response = self.client.get('/api/partner/scrape-tour-details/bulk/unknown-job/')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_authentication_required(self):
+        response = APIClient().post('/api/partner/scrape-tour-details/bulk/', {'urls': self.urls}, format='json')
+
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_jobs_are_yielded_in_completion_order(self):
+        polls = {'slow': iter([False, False, True]), 'fast': iter([False, True])}
+        children = [SimpleNamespace(id=name, ready=lambda name=name: next(polls[name])) for name in ('slow', 'fast')]
+
+        finished = iter_finished_jobs(SimpleNamespace(id='bulk', results=children), poll_interval=0.01)
+
+        self.assertEqual([child.id for child in finished], ['fast', 'slow'])
+
+    def test_stream_stops_at_the_timeout(self):
+        stuck = SimpleNamespace(id='stuck', ready=lambda: False)
+
+        finished = list(iter_finished_jobs(
+            SimpleNamespace(id='bulk', results=[stuck]), poll_interval=0.01, keepalive_interval=0.02, timeout=0.1
+        ))
+
+        self.assertTrue(finished)
+        self.assertTrue(all(child is None for child in finished))
+
+
+class TourImportExportTests(TestCase):
+    """tours/export/ and tours/import/ with the Accept headers of their file formats."""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            email='partner@example.com', username='partner', password='secret123',
+            first_name='Test', last_name='Partner'
+        )
+        self.partner = Partner.objects.create(user=user, is_verified=True)
+        Tour.objects.create(partner=self.partner, title='Goa Beach Escape', destinations=['Goa'], duration_days=5)
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        self.base_url = f'/api/partner/user/{user.id}/tours'
+
+    def test_export_csv_accept_header(self):
+        response = self.client.get(f'{self.base_url}/export/', HTTP_ACCEPT='text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(lines[0].split(',')[:2], ['id', 'tourLink'])
+        self.assertIn('Goa Beach Escape', lines[1])
+
+    def test_export_ndjson_accept_header(self):
+        response = self.client.get(f'{self.base_url}/export/', HTTP_ACCEPT='application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(rows[0]['title'], 'Goa Beach Escape')
+        self.assertEqual(rows[0]['destinations'], ['Goa'])
+
+    def test_export_error_with_csv_accept_header(self):
+        response = self.client.get(f'{self.base_url}/export/', {'file_format': 'xlsx'}, HTTP_ACCEPT='text/csv')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(json.loads(response.content)['success'])
+
+    def test_import_ndjson_accept_header(self):
+        upload = SimpleUploadedFile('tours.jsonl', b'{"title": "Kerala Backwaters", "durationDays": 4}\n')
+        response = self.client.post(
+            f'{self.base_url}/import/', {'file': upload}, format='multipart', HTTP_ACCEPT='application/x-ndjson'
+        )
+        reports = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(reports[-1]['created'], 1)
+        self.assertTrue(self.partner.tours.filter(title='Kerala Backwaters').exists())
+
+
+class TourListTests(TestCase):
+    """GET user/<user_id>/tours/ with keyset pagination."""
+
+    def test_count_covers_all_pages(self):
+        user = User.objects.create_user(
+            email='partner@example.com', username='partner', password='secret123',
+            first_name='Test', last_name='Partner'
+        )
+        partner = Partner.objects.create(user=user, is_verified=True)
+        for price in (1000, 2000, 3000):
+            Tour.objects.create(partner=partner, title=f'Tour {price}', starting_price=price)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        response = client.get(f'/api/partner/user/{user.id}/tours/', {'page_size': 2, 'ordering': '-startingPrice'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['data']), 2)
+        self.assertEqual(response.data['count'], 3)
+        self.assertTrue(response.data['pagination']['hasMore'])
+
+
+class RefreshTourTests(TestCase):
+    """refresh_tour on a changed source page."""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            email='partner@example.com', username='partner', password='secret123',
+            first_name='Test', last_name='Partner'
+        )
+        self.tour = Tour.objects.create(
+            partner=Partner.objects.create(user=user, is_verified=True),
+            tour_link='https://example.com/tours/goa',
+            title='Goa Beach Escape',
+            summary='Our own summary',
+            includes_flights=True,
+            includes_hotels=True,
+        )
+
+    def refresh(self, data):
+        page = FetchedPage(
+            url=self.tour.tour_link, content=TOUR_PAGE + str(data).encode(), content_type='text/html',
+            encoding='utf-8', truncated=False
+        )
+        result = {'success': True, 'data': data}
+        with mock.patch('apps.partner.tour_refresh.is_allowed_by_robots', return_value=True), \
+                mock.patch('apps.partner.tour_refresh.fetch_page', return_value=page), \
+                mock.patch.object(TourScrapingService, 'extract_tour_details', return_value=result):
+            outcome = refresh_tour(self.tour)
+        self.tour.refresh_from_db()
+        return outcome
+
+    def test_defaulted_flags_do_not_clear_stored_flags(self):
+        self.tour.source_snapshot = {'title': 'Goa Beach Escape', 'includes_flights': True}
+        self.tour.save()
+
+        outcome = self.refresh({
+            'title': 'Goa Beach Escape', 'includesFlights': False, 'includesHotels': False, 'includesMeals': True
+        })
+
+        self.assertEqual(outcome, UNCHANGED)
+        self.assertTrue(self.tour.includes_flights)
+        self.assertTrue(self.tour.includes_hotels)
+        self.assertFalse(self.tour.includes_meals)
+
+    def test_first_refresh_records_the_snapshot_without_overwriting(self):
+        outcome = self.refresh({'title': 'Goa Beach Holiday', 'summary': 'Five days in Goa', 'destinations': ['Goa']})
+
+        self.assertEqual(outcome, UPDATED)
+        self.assertEqual(self.tour.title, 'Goa Beach Escape')
+        self.assertEqual(self.tour.summary, 'Our own summary')
+        self.assertEqual(self.tour.destinations, ['Goa'])
+        self.assertEqual(self.tour.source_snapshot['title'], 'Goa Beach Holiday')
+
+    def test_partner_edits_are_kept(self):
+        self.tour.source_snapshot = {'title': 'Goa Beach Escape', 'summary': 'Scraped summary'}
+        self.tour.save()
+
+        outcome = self.refresh({'title': 'Goa Beach Holiday', 'summary': 'Five days in Goa'})
+
+        self.assertEqual(outcome, UPDATED)
+        self.assertEqual(self.tour.title, 'Goa Beach Holiday')
+        self.assertEqual(self.tour.summary, 'Our own summary')
+        self.assertEqual(self.tour.source_snapshot['summary'], 'Five days in Goa')
+
+    def refresh_with_pipeline(self):
+        page = FetchedPage(
+            url=self.tour.tour_link, content=TOUR_PAGE, content_type='text/html', encoding='utf-8', truncated=False
+        )
+        firecrawl_app = SimpleNamespace(scrape_url=mock.Mock(side_effect=RuntimeError('Firecrawl is down')))
+        with mock.patch('apps.partner.tour_refresh.is_allowed_by_robots', return_value=True), \
+                mock.patch('apps.partner.tour_refresh.fetch_page', return_value=page) as fetch_page, \
+                mock.patch('apps.partner.scraping_service.get_firecrawl_app', return_value=firecrawl_app), \
+                mock.patch.object(TourScrapingService, '_fetch_page') as pipeline_fetch:
+            outcome = refresh_tour(self.tour)
+        self.tour.refresh_from_db()
+
+        fetch_page.assert_called_once()
+        pipeline_fetch.assert_not_called()
+        return outcome
+
+    @override_settings(FIRECRAWL_API_KEY=None, OPENAI_API_KEY=None, GEMINI_API_KEY=None)
+    def test_changed_page_is_extracted_without_a_second_download(self):
+        self.assertEqual(self.refresh_with_pipeline(), UPDATED)
+        self.assertEqual(self.tour.source_snapshot['title'], 'Goa Beach Escape')
+
+    @override_settings(
+        FIRECRAWL_API_KEY='test-key', OPENAI_API_KEY=None, GEMINI_API_KEY=None,
+        SCRAPE_HEDGE_DELAY=0, SCRAPE_LOCAL_MARKDOWN_ENABLED=True
+    )
+    def test_hedged_paths_reuse_the_refresh_download(self):
+        CircuitBreaker('firecrawl').reset()
+
+        self.assertEqual(self.refresh_with_pipeline(), UPDATED)
+
+
+@override_settings(SCRAPE_HOST_POLL_INTERVAL=0.5, SCRAPE_HOST_MAX_DEFER_DELAY=60, SCRAPE_HOST_MAX_DEFERRALS=20)
+class DeferralCountdownTests(TestCase):
+    """Countdown of Celery jobs deferred by a busy host."""
+
+    def test_countdown_grows_up_to_the_cap(self):
+        countdowns = [deferral_countdown(0.5, deferrals) for deferrals in range(20)]
+
+        self.assertLessEqual(countdowns[0], 0.5)
+        self.assertGreaterEqual(countdowns[8], 30)
+        self.assertTrue(all(countdown <= 60 for countdown in countdowns))
+        # All deferrals together wait minutes, not seconds
+        self.assertGreater(sum(countdowns), 300)
+
+    def test_countdown_respects_the_scheduler_delay(self):
+        self.assertGreaterEqual(deferral_countdown(0.9, 0), 0.9)
+
+
+class CircuitBreakerTests(TestCase):
+    """Circuit breaker state shared by concurrent workers."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker('firecrawl')
+        self.breaker.reset()
+
+    def test_concurrent_calls_are_all_counted(self):
+        def record_calls():
+            breaker = CircuitBreaker('firecrawl')
+            for _ in range(50):
+                breaker.record_success(0.01)
+
+        threads = [threading.Thread(target=record_calls) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.breaker.snapshot()['total_calls'], 200)
+
+    @override_settings(CIRCUIT_BREAKER_RESET_TIMEOUT=0)
+    def test_half_open_breaker_lets_one_probe_through(self):
+        for _ in range(5):
+            self.breaker.record_failure(0.1, 'Service unavailable')
+
+        self.assertEqual(CircuitBreaker('firecrawl').snapshot()['state'], HALF_OPEN)
+        allowed = [CircuitBreaker('firecrawl').allow_request() for _ in range(3)]
+        self.assertEqual(allowed, [True, False, False])
+
+    @override_settings(LLM_CACHE_BACKEND='none')
+    def test_invalid_json_answers_do_not_open_the_provider_breaker(self):
+        CircuitBreaker('openai').reset()
+        self.addCleanup(CircuitBreaker('openai').reset)
+        service = TourScrapingService()
+        with mock.patch.object(service, '_openai_completion', return_value='not json') as completion:
+            results = [service._complete_json('openai', 'Fill the gaps', 'test-key') for _ in range(6)]
+
+        self.assertEqual(results, [None] * 6)
+        self.assertEqual(completion.call_count, 6)
+        snapshot = CircuitBreaker('openai').snapshot()
+        self.assertEqual((snapshot['total_calls'], snapshot['total_failures']), (6, 0))
+        self.assertTrue(CircuitBreaker('openai').allow_request())
+
+    @override_settings(LLM_CACHE_BACKEND='none')
+    def test_api_errors_count_against_the_provider_breaker(self):
+        CircuitBreaker('openai').reset()
+        self.addCleanup(CircuitBreaker('openai').reset)
+        service = TourScrapingService()
+        with mock.patch.object(service, '_openai_completion', side_effect=RuntimeError('503 Service Unavailable')):
+            for _ in range(5):
+                self.assertIsNone(service._complete_json('openai', 'Fill the gaps', 'test-key'))
+
+        self.assertEqual(CircuitBreaker('openai').snapshot()['total_failures'], 5)
+        self.assertFalse(CircuitBreaker('openai').allow_request())
+
+
+@override_settings(SCRAPE_TELEMETRY_ENABLED=True, SCRAPE_TELEMETRY_BATCH_SIZE=1000, SCRAPE_TELEMETRY_MAX_BUFFER=3)
+class ScrapeTelemetryFlushTests(TestCase):
+    """Buffered scrape runs when the database is unreachable."""
+
+    def setUp(self):
+        scrape_telemetry._buffer.clear()
+        self.addCleanup(scrape_telemetry._buffer.clear)
+        # Flush by hand instead of from the background thread
+        patcher = mock.patch.object(scrape_telemetry, '_ensure_flusher')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_failed_flush_keeps_the_newest_runs(self):
+        for index in range(3):
+            scrape_telemetry.record_scrape_run(
+                {'url': f'https://example.com/tours/{index}', 'domain': 'example.com', 'outcome': 'success'}
+            )
+        with mock.patch.object(ScrapeRun.objects, 'bulk_create', side_effect=OperationalError('connection refused')):
+            self.assertEqual(scrape_telemetry.flush_scrape_runs(), 0)
+        scrape_telemetry.record_scrape_run(
+            {'url': 'https://example.com/tours/3', 'domain': 'example.com', 'outcome': 'success'}
+        )
+
+        self.assertEqual(scrape_telemetry.flush_scrape_runs(), 3)
+        self.assertEqual(
+            sorted(ScrapeRun.objects.values_list('url', flat=True)),
+            ['https://example.com/tours/1', 'https://example.com/tours/2', 'https://example.com/tours/3']
+        )
+
+
+@override_settings(
+    FIRECRAWL_API_KEY='test-key', OPENAI_API_KEY='test-key', GEMINI_API_KEY=None,
+    SCRAPE_HEDGE_DELAY=0, SCRAPE_LOCAL_MARKDOWN_ENABLED=False, LLM_CACHE_BACKEND='none'
+)
+class HedgedExtractionTests(TestCase):
+    """The path that loses the hedged race stops before its next paid call."""
+
+    def setUp(self):
+        for provider in ('firecrawl', 'openai'):
+            CircuitBreaker(provider).reset()
+
+    def test_losing_path_is_cancelled(self):
+        firecrawl_done = threading.Event()
+
+        def slow_scrape(url, **kwargs):
+            time.sleep(0.2)
+            firecrawl_done.set()
+            return SimpleNamespace(success=True, markdown='# Tour\n\nA short page.', rawHtml=None)
+
+        stages = []
+        service = TourScrapingService(stage_callback=lambda stage, state, details: stages.append((stage, state)))
+        firecrawl_app = SimpleNamespace(scrape_url=slow_scrape)
+        with mock.patch('apps.partner.scraping_service.get_firecrawl_app', return_value=firecrawl_app), \
+                mock.patch.object(TourScrapingService, '_manual_scraping_fallback', return_value=EXTRACTED_TOUR), \
+                mock.patch.object(TourScrapingService, '_openai_completion') as openai_completion:
+            result = service._hedged_extraction('https://example.com/tours/goa', 'test-key')
+            self.assertTrue(firecrawl_done.wait(2))
+            time.sleep(0.1)
+
+        self.assertEqual(result, EXTRACTED_TOUR)
+        openai_completion.assert_not_called()
+        self.assertNotIn(('firecrawl', 'completed'), stages)
+
+    @override_settings(SCRAPE_LOCAL_MARKDOWN_ENABLED=True)
+    def test_fallback_reuses_the_local_fetch(self):
+        page = FetchedPage(
+            url='https://example.com/tours/goa', content=TOUR_PAGE, content_type='text/html',
+            encoding='utf-8', truncated=False
+        )
+        firecrawl_app = SimpleNamespace(scrape_url=mock.Mock(side_effect=RuntimeError('Firecrawl is down')))
+        service = TourScrapingService()
+        with mock.patch('apps.partner.scraping_service.get_firecrawl_app', return_value=firecrawl_app), \
+                mock.patch.object(TourScrapingService, '_fetch_page', return_value=page) as fetch_page, \
+                mock.patch('apps.partner.scraping_service.is_static_page', return_value=False), \
+                mock.patch.object(TourScrapingService, '_openai_completion', side_effect=RuntimeError('OpenAI is down')) as openai_completion:
+            result = service._hedged_extraction('https://example.com/tours/goa', 'test-key', force_refresh=True)
+
+        self.assertEqual(fetch_page.call_count, 1)
+        # The fallback's enhancement call hits the stub, not the network
+        self.assertTrue(openai_completion.called)
+        firecrawl_app.scrape_url.assert_called_once()
+        self.assertEqual(result['data']['title'], 'Goa Beach Escape')
+
+    @override_settings(SCRAPE_LOCAL_MARKDOWN_ENABLED=True)
+    def test_no_fallback_after_a_local_extraction(self):
+        incomplete = {'success': True, 'data': {'title': 'Goa Beach Escape'}}
+        firecrawl_app = SimpleNamespace(scrape_url=mock.Mock(side_effect=RuntimeError('Firecrawl is down')))
+        service = TourScrapingService()
+        with mock.patch('apps.partner.scraping_service.get_firecrawl_app', return_value=firecrawl_app), \
+                mock.patch.object(TourScrapingService, '_extract_with_local_markdown', return_value=(incomplete, None, None)), \
+                mock.patch.object(TourScrapingService, '_manual_scraping_fallback') as fallback:
+            result = service._hedged_extraction('https://example.com/tours/goa', 'test-key')
+
+        fallback.assert_not_called()
+        self.assertEqual(result, incomplete)
+
+
+class PriceExtractionTests(TestCase):
+    """Currency handling of the pattern price extractor."""
+
+    def test_rupee_price_is_confident(self):
+        match = extract_price('Starting from ₹ 32,500 per person')['startingPrice']
+
+        self.assertEqual(match.value, 32500)
+        self.assertEqual(match.rule, 'price:INR')
+        self.assertGreaterEqual(match.confidence, 0.85)
+
+    def test_foreign_price_never_skips_the_llm(self):
+        text = '# Goa Beach Escape\n\nDestinations: Goa\n\n5 Days / 4 Nights\n\nStarting from $1,200 per person'
+        matches = extract_fields(text)
+
+        self.assertEqual(matches['startingPrice'].rule, 'price:USD')
+        self.assertLess(matches['startingPrice'].confidence, 0.85)
+        self.assertNotIn('startingPrice', confident_values(matches, 0.5))
+        self.assertFalse(is_confident(matches, 0.5))
+
+    def test_rupee_price_wins_over_a_foreign_one(self):
+        match = extract_price('Price: $300 per person or ₹ 25,000 per person')['startingPrice']
+
+        self.assertEqual(match.value, 25000)
+        self.assertEqual(match.rule, 'price:INR')
+
+
+class MarkdownParityTests(TestCase):
+    """Local markdown of the recorded fixtures against their recorded Firecrawl markdown."""
+
+    def setUp(self):
+        self.fixtures = [fixture for fixture in load_fixtures() if fixture['firecrawl_markdown'] is not None]
+
+    def test_static_fixtures_match_firecrawl(self):
+        static = 0
+        for fixture in self.fixtures:
+            parity = check_markdown_parity(fixture['html'], fixture['url'], fixture['firecrawl_markdown'])
+            if parity['static']:
+                static += 1
+                self.assertGreaterEqual(parity['recall'], 0.8, fixture['name'])
+
+        self.assertGreaterEqual(static, 2)
+
+    def test_check_uses_the_local_markdown_path_conversion(self):
+        fixture = next(fixture for fixture in self.fixtures if fixture['name'] == 'kerala_backwaters_jsonld')
+        page = FetchedPage(
+            url=fixture['url'], content=fixture['html'], content_type='text/html', encoding='utf-8', truncated=False
+        )
+        with mock.patch.object(TourScrapingService, '_fetch_page', return_value=page), \
+                mock.patch.object(TourScrapingService, '_extract_from_markdown', return_value=EXTRACTED_TOUR) as extract:
+            TourScrapingService()._extract_with_local_markdown(fixture['url'])
+
+        parity = check_markdown_parity(fixture['html'], fixture['url'], fixture['firecrawl_markdown'])
+        self.assertEqual(extract.call_args[0][0], parity['markdown'])
+
+
+@override_settings(SCRAPE_SINGLE_FLIGHT_POLL_INTERVAL=0.02)
+class SingleFlightTests(TestCase):
+    """Concurrent scrapes of one URL coalesced through the cache lock."""
+
+    url = 'https://example.com/tours/goa'
+
+    def setUp(self):
+        cache.clear()
+        # Locks left behind would make later scrapes of the URL wait for them
+        self.addCleanup(cache.clear)
+
+    def test_concurrent_callers_share_one_extraction(self):
+        calls = []
+
+        def slow_extraction(url, force_refresh=False, fetched_page=None):
+            calls.append(url)
+            time.sleep(0.3)
+            return extract_tour(url)
+
+        barrier = threading.Barrier(4)
+        results = []
+
+        def scrape():
+            barrier.wait()
+            results.append(TourScrapingService().extract_tour_details(self.url + '?utm_source=mail', force_refresh=True))
+
+        with mock.patch.object(TourScrapingService, '_extract_tour_details_uncached', side_effect=slow_extraction):
+            threads = [threading.Thread(target=scrape) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(result['data']['title'] == 'Goa Beach Escape' for result in results))
+        self.assertEqual(sum(1 for result in results if result.get('coalesced')), 3)
+
+    @override_settings(SCRAPE_SINGLE_FLIGHT_TIMEOUT=0.2)
+    def test_follower_scrapes_after_a_stuck_leader(self):
+        with override_settings(SCRAPE_SINGLE_FLIGHT_TIMEOUT=60):
+            self.assertIsNotNone(acquire_scrape_lock(self.url))
+        stages = []
+        service = TourScrapingService(stage_callback=lambda stage, state, details: stages.append((stage, state)))
+
+        start = time.monotonic()
+        with mock.patch.object(TourScrapingService, '_extract_tour_details_uncached', side_effect=extract_tour) as extract:
+            result = service.extract_tour_details(self.url, force_refresh=True)
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        extract.assert_called_once()
+        self.assertNotIn('coalesced', result)
+        self.assertIn(('single_flight', 'failed'), stages)
+
+    def test_lock_is_only_released_by_its_holder(self):
+        token = acquire_scrape_lock(self.url)
+        self.assertIsNotNone(token)
+        self.assertIsNone(acquire_scrape_lock(self.url))
+
+        release_scrape_lock(self.url, 'another-token', None)
+        self.assertIsNone(acquire_scrape_lock(self.url))
+
+        release_scrape_lock(self.url, token, EXTRACTED_TOUR)
+        new_token = acquire_scrape_lock(self.url)
+        self.assertIsNotNone(new_token)
+
+        # A leader whose lock expired and was taken over does not release the new holder's lock
+        release_scrape_lock(self.url, token, None)
+        self.assertIsNone(acquire_scrape_lock(self.url))
+
+    def test_follower_gets_the_published_result(self):
+        token = acquire_scrape_lock(self.url)
+        threading.Timer(0.1, release_scrape_lock, (self.url, token, EXTRACTED_TOUR)).start()
+
+        result = wait_for_scrape_result(self.url, timeout=2)
+
+        self.assertTrue(result['coalesced'])
+        self.assertEqual(result['data'], EXTRACTED_TOUR['data'])
+
+
+class TourCacheTests(TestCase):
+    """Per-partner tour cache invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        self.partner = create_verified_partner()
+        self.tour = Tour.objects.create(partner=self.partner, title='Goa Beach Escape', destinations=['Goa'])
+        self.client = APIClient()
+        self.client.force_authenticate(self.partner.user)
+        self.base_url = f'/api/partner/user/{self.partner.user_id}/tours'
+
+    def test_entries_are_built_once(self):
+        build = mock.Mock(return_value={'body': 'tours'})
+
+        self.assertEqual(get_or_build(self.partner.id, 'list', 'params', build), {'body': 'tours'})
+        self.assertEqual(get_or_build(self.partner.id, 'list', 'params', build), {'body': 'tours'})
+        build.assert_called_once()
+
+    def test_save_bumps_the_version_on_commit(self):
+        version = get_partner_version(self.partner.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.tour.title = 'Goa Beach Holiday'
+            self.tour.save()
+            # Not before the commit, or a concurrent request could cache the old row under the new version
+            self.assertEqual(get_partner_version(self.partner.id), version)
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertNotEqual(get_partner_version(self.partner.id), version)
+
+    def test_delete_bumps_the_version(self):
+        version = get_partner_version(self.partner.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.delete()
+
+        self.assertNotEqual(get_partner_version(self.partner.id), version)
+
+    def test_bulk_write_bumps_the_version(self):
+        version = get_partner_version(self.partner.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            report = bulk_write_tours(self.partner, [{'id': self.tour.id, 'title': 'Goa Beach Holiday'}])
+
+        self.assertEqual(len(report['updated']), 1)
+        self.assertNotEqual(get_partner_version(self.partner.id), version)
+
+    def test_other_partners_keep_their_version(self):
+        other = create_verified_partner('other@example.com')
+        version = get_partner_version(other.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.save()
+
+        self.assertEqual(get_partner_version(other.id), version)
+
+    def test_no_stale_list_or_detail_after_an_edit(self):
+        self.assertEqual(self.client.get(f'{self.base_url}/').data['data'][0]['title'], 'Goa Beach Escape')
+        self.assertEqual(self.client.get(f'{self.base_url}/{self.tour.id}/').data['data']['title'], 'Goa Beach Escape')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'{self.base_url}/{self.tour.id}/update/', {'title': 'Goa Beach Holiday'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.client.get(f'{self.base_url}/').data['data'][0]['title'], 'Goa Beach Holiday')
+        self.assertEqual(self.client.get(f'{self.base_url}/{self.tour.id}/').data['data']['title'], 'Goa Beach Holiday')
+
+    def test_no_stale_list_after_a_bulk_write(self):
+        self.assertEqual(self.client.get(f'{self.base_url}/').data['count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_write_tours(self.partner, [{'title': 'Kerala Backwaters'}, {'title': 'Ladakh Trek'}])
+
+        self.assertEqual(self.client.get(f'{self.base_url}/').data['count'], 3)
+
+
+class ConditionalTourRequestTests(TestCase):
+    """304 Not Modified on the tour list and detail endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.partner = create_verified_partner()
+        self.tour = Tour.objects.create(partner=self.partner, title='Goa Beach Escape', destinations=['Goa'])
+        self.client = APIClient()
+        self.client.force_authenticate(self.partner.user)
+        self.list_url = f'/api/partner/user/{self.partner.user_id}/tours/'
+        self.detail_url = f'/api/partner/user/{self.partner.user_id}/tours/{self.tour.id}/'
+
+    def edit_tour(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'{self.detail_url}update/', {'title': 'Goa Beach Holiday'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_if_none_match(self):
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_list_if_modified_since(self):
+        response = self.client.get(self.list_url)
+
+        response = self.client.get(self.list_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_etag_depends_on_the_query(self):
+        etag = self.client.get(self.list_url)['ETag']
+
+        response = self.client.get(self.list_url, {'status': 'Live'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_etag_changes_on_edit(self):
+        etag = self.client.get(self.list_url)['ETag']
+        self.edit_tour()
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['data'][0]['title'], 'Goa Beach Holiday')
+
+    def test_list_etag_changes_on_add_and_delete(self):
+        etag = self.client.get(self.list_url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            added = Tour.objects.create(partner=self.partner, title='Kerala Backwaters')
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        added_etag = response['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            added.delete()
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=added_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_detail_if_none_match(self):
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_if_modified_since(self):
+        response = self.client.get(self.detail_url)
+
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_etag_changes_on_edit(self):
+        etag = self.client.get(self.detail_url)['ETag']
+        self.edit_tour()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['data']['title'], 'Goa Beach Holiday')
+
+
+class BulkWriteToursTests(TestCase):
+    """bulk_write_tours: validation, transactions and computed fields."""
+
+    def setUp(self):
+        self.partner = create_verified_partner()
+        self.tour = Tour.objects.create(partner=self.partner, title='Goa Beach Escape')
+
+    def test_errors_are_reported_per_item(self):
+        report = bulk_write_tours(self.partner, [
+            {'title': 'Kerala Backwaters', 'destinations': ['Kochi']},
+            {'title': 'Ladakh Trek', 'durationDays': 'nine'},
+            'not a tour',
+            {'id': self.tour.id, 'title': 'Goa Beach Holiday'},
+            {'id': self.tour.id, 'summary': 'Updated twice'},
+            {'id': 999999, 'title': 'Unknown tour'},
+        ])
+
+        self.assertEqual([item['index'] for item in report['created']], [0])
+        self.assertEqual(report['updated'], [{'index': 3, 'id': self.tour.id}])
+        self.assertEqual([error['index'] for error in report['errors']], [1, 2, 4, 5])
+        self.assertIn('durationDays', report['errors'][0]['errors'])
+        self.assertEqual(report['errors'][3]['id'], 999999)
+        self.assertTrue(Tour.objects.filter(partner=self.partner, title='Kerala Backwaters').exists())
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.title, 'Goa Beach Holiday')
+
+    def test_all_or_nothing_writes_nothing_on_an_invalid_item(self):
+        report = bulk_write_tours(self.partner, [
+            {'title': 'Kerala Backwaters'},
+            {'id': self.tour.id, 'title': 'Goa Beach Holiday'},
+            {'title': 'Ladakh Trek', 'durationDays': 'nine'},
+        ], all_or_nothing=True)
+
+        self.assertEqual(report['created'], [])
+        self.assertEqual(report['updated'], [])
+        self.assertEqual(len(report['errors']), 1)
+        self.assertEqual(Tour.objects.filter(partner=self.partner).count(), 1)
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.title, 'Goa Beach Escape')
+
+    def test_all_or_nothing_writes_nothing_on_an_unknown_tour(self):
+        report = bulk_write_tours(self.partner, [
+            {'title': 'Kerala Backwaters'},
+            {'id': 999999, 'title': 'Unknown tour'},
+        ], all_or_nothing=True)
+
+        self.assertEqual(report['errors'][0]['index'], 1)
+        self.assertEqual(Tour.objects.filter(partner=self.partner).count(), 1)
+
+    def test_tours_of_other_partners_are_not_updated(self):
+        other_tour = Tour.objects.create(partner=create_verified_partner('other@example.com'), title='Other tour')
+
+        report = bulk_write_tours(self.partner, [{'id': other_tour.id, 'title': 'Taken over'}])
+
+        self.assertEqual(report['updated'], [])
+        other_tour.refresh_from_db()
+        self.assertEqual(other_tour.title, 'Other tour')
+
+    def test_visibility_score_is_computed_in_the_batch(self):
+        report = bulk_write_tours(self.partner, [
+            {'title': 'Kerala Backwaters', 'destinations': ['Kochi'], 'summary': 'Houseboats and tea gardens'},
+            {'id': self.tour.id, 'destinations': ['Goa'], 'categories': ['Beach']},
+        ])
+
+        created = Tour.objects.get(id=report['created'][0]['id'])
+        self.assertEqual(created.visibility_score, 30)
+        self.assertEqual(created.visibility_score, created.calculate_visibility_score())
+        self.tour.refresh_from_db()
+        self.assertEqual(self.tour.visibility_score, 30)
+
+    def test_bulk_update_bumps_updated_at(self):
+        updated_at = self.tour.updated_at
+
+        bulk_write_tours(self.partner, [{'id': self.tour.id, 'title': 'Goa Beach Holiday'}])
+
+        self.tour.refresh_from_db()
+        self.assertGreater(self.tour.updated_at, updated_at)
+
+
+@override_settings(
+    OPENAI_API_KEY='test-key', GEMINI_API_KEY=None, LLM_CACHE_BACKEND='none',
+    SCRAPE_GAP_FILL_ENABLED=True
+)
+class GapFillTests(TestCase):
+    """Follow-up LLM calls for the fields a first extraction missed."""
+
+    url = 'https://example.com/tours/goa'
+
+    def setUp(self):
+        cache.clear()
+        CircuitBreaker('openai').reset()
+        self.service = TourScrapingService()
+        self.data = self.service._clean_extracted_data(dict(EXTRACTED_TOUR['data']))
+
+    def test_empty_fields_are_gaps(self):
+        self.assertEqual(self.service._find_gaps({}), list(GAP_FILL_FIELDS))
+        self.assertEqual(self.service._find_gaps(self.data), [
+            'summary', 'highlights', 'startingPrice', 'departureMonths', 'departureCities',
+            'tourStartLocation', 'tourDropLocation', 'contactLink'
+        ])
+
+    def test_one_day_tours_need_no_nights(self):
+        self.assertNotIn('durationNights', self.service._find_gaps({**self.data, 'durationDays': 1, 'durationNights': 0}))
+
+    def test_low_confidence_values_are_gaps(self):
+        gaps = self.service._find_gaps({
+            **self.data, 'title': 'Tour Package', 'summary': 'Beach trip.', 'durationDays': 3, 'durationNights': 7
+        })
+
+        self.assertEqual(gaps.count('summary'), 1)
+        for field in ('title', 'durationDays', 'durationNights'):
+            self.assertIn(field, gaps)
+
+    def test_only_the_gaps_are_merged(self):
+        answer = json.dumps({'summary': 'Five sunny days on the beaches of North Goa.', 'title': 'Something else'})
+        with mock.patch.object(TourScrapingService, '_openai_completion', return_value=answer) as completion:
+            filled = self.service.fill_missing_fields(self.data, 'Five sunny days on the beaches of North Goa.', self.url)
+
+        completion.assert_called_once()
+        self.assertEqual(filled['summary'], 'Five sunny days on the beaches of North Goa.')
+        self.assertEqual(filled['title'], 'Goa Beach Escape')
+
+    def test_nothing_to_fill_skips_the_llm(self):
+        with mock.patch.object(TourScrapingService, '_find_gaps', return_value=[]), \
+                mock.patch.object(TourScrapingService, '_openai_completion') as completion:
+            self.assertEqual(self.service.fill_missing_fields(self.data, 'Some page text', self.url), self.data)
+        completion.assert_not_called()
+
+    @override_settings(SCRAPE_GAP_FILL_ENABLED=False)
+    def test_disabled_gap_fill_skips_the_llm(self):
+        with mock.patch.object(TourScrapingService, '_openai_completion') as completion:
+            self.assertEqual(self.service.fill_missing_fields(self.data, 'Some page text', self.url), self.data)
+        completion.assert_not_called()
+
+    def test_failed_provider_keeps_the_data(self):
+        with mock.patch.object(TourScrapingService, '_openai_completion', side_effect=RuntimeError('OpenAI is down')):
+            self.assertEqual(self.service.fill_missing_fields(self.data, 'Some page text', self.url), self.data)
+
+    def _fallback(self, completion):
+        page = FetchedPage(url=self.url, content=TOUR_PAGE, content_type='text/html', encoding='utf-8', truncated=False)
+        with mock.patch.object(TourScrapingService, '_openai_completion', **completion), \
+                mock.patch.object(TourScrapingService, 'fill_missing_fields', side_effect=lambda data, content, url: data) as fill:
+            result = self.service._manual_scraping_fallback(self.url, force_refresh=True, fetched_page=page)
+        self.assertTrue(result['success'])
+        return fill
+
+    def test_fallback_fills_gaps_after_an_ai_enhancement(self):
+        answer = json.dumps({'title': 'Goa Beach Escape', 'destinations': ['Goa'], 'durationDays': 5, 'durationNights': 4})
+
+        self.assertTrue(self._fallback({'return_value': answer}).called)
+
+    def test_fallback_skips_gap_fill_after_the_rule_based_enhancement(self):
+        fill = self._fallback({'side_effect': RuntimeError('OpenAI is down')})
+
+        fill.assert_not_called()
+
+
+@override_settings(FIRECRAWL_API_KEY=None, OPENAI_API_KEY=None, GEMINI_API_KEY=None)
+class ScrapeCacheTests(TestCase):
+    """URL normalization and the URL and content-hash scrape caches."""
+
+    url = 'https://example.com/tours/goa'
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tracking_parameters_are_dropped(self):
+        self.assertEqual(
+            normalize_url('https://example.com/tours/goa?utm_source=mail&UTM_Campaign=june&gclid=abc&fbclid=x&ref=home&id=7'),
+            'https://example.com/tours/goa?id=7'
+        )
+
+    def test_query_parameters_are_sorted(self):
+        self.assertEqual(
+            normalize_url('https://example.com/tours?page=2&dest=goa&empty='),
+            'https://example.com/tours?dest=goa&empty=&page=2'
+        )
+
+    def test_fragment_trailing_slash_and_case(self):
+        self.assertEqual(normalize_url(' HTTPS://Example.COM/Tours/Goa/#itinerary '), 'https://example.com/Tours/Goa')
+        self.assertEqual(normalize_url('https://example.com/'), 'https://example.com/')
+        self.assertEqual(normalize_url('https://example.com'), 'https://example.com/')
+
+    def test_equivalent_urls_share_one_entry(self):
+        cache_result(self.url, EXTRACTED_TOUR)
+
+        result = get_cached_result('https://EXAMPLE.com/tours/goa/?utm_medium=social#top')
+
+        self.assertTrue(result['cached'])
+        self.assertEqual(result['data'], EXTRACTED_TOUR['data'])
+        self.assertIsNone(get_cached_result('https://example.com/tours/goa?id=2'))
+
+    def test_failed_results_are_not_cached(self):
+        cache_result(self.url, {'success': False, 'error': 'Failed to scrape URL', 'data': {}})
+
+        self.assertIsNone(get_cached_result(self.url))
+
+    def test_force_refresh_bypasses_the_url_cache(self):
+        cache_result(self.url, EXTRACTED_TOUR)
+        with mock.patch.object(TourScrapingService, '_extract_tour_details_uncached', side_effect=extract_tour) as extract:
+            cached = TourScrapingService().extract_tour_details(self.url)
+            refreshed = TourScrapingService().extract_tour_details(self.url, force_refresh=True)
+
+        extract.assert_called_once()
+        self.assertTrue(cached['cached'])
+        self.assertNotIn('cached', refreshed)
+
+    def fallback(self, force_refresh):
+        page = FetchedPage(url=self.url, content=TOUR_PAGE, content_type='text/html', encoding='utf-8', truncated=False)
+        return TourScrapingService()._manual_scraping_fallback(self.url, force_refresh=force_refresh, fetched_page=page)
+
+    def test_content_cache_skips_the_extraction(self):
+        cache_content_data(TOUR_PAGE, {'title': 'Cached Goa Tour', 'tourLink': 'https://example.com/old'})
+
+        result = self.fallback(force_refresh=False)
+
+        self.assertEqual(result['data'], {'title': 'Cached Goa Tour', 'tourLink': self.url})
+
+    def test_force_refresh_bypasses_the_content_cache(self):
+        cache_content_data(TOUR_PAGE, {'title': 'Cached Goa Tour'})
+
+        result = self.fallback(force_refresh=True)
+
+        self.assertEqual(result['data']['title'], 'Goa Beach Escape')
+        # The fresh extraction replaces the cached one
+        self.assertEqual(self.fallback(force_refresh=False)['data']['title'], 'Goa Beach Escape')
+
+
+@override_settings(SCRAPE_HOST_MAX_DEFERRALS=2)
+class ScrapeJobTests(EagerCeleryMixin, TestCase):
+    """Background scrape jobs and the job status endpoint."""
+
+    url = 'https://example.com/tours/goa'
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        patcher = mock.patch('apps.partner.tasks.is_allowed_by_robots', return_value=True)
+        self.robots = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def job_status(self, job_id):
+        response = self.client.get(f'/api/partner/scrape-tour-details/jobs/{job_id}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_background_scrape_is_queued_as_a_job(self):
+        with mock.patch.object(TourScrapingService, 'extract_tour_details', side_effect=extract_tour) as extract:
+            response = self.client.post(
+                '/api/partner/scrape-tour-details/', {'url': self.url, 'background': True}, format='json'
+            )
+
+        self.assertEqual(response.status_code, 202)
+        extract.assert_called_once_with(self.url, force_refresh=False)
+        job = self.job_status(response.json()['job_id'])
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['url'], self.url)
+        self.assertEqual(job['data']['title'], 'Goa Beach Escape')
+
+    def test_unknown_job_is_queued(self):
+        self.assertEqual(self.job_status('no-such-job')['status'], 'queued')
+
+    def test_running_job_reports_its_stages(self):
+        progress = []
+
+        def extract(service, url, force_refresh=False, fetched_page=None):
+            service._report_stage('firecrawl', 'started')
+            progress.append(self.job_status('running-job'))
+            service._report_stage('firecrawl', 'completed')
+            return extract_tour(url)
+
+        with mock.patch.object(TourScrapingService, 'extract_tour_details', autospec=True, side_effect=extract):
+            scrape_tour_details_task.apply(args=[self.url], task_id='running-job')
+
+        self.assertEqual(progress[0]['status'], 'running')
+        self.assertEqual(progress[0]['url'], self.url)
+        self.assertEqual(progress[0]['stages']['firecrawl']['state'], 'started')
+        job = self.job_status('running-job')
+        self.assertEqual(job['status'], 'completed')
+        self.assertEqual(job['stages']['firecrawl']['state'], 'completed')
+
+    def test_pages_disallowed_by_robots_are_not_scraped(self):
+        self.robots.return_value = False
+        with mock.patch.object(TourScrapingService, 'extract_tour_details') as extract:
+            scrape_tour_details_task.apply(args=[self.url], task_id='disallowed-job')
+
+        extract.assert_not_called()
+        job = self.job_status('disallowed-job')
+        self.assertEqual(job['status'], 'failed')
+        self.assertEqual(job['message'], ROBOTS_DISALLOWED_ERROR)
+
+    def test_busy_host_gives_up_after_the_deferrals(self):
+        with mock.patch.object(HostScheduler, 'try_acquire', return_value=(None, 5)) as try_acquire, \
+                mock.patch.object(TourScrapingService, 'extract_tour_details') as extract:
+            result = scrape_tour_details_task.apply(args=[self.url]).get()
+
+        # The first attempt plus SCRAPE_HOST_MAX_DEFERRALS retries
+        self.assertEqual(try_acquire.call_count, 3)
+        extract.assert_not_called()
+        self.assertFalse(result['success'])
+        self.assertIn('Too many scrapes', result['error'])
+
+
+class StreamedBody(io.BytesIO):
+    """Raw response body that remembers how much of it was read."""
+
+    bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+class FetchPageTests(TestCase):
+    """fetch_page on a stubbed streamed response."""
+
+    url = 'https://example.com/tours/goa'
+
+    def fetch(self, body=b'', status_code=200, response_headers=None, **kwargs):
+        response = requests.Response()
+        response.status_code = status_code
+        response.url = self.url
+        response.headers.update({'Content-Type': 'text/html; charset=utf-8', **(response_headers or {})})
+        response.raw = StreamedBody(body)
+        session = mock.Mock(get=mock.Mock(return_value=response))
+        return fetch_page(session, self.url, **kwargs), response.raw, session
+
+    def test_body_is_read_up_to_the_byte_cap(self):
+        body = b'<p>Goa</p>' * CHUNK_SIZE
+
+        page, raw, _ = self.fetch(body, max_bytes=CHUNK_SIZE + 10)
+
+        self.assertEqual(page.content, body[:CHUNK_SIZE + 10])
+        self.assertTrue(page.truncated)
+        # Streaming stopped after the chunk that crossed the cap and the connection was dropped
+        self.assertEqual(raw.bytes_read, 2 * CHUNK_SIZE)
+        self.assertTrue(raw.closed)
+
+    def test_body_of_exactly_the_cap_is_complete(self):
+        page, _, _ = self.fetch(TOUR_PAGE, response_headers={'Content-Length': str(len(TOUR_PAGE))}, max_bytes=len(TOUR_PAGE))
+
+        self.assertEqual(page.content, TOUR_PAGE)
+        self.assertFalse(page.truncated)
+        self.assertEqual(page.content_type, 'text/html')
+
+    def test_non_html_is_rejected_before_the_body_is_read(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['Content-Type'] = 'application/pdf'
+        response.raw = StreamedBody(b'%PDF-1.7')
+        session = mock.Mock(get=mock.Mock(return_value=response))
+
+        with self.assertRaises(UnsupportedContentTypeError):
+            fetch_page(session, self.url)
+        self.assertEqual(response.raw.bytes_read, 0)
+        self.assertTrue(response.raw.closed)
+
+    def test_missing_content_type_is_left_to_the_parser(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = StreamedBody(TOUR_PAGE)
+
+        page = fetch_page(mock.Mock(get=mock.Mock(return_value=response)), self.url)
+
+        self.assertEqual(page.content, TOUR_PAGE)
+
+    def test_not_modified_returns_an_empty_page(self):
+        validators = {'If-None-Match': '"v1"'}
+
+        page, raw, session = self.fetch(
+            status_code=304, headers=validators,
+            response_headers={'ETag': '"v2"', 'Last-Modified': 'Mon, 05 Oct 2026 10:00:00 GMT'}
+        )
+
+        self.assertEqual(session.get.call_args.kwargs['headers'], validators)
+        self.assertTrue(page.not_modified)
+        self.assertEqual(page.content, b'')
+        self.assertEqual(page.etag, '"v2"')
+        self.assertEqual(page.last_modified, 'Mon, 05 Oct 2026 10:00:00 GMT')
+        self.assertEqual(raw.bytes_read, 0)
+
+    def test_http_errors_are_raised(self):
+        with self.assertRaises(requests.HTTPError):
+            self.fetch(TOUR_PAGE, status_code=404)
+
+
+CHUNKED_PAGE = '\n\n'.join([
+    '# Kerala Backwaters Tour\n\nHouseboats, tea gardens and beaches in one week.',
+    '## Menu\n\n' + '\n'.join(f'- [{item}](https://example.com/{item.lower()})' for item in (
+        'Home', 'Destinations', 'Honeymoon', 'Adventure', 'Blog', 'Careers', 'Login', 'Sign up'
+    )),
+    '## About us\n\n' + 'We are a family run agency that loves travel and good food. ' * 12,
+    '## Price\n\nStarting from ₹45,000 per person on twin sharing.',
+    '## Itinerary\n\nDay 1: Arrive in Kochi\nDay 2: Munnar tea gardens\nDay 3: Alleppey houseboat\nDay 4: Depart',
+    '## Reviews\n\n' + 'Lovely people and a great trip, would book again. ' * 12,
+    'We use cookies. Read our privacy policy and terms of use. Copyright 2026, all rights reserved. '
+    'Subscribe to our newsletter and follow us.',
+])
+
+
+class ContentSelectionTests(TestCase):
+    """select_relevant_content packing a page into an LLM token budget."""
+
+    def test_price_and_itinerary_are_kept_over_navigation(self):
+        selected = select_relevant_content(CHUNKED_PAGE, 120)
+
+        self.assertLessEqual(estimate_tokens(selected), 120 + 1)
+        self.assertTrue(selected.startswith('# Kerala Backwaters Tour'))
+        self.assertIn('₹45,000 per person', selected)
+        self.assertIn('Day 3: Alleppey houseboat', selected)
+        for dropped in ('## Menu', '## About us', '## Reviews', 'cookies'):
+            self.assertNotIn(dropped, selected)
+        # Selected sections stay in page order
+        self.assertLess(selected.index('## Price'), selected.index('## Itinerary'))
+
+    def test_page_within_the_budget_is_returned_whole(self):
+        self.assertEqual(select_relevant_content(CHUNKED_PAGE, 10000), CHUNKED_PAGE)
+
+    def test_field_signals_select_the_sections_for_the_gaps(self):
+        # Room for the lead and only one of the price and itinerary sections
+        price = select_relevant_content(CHUNKED_PAGE, 40, signals_for_fields(['startingPrice']))
+        start = select_relevant_content(CHUNKED_PAGE, 40, signals_for_fields(['tourStartLocation']))
+
+        self.assertIn('₹45,000', price)
+        self.assertNotIn('## Itinerary', price)
+        self.assertIn('Day 1: Arrive in Kochi', start)
+        self.assertNotIn('## Price', start)
+
+    def test_long_sections_are_split(self):
+        sections = split_sections('## Reviews\n\n' + 'Lovely people and a great trip.\n' * 100)
+
+        self.assertGreater(len(sections), 1)
+        self.assertTrue(sections[0].startswith('## Reviews'))
+        self.assertTrue(all(len(section) <= MAX_SECTION_CHARS for section in sections))
+
+
+class LLMResponseCacheTests(TestCase):
+    """LLM response caches: keys, TTL, pruning and counters."""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        # Disk counters and the prune countdown are per process
+        for patcher in (
+            mock.patch.dict(DiskLLMResponseCache._counters, dict.fromkeys(COUNTERS, 0)),
+            mock.patch.object(DiskLLMResponseCache, '_writes_since_prune', 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def age(self, llm_cache, provider, model, prompt, seconds):
+        path = llm_cache._path(prompt_key(provider, model, prompt))
+        mtime = time.time() - seconds
+        os.utime(path, (mtime, mtime))
+
+    def test_key_covers_provider_model_and_prompt(self):
+        key = prompt_key('openai', 'gpt-4o-mini', 'Extract the tour')
+
+        self.assertTrue(key.startswith('openai:gpt-4o-mini:'))
+        self.assertEqual(key, prompt_key('openai', 'gpt-4o-mini', 'Extract the tour'))
+        self.assertEqual(len({
+            key,
+            prompt_key('gemini', 'gpt-4o-mini', 'Extract the tour'),
+            prompt_key('openai', 'gpt-4o', 'Extract the tour'),
+            prompt_key('openai', 'gpt-4o-mini', 'Extract the tour again'),
+        }), 4)
+
+    def test_disk_cache_counts_hits_and_misses(self):
+        llm_cache = DiskLLMResponseCache(self.directory)
+
+        self.assertIsNone(llm_cache.get('openai', 'gpt-4o-mini', 'Extract the tour'))
+        llm_cache.set('openai', 'gpt-4o-mini', 'Extract the tour', '{"title": "Goa"}')
+        self.assertEqual(llm_cache.get('openai', 'gpt-4o-mini', 'Extract the tour'), '{"title": "Goa"}')
+        self.assertIsNone(llm_cache.get('openai', 'gpt-4o', 'Extract the tour'))
+
+        stats = llm_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['sets']), (1, 2, 1))
+        self.assertEqual(stats['hit_rate'], 0.333)
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['backend'], 'disk')
+
+    def test_disk_entries_expire_after_the_ttl(self):
+        llm_cache = DiskLLMResponseCache(self.directory, ttl=60)
+        llm_cache.set('openai', 'gpt-4o-mini', 'Extract the tour', '{"title": "Goa"}')
+        self.age(llm_cache, 'openai', 'gpt-4o-mini', 'Extract the tour', 61)
+
+        self.assertIsNone(llm_cache.get('openai', 'gpt-4o-mini', 'Extract the tour'))
+        self.assertEqual(llm_cache.stats()['entries'], 0)
+
+    def test_pruning_removes_the_least_recently_used_entries(self):
+        llm_cache = DiskLLMResponseCache(self.directory, max_entries=2)
+        with mock.patch.object(DiskLLMResponseCache, 'PRUNE_EVERY', 3):
+            llm_cache.set('openai', 'gpt-4o-mini', 'Goa', '{"title": "Goa"}')
+            llm_cache.set('openai', 'gpt-4o-mini', 'Kerala', '{"title": "Kerala"}')
+            self.age(llm_cache, 'openai', 'gpt-4o-mini', 'Goa', 30)
+            self.age(llm_cache, 'openai', 'gpt-4o-mini', 'Kerala', 20)
+            # A hit makes Goa the most recently used entry
+            llm_cache.get('openai', 'gpt-4o-mini', 'Goa')
+            llm_cache.set('openai', 'gpt-4o-mini', 'Ladakh', '{"title": "Ladakh"}')
+
+        self.assertIsNone(llm_cache.get('openai', 'gpt-4o-mini', 'Kerala'))
+        self.assertIsNotNone(llm_cache.get('openai', 'gpt-4o-mini', 'Goa'))
+        self.assertIsNotNone(llm_cache.get('openai', 'gpt-4o-mini', 'Ladakh'))
+        self.assertEqual(llm_cache.stats()['evictions'], 1)
+
+    def test_pruning_removes_expired_entries(self):
+        llm_cache = DiskLLMResponseCache(self.directory, ttl=60)
+        with mock.patch.object(DiskLLMResponseCache, 'PRUNE_EVERY', 2):
+            llm_cache.set('openai', 'gpt-4o-mini', 'Goa', '{"title": "Goa"}')
+            self.age(llm_cache, 'openai', 'gpt-4o-mini', 'Goa', 61)
+            llm_cache.set('openai', 'gpt-4o-mini', 'Kerala', '{"title": "Kerala"}')
+
+        self.assertEqual(llm_cache.stats()['entries'], 1)
+        self.assertEqual(llm_cache.stats()['evictions'], 1)
+
+    def test_django_cache_counts_hits_and_misses(self):
+        llm_cache = DjangoLLMResponseCache()
+
+        self.assertIsNone(llm_cache.get('gemini', 'gemini-1.5-flash', 'Extract the tour'))
+        llm_cache.set('gemini', 'gemini-1.5-flash', 'Extract the tour', '{"title": "Goa"}')
+        self.assertEqual(llm_cache.get('gemini', 'gemini-1.5-flash', 'Extract the tour'), '{"title": "Goa"}')
+
+        stats = llm_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['sets']), (1, 1, 1))
+        self.assertIsNone(stats['entries'])
+
+    def test_backend_is_chosen_by_setting(self):
+        with override_settings(LLM_CACHE_BACKEND='disk', LLM_CACHE_DIR=self.directory):
+            self.assertIsInstance(get_llm_response_cache(), DiskLLMResponseCache)
+        with override_settings(LLM_CACHE_BACKEND='django'):
+            self.assertIsInstance(get_llm_response_cache(), DjangoLLMResponseCache)
+        with override_settings(LLM_CACHE_BACKEND='none'):
+            self.assertIsNone(get_llm_response_cache())
+
+
+@override_settings(OPENAI_API_KEY='test-key', GEMINI_API_KEY=None, LLM_CACHE_BACKEND='none')
+class StructuredDataTests(TestCase):
+    """JSON-LD and OpenGraph fields, and skipping the LLM when they cover the key fields."""
+
+    def setUp(self):
+        cache.clear()
+        self.service = TourScrapingService()
+        self.fixture = load_fixtures(names=['kerala_backwaters_jsonld'])[0]
+
+    def structured_data(self, html, url='https://example.com/tours/goa'):
+        return self.service._extract_structured_data(parse_page(html), url)
+
+    def test_graph_nodes_are_flattened(self):
+        data = self.structured_data(self.fixture['html'], self.fixture['url'])
+
+        self.assertEqual(data['title'], 'Kerala Backwaters & Hills - 6 Days / 5 Nights')
+        self.assertEqual(data['providerName'], 'Coastal Trails Holidays')
+        self.assertEqual(data['destinations'], ['Kochi', 'Munnar', 'Alleppey', 'Kovalam'])
+        self.assertEqual((data['durationDays'], data['durationNights']), (6, 5))
+        self.assertEqual((data['startingPrice'], data['priceType']), (32500.0, 'Fixed'))
+        # Departure months come from the Event nodes next to the trip in the @graph
+        self.assertEqual(data['departureMonths'], ['October', 'December'])
+        self.assertEqual(data['tags'], ['houseboat', 'hill station', 'beach'])
+        self.assertEqual(data['tourLink'], self.fixture['url'])
+        self.assertEqual(self.service._structured_data_coverage(data), 1.0)
+
+    def test_top_level_lists_are_flattened(self):
+        data = self.structured_data(b"""<html><head><script type="application/ld+json">[
+            {"@type": "Organization", "name": "Sunny Goa Tours"},
+            {"@type": "TouristTrip", "name": "Goa Beach Escape", "duration": "P1W",
+             "offers": [{"@type": "Offer", "price": "18,000"}, {"@type": "Offer", "price": "INR 15000"}]}
+        ]</script></head><body></body></html>""")
+
+        self.assertEqual(data['title'], 'Goa Beach Escape')
+        self.assertEqual((data['durationDays'], data['durationNights']), (7, 6))
+        self.assertEqual((data['startingPrice'], data['priceType']), (15000.0, 'Starting From'))
+
+    def test_open_graph_fills_what_json_ld_lacks(self):
+        data = self.structured_data(b"""<html><head>
+            <meta property="og:title" content="Goa Beach Escape - 5 Days / 4 Nights">
+            <meta property="og:description" content="Five sunny days on the beaches of North Goa.">
+            <meta property="og:site_name" content="Sunny Goa Tours">
+            <meta property="product:price:amount" content="12999">
+            <script type="application/ld+json">{"@type": "TouristTrip", "description": "Beaches, forts and spice farms."}</script>
+        </head><body></body></html>""")
+
+        self.assertEqual(data['title'], 'Goa Beach Escape - 5 Days / 4 Nights')
+        self.assertEqual(data['summary'], 'Beaches, forts and spice farms.')
+        self.assertEqual(data['providerName'], 'Sunny Goa Tours')
+        self.assertEqual(data['startingPrice'], 12999.0)
+        self.assertEqual((data['durationDays'], data['durationNights']), (5, 4))
+
+    def test_pages_without_markup_give_nothing(self):
+        self.assertEqual(self.structured_data(TOUR_PAGE), {})
+
+    def extract_from_markdown(self):
+        structured_data = self.structured_data(self.fixture['html'], self.fixture['url'])
+        with mock.patch.object(TourScrapingService, '_extract_from_markdown_with_ai', return_value={}) as extract_with_ai:
+            result = self.service._extract_from_markdown(
+                self.fixture['markdown'], self.fixture['url'], structured_data, force_refresh=True
+            )
+        return result, extract_with_ai
+
+    @override_settings(SCRAPE_STRUCTURED_DATA_MIN_COVERAGE=0.8)
+    def test_llm_is_skipped_above_the_coverage_threshold(self):
+        result, extract_with_ai = self.extract_from_markdown()
+
+        extract_with_ai.assert_not_called()
+        self.assertEqual(result['data']['title'], 'Kerala Backwaters & Hills - 6 Days / 5 Nights')
+        self.assertEqual(result['data']['startingPrice'], 32500.0)
+
+    @override_settings(SCRAPE_STRUCTURED_DATA_MIN_COVERAGE=1.01, SCRAPE_PATTERN_EXTRACTION_ENABLED=False)
+    def test_llm_is_asked_below_the_coverage_threshold(self):
+        _, extract_with_ai = self.extract_from_markdown()
+
+        extract_with_ai.assert_called_once()
+
+
+SIGNALS_PAGE = b"""<html><head>
+<title>Goa Beach Escape | Sunny Goa Tours</title>
+<meta name="description" content="Five sunny days on the beaches of North Goa.">
+<meta property="og:title" content="Goa Beach Escape">
+<meta property="og:description" content="Beaches, forts and spice farms.">
+<style>h1 { color: teal; }</style>
+</head><body>
+<div class="header">Call us: +91 98765 43210</div>
+<h2>Popular tours</h2>
+<h1><span>Goa</span> Beach   <em>Escape</em></h1>
+<div class="tour-title main-title">Goa Beach Escape - 5 Days / 4 Nights</div>
+<div class="description">Sun, sand and seafood.</div>
+<p>Duration: 5 Days / 4 Nights, starting from Rs. 15,000 per person.</p>
+<div class="contact-info">Email: <a href="mailto:hello@sunnygoa.example">hello@sunnygoa.example</a></div>
+<div id="contact-box"><span class="phone">+91 98765 43211</span></div>
+<!-- a comment -->
+<div class="footer">Sunny Goa Tours, Panaji 403001 <a href="tel:+919876543210">+91 98765 43210</a></div>
+</body></html>"""
+
+
+class PageSignalsTests(TestCase):
+    """PageSignals against the soup.select passes it replaced."""
+
+    def setUp(self):
+        self.page = PageSignals.from_html(SIGNALS_PAGE)
+        self.soup = BeautifulSoup(SIGNALS_PAGE, 'html.parser')
+
+    def soup_value(self, element):
+        if element is None:
+            return None
+        return element.get('content', '') if element.name == 'meta' else element.get_text(strip=True)
+
+    def signal_value(self, element):
+        return None if element is None else element_value(element)
+
+    def test_title_and_description_match_the_selectors(self):
+        for rules, matches in ((TITLE_RULES, self.page.title_matches), (DESCRIPTION_RULES, self.page.description_matches)):
+            for (selector, _), element in zip(rules, matches):
+                self.assertEqual(self.signal_value(element), self.soup_value(self.soup.select_one(selector)), selector)
+        self.assertEqual(self.page.first_value(self.page.title_matches), 'GoaBeachEscape')
+        self.assertEqual(self.page.first_value(self.page.description_matches), 'Five sunny days on the beaches of North Goa.')
+
+    def test_contacts_match_the_selectors(self):
+        for (selector, _), elements in zip(CONTACT_RULES, self.page.contact_matches):
+            self.assertEqual(
+                [element_value(element) for element in elements],
+                [self.soup_value(element) for element in self.soup.select(selector)],
+                selector
+            )
+        self.assertEqual(self.page.contact_links, ['hello@sunnygoa.example', '+91 98765 43210'])
+
+    def test_duration_matches_the_page_text(self):
+        duration = extract_duration(self.page.text)
+
+        self.assertEqual(duration, extract_duration(self.soup.get_text()))
+        self.assertEqual((duration['durationDays'].value, duration['durationNights'].value), (5, 4))
+        self.assertNotIn('color: teal', self.page.text)
+
+    def test_structured_elements_are_collected(self):
+        soup = self.page.structured_soup()
+
+        self.assertEqual(len(soup.find_all('meta')), 3)
+        self.assertEqual(soup.find('meta', property='og:title')['content'], 'Goa Beach Escape')
+
+    def test_text_stops_at_the_character_budget(self):
+        page = PageSignals.from_html(SIGNALS_PAGE, max_text_chars=60)
+
+        self.assertLessEqual(len(page.text), 60)
+        self.assertTrue(self.page.text.startswith(page.text))
+        # The element signals are still collected from the whole page
+        self.assertEqual(page.contact_links, self.page.contact_links)
+
+
+@override_settings(SCRAPE_HTTP_RETRIES=2)
+class HTTPClientsTests(TestCase):
+    """Pooled page fetch sessions."""
+
+    def setUp(self):
+        # Start from an empty registry and leave a fresh one behind
+        http_clients._reset_after_fork()
+        self.addCleanup(http_clients._reset_after_fork)
+
+    def test_one_session_per_thread_sharing_the_adapter(self):
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(http_clients.get_http_session()))
+        thread.start()
+        thread.join()
+        session = http_clients.get_http_session()
+
+        self.assertIs(http_clients.get_http_session(), session)
+        self.assertIsNot(sessions[0], session)
+        self.assertIs(sessions[0].get_adapter('https://'), session.get_adapter('https://'))
+        self.assertIs(session.get_adapter('http://'), session.get_adapter('https://'))
+
+    def test_fork_starts_a_new_pool(self):
+        session = http_clients.get_http_session()
+
+        # What os.register_at_fork runs in a forked child
+        http_clients._reset_after_fork()
+
+        child_session = http_clients.get_http_session()
+        self.assertIsNot(child_session, session)
+        self.assertIsNot(child_session.get_adapter('https://'), session.get_adapter('https://'))
+
+    def test_only_connection_errors_are_retried(self):
+        retry = http_clients.get_http_session().get_adapter('https://').max_retries
+
+        retry = retry.increment('GET', '/tours/goa', error=NewConnectionError(None, 'Connection refused'))
+        retry = retry.increment('GET', '/tours/goa', error=NewConnectionError(None, 'Connection refused'))
+        with self.assertRaises(MaxRetryError):
+            retry.increment('GET', '/tours/goa', error=NewConnectionError(None, 'Connection refused'))
+        with self.assertRaises(ReadTimeoutError):
+            http_clients._build_http_adapter().max_retries.increment(
+                'GET', '/tours/goa', error=ReadTimeoutError(None, '/tours/goa', 'Read timed out')
+            )
+        self.assertFalse(retry.is_retry('GET', 503))
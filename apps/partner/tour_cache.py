@@ -0,0 +1,126 @@
+import time
+import uuid
+import hashlib
+import logging
+from django.core.cache import cache
+from django.conf import settings
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def _version_key(partner_id):
+    return f"tour_cache:version:{partner_id}"
+
+
+def _entry_key(partner_id, version, kind, params):
+    params_hash = hashlib.sha256(repr(params).encode('utf-8')).hexdigest()[:32]
+    return f"tour_cache:{partner_id}:v{version}:{kind}:{params_hash}"
+
+
+def get_partner_version(partner_id):
+    """
+    Get the current tour cache version of a partner.
+
+    A missing version (first use, or evicted) starts at the current time in
+    milliseconds rather than at 1, so it can never match entries cached
+    under an earlier version that are still in the cache.
+
+    Args:
+        partner_id (int): Partner id
+
+    Returns:
+        int: Cache version
+    """
+    key = _version_key(partner_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_partner_version(partner_id):
+    """
+    Invalidate all cached tour lists and details of a partner in O(1).
+
+    Old entries are not deleted: they are no longer looked up and expire after TOUR_CACHE_TTL.
+    """
+    key = _version_key(partner_id)
+    try:
+        try:
+            cache.incr(key)
+        except ValueError:
+            # No version yet: nothing of this partner is cached under a reachable key
+            cache.add(key, int(time.time() * 1000), None)
+    except Exception as e:
+        logger.error(f"Tour cache invalidation error for partner {partner_id}: {str(e)}")
+
+
+def get_or_build(partner_id, kind, params, build):
+    """
+    Get a cached tour response, building it on a miss.
+
+    Only one request rebuilds a missing entry: it takes a short cache lock,
+    while concurrent requests for the same entry wait for its result for up
+    to TOUR_CACHE_LOCK_TIMEOUT seconds and then build it themselves. Cache
+    errors fall back to building without the cache.
+
+    Args:
+        partner_id (int): Partner id
+        kind (str): Response kind ('list' or 'detail')
+        params: Anything identifying the response within the kind (query parameters, tour id)
+        build (callable): Builds the entry; returning None means "do not cache" (e.g. not found)
+
+    Returns:
+        Built or cached entry
+    """
+    if not getattr(settings, 'TOUR_CACHE_ENABLED', True):
+        return build()
+
+    try:
+        key = _entry_key(partner_id, get_partner_version(partner_id), kind, params)
+        entry = cache.get(key)
+    except Exception as e:
+        logger.error(f"Tour cache read error: {str(e)}")
+        return build()
+    if entry is not None:
+        return entry
+
+    lock_key = f"{key}:lock"
+    lock_timeout = getattr(settings, 'TOUR_CACHE_LOCK_TIMEOUT', 10)
+    poll_interval = getattr(settings, 'TOUR_CACHE_POLL_INTERVAL', 0.05)
+    deadline = time.monotonic() + lock_timeout
+    token = uuid.uuid4().hex
+    while True:
+        try:
+            is_builder = cache.add(lock_key, token, lock_timeout)
+        except Exception as e:
+            logger.error(f"Tour cache lock error: {str(e)}")
+            return build()
+
+        if is_builder:
+            try:
+                entry = build()
+                if entry is not None:
+                    cache.set(key, entry, getattr(settings, 'TOUR_CACHE_TTL', 300))
+                return entry
+            finally:
+                try:
+                    if cache.get(lock_key) == token:
+                        cache.delete(lock_key)
+                except Exception as e:
+                    logger.error(f"Tour cache lock release error: {str(e)}")
+
+        # Another request is rebuilding this entry
+        if time.monotonic() >= deadline:
+            logger.warning(f"Timed out waiting for tour cache rebuild: {key}")
+            return build()
+        time.sleep(poll_interval)
+        try:
+            entry = cache.get(key)
+        except Exception as e:
+            logger.error(f"Tour cache read error: {str(e)}")
+            return build()
+        if entry is not None:
+            return entry
@@ -0,0 +1,254 @@
+import io
+import csv
+import json
+import logging
+from datetime import datetime
+from decimal import Decimal
+from django.conf import settings
+from rest_framework import serializers
+from .models import Tour
+from .serializers import TourCreateSerializer
+from .bulk_tours import bulk_write_tours
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+FILE_FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson',
+}
+
+# Exported after the importable columns and ignored on import
+READ_ONLY_COLUMNS = {
+    'visibilityScore': 'visibility_score',
+    'createdAt': 'created_at',
+    'updatedAt': 'updated_at',
+}
+
+
+def _importable_columns():
+    # The create API fields, minus the ones a file cannot carry
+    fields = TourCreateSerializer().fields
+    return {
+        name: field.source
+        for name, field in fields.items()
+        if name not in ('user_id', 'coverImage')
+    }
+
+
+IMPORT_COLUMNS = _importable_columns()
+LIST_COLUMNS = {
+    name for name, field in TourCreateSerializer().fields.items()
+    if isinstance(field, serializers.ListField)
+}
+EXPORT_COLUMNS = {'id': 'id', **IMPORT_COLUMNS, **READ_ONLY_COLUMNS}
+
+
+def file_format_for(name, requested=None):
+    """
+    Get the format of a tour file from an explicit format or the file extension.
+
+    Args:
+        name (str): File name
+        requested (str): Format requested by the client, if any
+
+    Returns:
+        str or None: 'csv' or 'jsonl', None when unknown
+    """
+    if requested:
+        requested = requested.lower()
+        return requested if requested in FILE_FORMATS else None
+    extension = (name or '').rsplit('.', 1)[-1].lower()
+    if extension == 'csv':
+        return 'csv'
+    if extension in ('jsonl', 'ndjson'):
+        return 'jsonl'
+    return None
+
+
+class _Echo:
+    """File-like object whose write() returns the written line, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv_value(value, is_list):
+    if value is None:
+        return ''
+    if is_list:
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_tour_export(partner, file_format):
+    """
+    Stream the tours of a partner as CSV or JSON Lines.
+
+    Rows are read with QuerySet.iterator() in chunks of TOUR_EXPORT_CHUNK_SIZE
+    (a server-side cursor on PostgreSQL) and only the exported columns are
+    selected, so memory use does not grow with the number of tours.
+
+    Args:
+        partner (Partner): Owner of the tours
+        file_format (str): 'csv' or 'jsonl'
+
+    Yields:
+        str: One line of the file (the CSV header first)
+    """
+    columns = list(EXPORT_COLUMNS)
+    rows = (
+        Tour.objects.filter(partner=partner)
+        .order_by('id')
+        .values_list(*EXPORT_COLUMNS.values())
+        .iterator(chunk_size=getattr(settings, 'TOUR_EXPORT_CHUNK_SIZE', 2000))
+    )
+
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([
+                _csv_value(value, column in LIST_COLUMNS) for column, value in zip(columns, row)
+            ])
+    else:
+        for row in rows:
+            yield json.dumps(
+                {column: _json_value(value) for column, value in zip(columns, row)},
+                ensure_ascii=False
+            ) + '\n'
+
+
+def _csv_item(record):
+    item = {}
+    for column, value in record.items():
+        # Unknown and read-only columns are ignored; empty cells keep the create default (or the current value)
+        if column != 'id' and column not in IMPORT_COLUMNS:
+            continue
+        if value is None or value == '':
+            continue
+        if column in LIST_COLUMNS:
+            try:
+                value = json.loads(value)
+            except ValueError:
+                value = None
+            if not isinstance(value, list):
+                raise serializers.ValidationError({column: ['Expected a JSON array, e.g. ["Goa", "Kerala"].']})
+        item[column] = value
+    return item
+
+
+def _jsonl_item(line):
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise serializers.ValidationError({'non_field_errors': ['Invalid JSON.']})
+    if not isinstance(record, dict):
+        raise serializers.ValidationError({'non_field_errors': ['Expected an object.']})
+    return {column: value for column, value in record.items() if column in IMPORT_COLUMNS or column == 'id'}
+
+
+def iter_tour_file_items(upload, file_format, ignore_ids=False):
+    """
+    Parse an uploaded tour file one row at a time.
+
+    Args:
+        upload (UploadedFile): CSV (header row of API field names) or JSON Lines file
+        file_format (str): 'csv' or 'jsonl'
+        ignore_ids (bool): Drop the id column, so every row creates a new tour
+
+    Yields:
+        tuple: (row number starting at 1, tour payload or None, errors or None)
+    """
+    upload.seek(0)
+    text = io.TextIOWrapper(upload.file, encoding='utf-8-sig', errors='replace', newline='')
+    try:
+        if file_format == 'csv':
+            records = csv.DictReader(text)
+            parse = _csv_item
+        else:
+            records = (line for line in text if line.strip())
+            parse = _jsonl_item
+
+        for row, record in enumerate(records, start=1):
+            try:
+                item = parse(record)
+            except serializers.ValidationError as e:
+                yield row, None, e.detail
+                continue
+            if ignore_ids:
+                item.pop('id', None)
+            yield row, item, None
+    finally:
+        # Leave the upload open for Django to clean up
+        text.detach()
+
+
+def iter_tour_import(partner, upload, file_format, ignore_ids=False):
+    """
+    Import an uploaded tour file in chunks, reporting progress as it goes.
+
+    Rows are parsed incrementally and written with bulk_write_tours in
+    chunks of TOUR_IMPORT_CHUNK_SIZE, each in its own transaction, so memory
+    use stays flat and a rejected row never blocks the rest of the file.
+
+    Args:
+        partner (Partner): Owner of the tours
+        upload (UploadedFile): CSV or JSON Lines file
+        file_format (str): 'csv' or 'jsonl'
+        ignore_ids (bool): Create every row as a new tour, even when it has an id
+
+    Yields:
+        dict: One progress report per chunk ({rows, created, updated, errors}),
+            then a summary with done=True
+    """
+    chunk_size = getattr(settings, 'TOUR_IMPORT_CHUNK_SIZE', 500)
+    totals = {'rows': 0, 'created': 0, 'updated': 0, 'rejected': 0}
+
+    def write_chunk(rows, items, errors):
+        # errors holds the rows that could not be parsed; the rows rejected by validation are added to it
+        chunk = {'rows': len(rows) + len(errors), 'created': 0, 'updated': 0, 'errors': errors}
+        if items:
+            report = bulk_write_tours(partner, items)
+            chunk['created'], chunk['updated'] = len(report['created']), len(report['updated'])
+            for error in report['errors']:
+                index = error.pop('index')
+                errors.append({'row': rows[index], **error})
+            errors.sort(key=lambda error: error['row'])
+        totals['rows'] += chunk['rows']
+        totals['created'] += chunk['created']
+        totals['updated'] += chunk['updated']
+        totals['rejected'] += len(errors)
+        return chunk
+
+    rows, items, errors = [], [], []
+    for row, item, item_errors in iter_tour_file_items(upload, file_format, ignore_ids):
+        if item_errors is not None:
+            errors.append({'row': row, 'errors': item_errors})
+        else:
+            rows.append(row)
+            items.append(item)
+        if len(items) + len(errors) >= chunk_size:
+            yield write_chunk(rows, items, errors)
+            rows, items, errors = [], [], []
+    if items or errors:
+        yield write_chunk(rows, items, errors)
+
+    logger.info(
+        f"Tour import for partner {partner.id}: {totals['rows']} rows, {totals['created']} created, "
+        f"{totals['updated']} updated, {totals['rejected']} rejected"
+    )
+    yield {'done': True, **totals}
@@ -0,0 +1,277 @@
+import time
+import logging
+from datetime import timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from .models import Tour
+from .http_clients import get_http_session
+from .page_fetcher import fetch_page
+from .page_signals import PageSignals, element_value
+from .politeness import HostScheduler, is_allowed_by_robots
+from .scraping_cache import content_hash
+from .scraping_service import TourScrapingService
+from .serializers import TourUpdateSerializer
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Refresh outcomes
+SKIPPED = 'skipped'  # Not modified (304 or same content hash) or disallowed by robots.txt, no extraction
+UPDATED = 'updated'  # Page changed and the differing details were written
+UNCHANGED = 'unchanged'  # Page changed, but the extracted details match the stored tour
+BROKEN = 'broken'  # Page could not be downloaded (HTTP error, connection error, not HTML)
+FAILED = 'failed'  # Page changed, but extraction failed; retried on the next run
+REFRESH_OUTCOMES = (SKIPPED, UPDATED, UNCHANGED, BROKEN, FAILED)
+
+# Scraped details that describe the page itself. Partner-managed settings
+# (status, tour type, price type, offers, tags, cover image) are never overwritten.
+REFRESHED_FIELDS = (
+    'title', 'destinations', 'durationDays', 'durationNights', 'providerName',
+    'summary', 'highlights', 'startingPrice', 'departureCities',
+    'tourStartLocation', 'tourDropLocation', 'departureMonths',
+    'includesFlights', 'includesHotels', 'includesMeals', 'includesTransfers', 'visaSupport',
+)
+
+
+def page_content_hash(content):
+    """
+    Hash the visible text and JSON-LD of a page.
+
+    Scripts, styles and meta tags are left out, so rotating tokens and
+    tracking snippets do not count as a change of the tour page.
+
+    Args:
+        content (bytes): Fetched HTML
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    page = PageSignals.from_html(content, getattr(settings, 'SCRAPE_PAGE_TEXT_MAX_CHARS', 100000))
+    parts = [' '.join(page.text.split())]
+    parts.extend(element_value(element) for element in page.structured_elements if element.tag == 'script')
+    return content_hash('\n'.join(parts))
+
+
+def conditional_headers(tour):
+    """Build If-None-Match/If-Modified-Since headers from the validators stored on a tour."""
+    headers = {}
+    if tour.source_etag:
+        headers['If-None-Match'] = tour.source_etag
+    if tour.source_last_modified:
+        headers['If-Modified-Since'] = tour.source_last_modified
+    return headers
+
+
+def _snapshot_value(value):
+    # JSON form of a validated value, as kept in Tour.source_snapshot
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _partner_edited(tour, field):
+    """Whether a stored detail may come from the partner rather than from the last scrape."""
+    current = getattr(tour, field)
+    if not current and not isinstance(current, bool):
+        # Blank details (and a zero price or duration) are filled in
+        return False
+    snapshot = tour.source_snapshot or {}
+    return field not in snapshot or _snapshot_value(current) != snapshot[field]
+
+
+def tour_changes(tour, data):
+    """
+    Compare scraped tour details with a stored tour.
+
+    Details the scrape did not find never blank out stored ones, and details
+    that fail validation are dropped instead of failing the whole refresh.
+    The extractor defaults missing inclusion flags to False, so only flags it
+    found (True) count. A stored detail is only replaced while it still holds
+    the value of the previous scrape (Tour.source_snapshot) or is blank, so
+    details the partner edited are kept. On the first refresh, the snapshot
+    is only recorded.
+
+    Args:
+        tour (Tour): Stored tour
+        data (dict): Scraped details (camelCase keys)
+
+    Returns:
+        tuple: (changes, snapshot) where changes maps model field names to the
+            new values of the fields to update and snapshot is the new value of
+            Tour.source_snapshot
+    """
+    candidates = {}
+    for field in REFRESHED_FIELDS:
+        value = data.get(field)
+        if not value:
+            continue
+        candidates[field] = value
+
+    serializer = TourUpdateSerializer(tour, data=candidates, partial=True)
+    if not serializer.is_valid():
+        for field in serializer.errors:
+            candidates.pop(field, None)
+        serializer = TourUpdateSerializer(tour, data=candidates, partial=True)
+        if not serializer.is_valid():
+            logger.warning(f"Scraped details of tour {tour.pk} are invalid: {serializer.errors}")
+            return {}, tour.source_snapshot
+
+    scraped = serializer.validated_data
+    changes = {
+        field: value
+        for field, value in scraped.items()
+        if getattr(tour, field) != value and not _partner_edited(tour, field)
+    }
+    snapshot = {**(tour.source_snapshot or {}), **{field: _snapshot_value(value) for field, value in scraped.items()}}
+    return changes, snapshot
+
+
+def _record_check(tour, **fields):
+    # Source bookkeeping only: no save() signals, no updated_at bump
+    fields['source_checked_at'] = timezone.now()
+    for field, value in fields.items():
+        setattr(tour, field, value)
+    Tour.objects.filter(pk=tour.pk).update(**fields)
+
+
+def refresh_tour(tour, session=None):
+    """
+    Re-scrape a saved tour when its source page changed.
+
+    The page is requested with the ETag/Last-Modified validators of the last
+    check. Pages answering 304 Not Modified, or whose content hash did not
+    change, are skipped without running the extraction pipeline. Otherwise,
+    the downloaded page goes through the extraction pipeline (it is not
+    fetched twice) and only the details that differ from the stored tour,
+    and that the partner did not edit, are written.
+
+    Args:
+        tour (Tour): Tour with a tour_link
+        session (requests.Session): Session for the conditional request (defaults to the pooled session)
+
+    Returns:
+        str: One of REFRESH_OUTCOMES
+    """
+    url = tour.tour_link
+    if not is_allowed_by_robots(url):
+        _record_check(tour)
+        return SKIPPED
+
+    try:
+        page = fetch_page(
+            session or get_http_session(),
+            url,
+            timeout=10,
+            max_bytes=getattr(settings, 'SCRAPE_MAX_PAGE_BYTES', 5 * 1024 * 1024),
+            headers=conditional_headers(tour),
+        )
+    except Exception as e:
+        logger.warning(f"Source page of tour {tour.pk} is broken: {url} ({str(e)})")
+        _record_check(tour, source_status='broken')
+        return BROKEN
+
+    if page.not_modified:
+        # A 304 may carry refreshed validators
+        _record_check(
+            tour,
+            source_status='unchanged',
+            source_etag=page.etag or tour.source_etag,
+            source_last_modified=page.last_modified or tour.source_last_modified,
+        )
+        return SKIPPED
+
+    source_fields = {
+        'source_etag': page.etag,
+        'source_last_modified': page.last_modified,
+        'source_content_hash': page_content_hash(page.content),
+    }
+    if source_fields['source_content_hash'] == tour.source_content_hash:
+        _record_check(tour, source_status='unchanged', **source_fields)
+        return SKIPPED
+
+    # The changed page was just downloaded: extract from it instead of fetching it again
+    result = TourScrapingService().extract_tour_details(url, force_refresh=True, fetched_page=page)
+    if not result.get('success'):
+        # Validators and hash are kept, so the next run extracts the page again
+        logger.warning(f"Could not re-extract tour {tour.pk}: {result.get('error')}")
+        _record_check(tour)
+        return FAILED
+
+    changes, source_fields['source_snapshot'] = tour_changes(tour, result.get('data', {}))
+    if not changes:
+        _record_check(tour, source_status='unchanged', **source_fields)
+        return UNCHANGED
+
+    for field, value in {**changes, **source_fields}.items():
+        setattr(tour, field, value)
+    tour.source_status = 'updated'
+    tour.source_checked_at = timezone.now()
+    tour.save(update_fields=[
+        *changes, *source_fields, 'source_status', 'source_checked_at', 'visibility_score', 'updated_at'
+    ])
+    logger.info(f"Tour {tour.pk} updated from its source page: {', '.join(changes)}")
+    return UPDATED
+
+
+def tours_due_for_refresh(min_age_hours=None):
+    """
+    Get the tours whose source page was not checked for min_age_hours, never checked ones first.
+
+    Args:
+        min_age_hours (int): Minimum hours since the last check (defaults to TOUR_REFRESH_MIN_AGE_HOURS)
+
+    Returns:
+        QuerySet: Tours with a tour_link, oldest check first
+    """
+    if min_age_hours is None:
+        min_age_hours = getattr(settings, 'TOUR_REFRESH_MIN_AGE_HOURS', 20)
+    cutoff = timezone.now() - timedelta(hours=min_age_hours)
+    return (
+        Tour.objects
+        .exclude(tour_link__isnull=True)
+        .exclude(tour_link='')
+        .filter(Q(source_checked_at__isnull=True) | Q(source_checked_at__lt=cutoff))
+        .order_by(F('source_checked_at').asc(nulls_first=True), 'id')
+    )
+
+
+def summarize_outcomes(outcomes):
+    """Count refresh outcomes per kind."""
+    report = dict.fromkeys(REFRESH_OUTCOMES, 0)
+    for outcome in outcomes:
+        report[outcome] = report.get(outcome, 0) + 1
+    report['checked'] = len(outcomes)
+    return report
+
+
+def refresh_tours(tours, scheduler=None):
+    """
+    Refresh tours one after the other in the current process, respecting per-host politeness.
+
+    Celery workers use the partner.refresh_saved_tours job instead, which
+    refreshes tours in parallel.
+
+    Args:
+        tours (iterable): Tours to refresh
+        scheduler (HostScheduler): Per-host scheduler (defaults to a new one)
+
+    Returns:
+        dict: Number of tours per outcome, and 'checked'
+    """
+    scheduler = scheduler or HostScheduler()
+    outcomes = []
+    for tour in tours:
+        lease, delay = scheduler.try_acquire(tour.tour_link)
+        while lease is None:
+            time.sleep(delay)
+            lease, delay = scheduler.try_acquire(tour.tour_link)
+        try:
+            outcomes.append(refresh_tour(tour))
+        except Exception as e:
+            logger.error(f"Tour {tour.pk} refresh error: {str(e)}")
+            outcomes.append(FAILED)
+        finally:
+            scheduler.release(lease)
+    return summarize_outcomes(outcomes)
@@ -21,9 +21,18 @@ urlpatterns = [
     # Tour Management
     path('user/<int:user_id>/tours/', views.get_all_tours, name='get-all-tours'),
     path('user/<int:user_id>/tours/create/', views.create_tour, name='create-tour'),
+    path('user/<int:user_id>/tours/bulk/', views.bulk_write_tours_view, name='bulk-write-tours'),
+    path('user/<int:user_id>/tours/export/', views.export_tours, name='export-tours'),
+    path('user/<int:user_id>/tours/import/', views.import_tours, name='import-tours'),
     path('user/<int:user_id>/tours/<int:tour_id>/update/', views.update_tour, name='update-tour'),
     path('user/<int:user_id>/tours/<int:tour_id>/', views.get_tour_details, name='get-tour-details'),
     
     # Web Scraping (Auto-creates tour for logged-in user)
     path('scrape-tour-details/', views.scrape_tour_details, name='scrape-tour-details'),
+    path('scrape-tour-details/jobs/<str:job_id>/', views.scrape_tour_job_status, name='scrape-tour-job-status'),
+    path('scrape-tour-details/bulk/', views.bulk_scrape_tour_details, name='bulk-scrape-tour-details'),
+    path('scrape-tour-details/bulk/<str:job_id>/', views.bulk_scrape_job_status, name='bulk-scrape-job-status'),
+    path('scrape-tour-details/stream/', views.stream_scrape_tour_details, name='stream-scrape-tour-details'),
+    path('scraping/health/', views.scraping_health, name='scraping-health'),
+    path('scraping/stats/', views.scraping_stats, name='scraping-stats'),
 ]
@@ -1,23 +1,45 @@
 import time
+import json
 import logging
 from django.shortcuts import render
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.renderers import JSONRenderer
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
+from drf_spectacular.types import OpenApiTypes
 from .models import Partner, BusinessDetails, LocationCoverage, ToursServices, LegalBanking, Tour
 from .serializers import (
     BusinessDetailsSerializer, BusinessDetailsResponseSerializer,
     LocationCoverageSerializer, LocationCoverageResponseSerializer,
     ToursServicesSerializer, ToursServicesResponseSerializer,
     LegalBankingSerializer, LegalBankingResponseSerializer,
-    PartnerStatusSerializer, TourScrapingRequestSerializer, TourScrapingResponseSerializer, 
+    PartnerStatusSerializer, TourScrapingRequestSerializer, TourScrapingStreamRequestSerializer, TourScrapingResponseSerializer, 
     TourSerializer, TourCreateSerializer, TourUpdateSerializer, TourListSerializer, 
-    TourDetailSerializer
+    TourDetailSerializer, TourScrapingJobResponseSerializer, TourScrapingJobStatusSerializer,
+    TourBulkScrapingRequestSerializer, TourBulkScrapingJobResponseSerializer, TourBulkScrapingStatusSerializer,
+    ScrapingHealthResponseSerializer, ScrapingStatsResponseSerializer,
+    TourBulkWriteRequestSerializer
 )
 from .utils import optimize_file_upload, log_performance_metric
 from .scraping_service import TourScrapingService
+from .bulk_scraping import queue_bulk_scrape, get_bulk_scrape_job, iter_finished_jobs
+from .scraping_events import iter_extraction_events
+from .circuit_breaker import get_circuit_breaker_states
+from .llm_cache import get_llm_cache_stats
+from .scrape_telemetry import get_scrape_run_stats
+from .pagination import TourKeysetPagination, InvalidPageRequest
+from .conditional_requests import (
+    tour_list_validators, tour_detail_validators, not_modified_response, set_validators, query_fingerprint
+)
+from .tour_cache import get_or_build
+from .renderers import EventStreamRenderer, CSVRenderer, NDJSONRenderer
+from .bulk_tours import bulk_write_tours
+from .tour_import_export import CONTENT_TYPES, file_format_for, iter_tour_export, iter_tour_import
+from .tasks import scrape_tour_details_task
+from celery.result import AsyncResult
 from rest_framework import serializers
 
 # Create error response serializers
@@ -42,10 +64,16 @@ class TourCreateResponseSerializer(serializers.Serializer):
     data = TourSerializer()
     request_data = serializers.DictField(help_text="Original request data that was sent")
 
+class TourBulkWriteResponseSerializer(serializers.Serializer):
+    success = serializers.BooleanField(help_text="Whether every tour was written")
+    message = serializers.CharField()
+    data = serializers.DictField(help_text="created and updated: {index, id} per written tour; errors: {index, id, errors} per rejected tour")
+
 class TourListResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField(default=True)
     data = TourListSerializer(many=True)
-    count = serializers.IntegerField()
+    count = serializers.IntegerField(help_text="Number of tours matching the filters, across all pages")
+    pagination = serializers.DictField(help_text="nextCursor (pass as ?cursor= for the next page, null on the last page), hasMore and ordering")
 
 class TourDetailResponseSerializer(serializers.Serializer):
     success = serializers.BooleanField(default=True)
@@ -69,6 +97,22 @@ def get_partner_by_user_id(user_id):
         return None
 
 
+def scraping_request_error_response(serializer, data):
+    """400 response for an invalid scraping request, keeping the messages of the URL checks."""
+    if 'url' in serializer.errors:
+        if not data.get('url'):
+            message = 'URL is required'
+        else:
+            message = 'Invalid URL format. Please provide a complete URL starting with http:// or https://'
+    else:
+        message = 'Invalid scraping request'
+    return Response({
+        'success': False,
+        'message': message,
+        'errors': serializer.errors
+    }, status=status.HTTP_400_BAD_REQUEST)
+
+
 def get_verified_partner_by_user_id(user_id):
     """Get verified partner by user ID."""
     try:
@@ -656,6 +700,202 @@ def update_tour(request, user_id, tour_id):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@extend_schema(
+    request=TourBulkWriteRequestSerializer,
+    responses={
+        200: TourBulkWriteResponseSerializer,
+        400: TourBulkWriteResponseSerializer,
+        403: PartnerErrorResponseSerializer,
+        500: PartnerErrorResponseSerializer
+    },
+    description="Create and update up to 1000 tours of a verified partner in one request and one database transaction. "
+                "Tours without an id are created, tours with an id are partially updated. "
+                "Every tour is validated and errors are reported per tour (by its index in the request); "
+                "valid tours are written unless all_or_nothing is set.",
+    tags=["Tour Management"]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_write_tours_view(request, user_id):
+    """Create and update many tours of a verified partner in one transaction."""
+    try:
+        partner = get_verified_partner_by_user_id(user_id)
+        if not partner:
+            return Response({
+                'success': False, 
+                'message': 'Partner not found or not verified.'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = TourBulkWriteRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'message': 'Invalid bulk tour request',
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        start_time = time.time()
+        report = bulk_write_tours(
+            partner,
+            serializer.validated_data['tours'],
+            all_or_nothing=serializer.validated_data['all_or_nothing']
+        )
+        log_performance_metric(f"Bulk tour write ({len(serializer.validated_data['tours'])} tours)", time.time() - start_time)
+        
+        created, updated, errors = len(report['created']), len(report['updated']), len(report['errors'])
+        written = created + updated
+        if errors and not written:
+            message = f'No tours written: {errors} invalid'
+        else:
+            message = f'{created} tours created, {updated} updated'
+            if errors:
+                message += f', {errors} rejected'
+        return Response({
+            'success': not errors,
+            'message': message,
+            'data': report
+        }, status=status.HTTP_400_BAD_REQUEST if errors and not written else status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Bulk tour write error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': f'An error occurred: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    responses={
+        (200, 'text/csv'): OpenApiTypes.STR,
+        (200, 'application/x-ndjson'): OpenApiTypes.STR,
+        400: PartnerErrorResponseSerializer,
+        403: PartnerErrorResponseSerializer,
+        500: PartnerErrorResponseSerializer
+    },
+    description="Download all tours of a verified partner as a streamed CSV or JSON Lines file, in the API field names. "
+                "The file can be edited and uploaded again to tours/import/.",
+    parameters=[
+        {
+            'name': 'file_format',
+            'in': 'query',
+            'description': 'File format (default csv, or jsonl when only application/x-ndjson is accepted)',
+            'required': False,
+            'schema': {'type': 'string', 'enum': ['csv', 'jsonl']}
+        }
+    ],
+    tags=["Tour Management"]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, CSVRenderer, NDJSONRenderer])
+def export_tours(request, user_id):
+    """Stream all tours of a verified partner as a CSV or JSON Lines file."""
+    try:
+        partner = get_verified_partner_by_user_id(user_id)
+        if not partner:
+            return Response({
+                'success': False, 
+                'message': 'Partner not found or not verified.'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        # Without file_format, a client that only accepts JSON Lines gets JSON Lines
+        default_format = 'jsonl' if request.accepted_renderer.format == 'jsonl' else 'csv'
+        file_format = file_format_for('', request.query_params.get('file_format') or default_format)
+        if not file_format:
+            return Response({
+                'success': False,
+                'message': 'Invalid file_format. Allowed values: csv, jsonl.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        response = StreamingHttpResponse(iter_tour_export(partner, file_format), content_type=CONTENT_TYPES[file_format])
+        response['Content-Disposition'] = f'attachment; filename="tours-{user_id}.{file_format}"'
+        response['Cache-Control'] = 'private, no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Tour export error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': f'An error occurred: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    request={
+        'multipart/form-data': {
+            'type': 'object',
+            'properties': {
+                'file': {'type': 'string', 'format': 'binary', 'description': 'CSV (header row of API field names) or JSON Lines file'},
+                'file_format': {'type': 'string', 'enum': ['csv', 'jsonl'], 'description': 'Overrides the format detected from the file extension'},
+                'ignore_ids': {'type': 'boolean', 'description': 'Create every row as a new tour, even when it has an id'}
+            },
+            'required': ['file']
+        }
+    },
+    responses={
+        (200, 'application/x-ndjson'): OpenApiTypes.STR,
+        400: PartnerErrorResponseSerializer,
+        403: PartnerErrorResponseSerializer,
+        500: PartnerErrorResponseSerializer
+    },
+    description="Import tours of a verified partner from a CSV or JSON Lines file (the format of tours/export/). "
+                "Rows without an id are created, rows with an id update that tour. The file is written in chunks and "
+                "the response is streamed as newline-delimited JSON: one line per chunk with its row count, created and "
+                "updated counts and per-row errors, followed by a summary line with done=true.",
+    tags=["Tour Management"]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, NDJSONRenderer])
+def import_tours(request, user_id):
+    """Import tours of a verified partner from an uploaded CSV or JSON Lines file, in chunks."""
+    try:
+        partner = get_verified_partner_by_user_id(user_id)
+        if not partner:
+            return Response({
+                'success': False, 
+                'message': 'Partner not found or not verified.'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response({
+                'success': False,
+                'message': 'Upload the tours as a "file" field (multipart/form-data).'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        file_format = file_format_for(upload.name, request.data.get('file_format'))
+        if not file_format:
+            return Response({
+                'success': False,
+                'message': 'Unknown file format. Upload a .csv or .jsonl file, or set file_format to csv or jsonl.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        ignore_ids = str(request.data.get('ignore_ids', '')).lower() in ('1', 'true', 'yes', 'on')
+        
+        def stream_results():
+            start_time = time.time()
+            for report in iter_tour_import(partner, upload, file_format, ignore_ids=ignore_ids):
+                if report.get('done'):
+                    duration = time.time() - start_time
+                    log_performance_metric(f"Tour import ({report['rows']} rows)", duration)
+                    report['duration'] = round(duration, 2)
+                yield json.dumps(report) + '\n'
+        
+        response = StreamingHttpResponse(stream_results(), content_type='application/x-ndjson')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+        
+    except Exception as e:
+        logger.error(f"Tour import error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': f'An error occurred: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @extend_schema(
     responses={
         200: TourListResponseSerializer,
@@ -663,7 +903,10 @@ def update_tour(request, user_id, tour_id):
         404: PartnerErrorResponseSerializer,
         500: PartnerErrorResponseSerializer
     },
-    description="Get all tours for a verified partner. Supports filtering by status and tour type.",
+    description="Get the tours of a verified partner, one page at a time (newest first by default). "
+                "Supports filtering by status and tour type, a whitelist of orderings, and ?fields= to return only some fields. "
+                "Follow pagination.nextCursor to read the next page. "
+                "Send the returned ETag as If-None-Match (or Last-Modified as If-Modified-Since) to get 304 Not Modified when nothing changed.",
     parameters=[
         {
             'name': 'status',
@@ -678,6 +921,36 @@ def update_tour(request, user_id, tour_id):
             'description': 'Filter by tour type: FIT, Group, Customizable',
             'required': False,
             'schema': {'type': 'string', 'enum': ['FIT', 'Group', 'Customizable']}
+        },
+        {
+            'name': 'ordering',
+            'in': 'query',
+            'description': 'Sort order (default -createdAt); prefix with - for descending',
+            'required': False,
+            'schema': {'type': 'string', 'enum': [
+                prefix + name for name in TourKeysetPagination.ordering_fields for prefix in ('', '-')
+            ]}
+        },
+        {
+            'name': 'cursor',
+            'in': 'query',
+            'description': 'pagination.nextCursor of the previous page',
+            'required': False,
+            'schema': {'type': 'string'}
+        },
+        {
+            'name': 'page_size',
+            'in': 'query',
+            'description': f'Tours per page (default 20, maximum {TourKeysetPagination.max_page_size})',
+            'required': False,
+            'schema': {'type': 'integer'}
+        },
+        {
+            'name': 'fields',
+            'in': 'query',
+            'description': 'Comma-separated fields to return, e.g. id,title,startingPrice (default: all list fields)',
+            'required': False,
+            'schema': {'type': 'string'}
         }
     ],
     tags=["Tour Management"]
@@ -706,15 +979,52 @@ def get_all_tours(request, user_id):
         if tour_type:
             tours = tours.filter(tour_type=tour_type)
         
-        # Order by creation date (newest first)
-        tours = tours.order_by('-created_at')
+        def build_page():
+            etag, last_modified, total = tour_list_validators(tours, request)
+            page_tours = tours
+            
+            # Sparse fieldset: only read the columns behind the requested fields
+            fields = request.query_params.get('fields')
+            if fields:
+                fields = [name.strip() for name in fields.split(',') if name.strip()]
+                try:
+                    columns = TourListSerializer.model_fields_for(fields)
+                except ValueError as e:
+                    raise InvalidPageRequest(str(e))
+                # The cursor needs the id and every orderable column
+                page_tours = page_tours.only('id', *columns, *TourKeysetPagination.ordering_fields.values())
+            else:
+                fields = None
+            
+            paginator = TourKeysetPagination()
+            page = paginator.paginate_queryset(page_tours, request)
+            serializer = TourListSerializer(page, many=True, fields=fields)
+            return {
+                'etag': etag,
+                'last_modified': last_modified,
+                'body': {
+                    'success': True,
+                    'data': serializer.data,
+                    'count': total,
+                    'pagination': paginator.get_pagination_data()
+                }
+            }
         
-        serializer = TourListSerializer(tours, many=True)
-        return Response({
-            'success': True,
-            'data': serializer.data,
-            'count': len(serializer.data)
-        }, status=status.HTTP_200_OK)
+        # Serialized pages are cached per partner and query until one of the partner's tours changes
+        try:
+            entry = get_or_build(partner.id, 'list', query_fingerprint(request), build_page)
+        except InvalidPageRequest as e:
+            return Response({
+                'success': False,
+                'message': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        not_modified = not_modified_response(request, entry['etag'], entry['last_modified'])
+        if not_modified is not None:
+            return not_modified
+        return set_validators(
+            Response(entry['body'], status=status.HTTP_200_OK), entry['etag'], entry['last_modified']
+        )
         
     except Exception as e:
         logger.error(f"Get all tours error: {str(e)}")
@@ -731,7 +1041,8 @@ def get_all_tours(request, user_id):
         404: PartnerErrorResponseSerializer,
         500: PartnerErrorResponseSerializer
     },
-    description="Get detailed information of a specific tour including all tour data and metadata.",
+    description="Get detailed information of a specific tour including all tour data and metadata. "
+                "Send the returned ETag as If-None-Match (or Last-Modified as If-Modified-Since) to get 304 Not Modified when the tour did not change.",
     tags=["Tour Management"]
 )
 @api_view(['GET'])
@@ -746,19 +1057,34 @@ def get_tour_details(request, user_id, tour_id):
                 'message': 'Partner not found or not verified.'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        try:
-            tour = Tour.objects.get(id=tour_id, partner=partner)
-        except Tour.DoesNotExist:
+        def build_detail():
+            tour = Tour.objects.filter(id=tour_id, partner=partner).first()
+            if tour is None:
+                return None
+            etag, last_modified = tour_detail_validators(tour.id, tour.updated_at)
+            return {
+                'etag': etag,
+                'last_modified': last_modified,
+                'body': {
+                    'success': True,
+                    'data': TourDetailSerializer(tour).data
+                }
+            }
+        
+        # Cached per partner until one of the partner's tours changes; a cached tour needs no query at all
+        entry = get_or_build(partner.id, 'detail', tour_id, build_detail)
+        if entry is None:
             return Response({
                 'success': False,
                 'message': 'Tour not found.'
             }, status=status.HTTP_404_NOT_FOUND)
         
-        serializer = TourDetailSerializer(tour)
-        return Response({
-            'success': True,
-            'data': serializer.data
-        }, status=status.HTTP_200_OK)
+        not_modified = not_modified_response(request, entry['etag'], entry['last_modified'])
+        if not_modified is not None:
+            return not_modified
+        return set_validators(
+            Response(entry['body'], status=status.HTTP_200_OK), entry['etag'], entry['last_modified']
+        )
         
     except Exception as e:
         logger.error(f"Get tour details error: {str(e)}")
@@ -773,41 +1099,55 @@ def get_tour_details(request, user_id, tour_id):
 
 @extend_schema(
     request=TourScrapingRequestSerializer,
-    responses={200: TourScrapingResponseSerializer},
-    description="Scrape tour details from a URL and return the extracted data for frontend editing.",
+    responses={200: TourScrapingResponseSerializer, 202: TourScrapingJobResponseSerializer},
+    description="Scrape tour details from a URL and return the extracted data for frontend editing. "
+                "Set background=true to queue the scrape as a job and poll scrape-tour-details/jobs/{job_id}/ for the result.",
     tags=["Tour Management"]
 )
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def scrape_tour_details(request):
     """Scrape tour details from a URL and return the extracted data for frontend editing."""
-    url = request.data.get('url')
+    serializer = TourScrapingRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return scraping_request_error_response(serializer, request.data)
     
-    if not url:
-        return Response({
-            'success': False,
-            'message': 'URL is required'
-        }, status=status.HTTP_400_BAD_REQUEST)
+    url = serializer.validated_data['url']
+    force_refresh = serializer.validated_data['force_refresh']
     
-    # Validate URL format
-    if not url.startswith(('http://', 'https://')):
-        return Response({
-            'success': False,
-            'message': 'Invalid URL format. Please provide a complete URL starting with http:// or https://'
-        }, status=status.HTTP_400_BAD_REQUEST)
+    # Job mode: hand the work to a Celery worker instead of blocking this web worker
+    if serializer.validated_data['background']:
+        try:
+            job = scrape_tour_details_task.delay(url, force_refresh=force_refresh)
+            return Response({
+                'success': True,
+                'message': 'Scrape job queued',
+                'job_id': job.id,
+                'request_data': {
+                    'url': url
+                }
+            }, status=status.HTTP_202_ACCEPTED)
+        except Exception as e:
+            logger.error(f"Scrape job queue error: {str(e)}")
+            return Response({
+                'success': False,
+                'message': 'Background scraping is currently unavailable. Please try again later.',
+                'data': {}
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     
     try:
         # Initialize scraping service
         scraping_service = TourScrapingService()
         
         # Extract tour details
-        result = scraping_service.extract_tour_details(url)
+        result = scraping_service.extract_tour_details(url, force_refresh=force_refresh)
         
         if result.get('success'):
             return Response({
                 'success': True,
                 'message': 'Tour details extracted successfully',
                 'data': result['data'],
+                'cached': result.get('cached', False),
                 'request_data': {
                     'url': url
                 }
@@ -826,3 +1166,309 @@ def scrape_tour_details(request):
             'message': f'An error occurred while scraping: {str(e)}',
             'data': {}
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# Celery states mapped to the job statuses exposed by the API
+SCRAPE_JOB_STATUS_MAP = {
+    'PENDING': 'queued',
+    'RECEIVED': 'queued',
+    'STARTED': 'running',
+    'PROGRESS': 'running',
+    'RETRY': 'running',
+    'SUCCESS': 'completed',
+    'FAILURE': 'failed',
+    'REVOKED': 'failed',
+}
+
+
+def scrape_job_state(job):
+    """Status, stages and (once finished) message and data of a scrape job."""
+    job_status = SCRAPE_JOB_STATUS_MAP.get(job.state, 'running')
+    state = {
+        'status': job_status,
+        'stages': {}
+    }
+    
+    if job.state == 'PROGRESS' and isinstance(job.info, dict):
+        state['url'] = job.info.get('url')
+        state['stages'] = job.info.get('stages', {})
+    elif job.state == 'SUCCESS':
+        result = job.result or {}
+        state['url'] = result.get('url')
+        state['stages'] = result.get('stages', {})
+        if result.get('success'):
+            state['message'] = 'Tour details extracted successfully'
+            state['data'] = result.get('data', {})
+            state['cached'] = result.get('cached', False)
+        else:
+            state['status'] = 'failed'
+            state['message'] = result.get('error', 'Failed to extract tour details')
+            state['data'] = {}
+    elif job_status == 'failed':
+        state['message'] = 'Scrape job failed'
+        state['data'] = {}
+    return state
+
+
+@extend_schema(
+    responses={200: TourScrapingJobStatusSerializer},
+    description="Get the status of a background scrape job, including the state of each pipeline stage and the extracted data once completed.",
+    tags=["Tour Management"]
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def scrape_tour_job_status(request, job_id):
+    """Get the status and result of a background tour scraping job."""
+    try:
+        job = AsyncResult(job_id, app=scrape_tour_details_task.app)
+        return Response({
+            'success': True,
+            'job_id': job_id,
+            **scrape_job_state(job)
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Scrape job status error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': f'An error occurred while reading the job status: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    request=TourBulkScrapingRequestSerializer,
+    responses={200: TourBulkScrapingJobResponseSerializer},
+    description="Queue a background scrape job for each of up to 200 URLs (duplicates are scraped once) and stream "
+                "each URL's result as its job finishes, as JSON Lines (default) or Server-Sent Events "
+                "(Accept: text/event-stream). Emits a 'queued' event with the job ids, a 'result' event per URL "
+                "and a final 'done' event. scrape-tour-details/bulk/{job_id}/ reports the same results after a disconnect.",
+    tags=["Tour Management"]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, NDJSONRenderer, EventStreamRenderer])
+def bulk_scrape_tour_details(request):
+    """Queue background scrape jobs for a list of URLs and stream their results as they finish."""
+    serializer = TourBulkScrapingRequestSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Invalid URLs provided',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        job, jobs = queue_bulk_scrape(
+            serializer.validated_data['urls'],
+            force_refresh=serializer.validated_data['force_refresh']
+        )
+    except Exception as e:
+        logger.error(f"Bulk scrape queue error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': 'Background scraping is currently unavailable. Please try again later.'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    
+    event_stream = request.accepted_renderer.format == 'event-stream'
+    job_urls = {job_id: url for url, job_id in jobs}
+    
+    def format_event(event, payload):
+        if event_stream:
+            return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps({'event': event, **payload}) + '\n'
+    
+    def stream_results():
+        yield format_event('queued', {
+            'success': True,
+            'message': f'{len(jobs)} scrape jobs queued',
+            'job_id': job.id,
+            'total': len(jobs),
+            'jobs': [{'url': url, 'job_id': job_id} for url, job_id in jobs]
+        })
+        
+        finished = succeeded = 0
+        try:
+            for child in iter_finished_jobs(job):
+                if child is None:
+                    yield ': keepalive\n\n' if event_stream else format_event('keepalive', {})
+                    continue
+                result = {'job_id': child.id, **scrape_job_state(child), 'url': job_urls.get(child.id)}
+                finished += 1
+                succeeded += result['status'] == 'completed'
+                yield format_event('result', result)
+        except Exception as e:
+            # The jobs keep running; the client can read them from the status endpoint
+            logger.error(f"Bulk scrape stream error for {job.id}: {str(e)}")
+        
+        yield format_event('done', {
+            'job_id': job.id,
+            'status': 'completed' if finished == len(jobs) else 'running',
+            'total': len(jobs),
+            'finished': finished,
+            'succeeded': succeeded,
+            'failed': finished - succeeded
+        })
+    
+    response = StreamingHttpResponse(
+        stream_results(),
+        content_type='text/event-stream' if event_stream else 'application/x-ndjson'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@extend_schema(
+    responses={200: TourBulkScrapingStatusSerializer},
+    description="Get the progress of a bulk scrape: the status of every URL's job, in the submitted order, "
+                "with the extracted data of the finished ones.",
+    tags=["Tour Management"]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def bulk_scrape_job_status(request, job_id):
+    """Get the status and results of the jobs of a bulk scrape."""
+    try:
+        job = get_bulk_scrape_job(job_id)
+        if job is None:
+            return Response({
+                'success': False,
+                'message': 'Bulk scrape job not found or expired.'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        results = [{'job_id': child.id, **scrape_job_state(child)} for child in job.results]
+        finished = [result for result in results if result['status'] in ('completed', 'failed')]
+        succeeded = sum(1 for result in finished if result['status'] == 'completed')
+        return Response({
+            'success': True,
+            'job_id': job_id,
+            'status': 'completed' if len(finished) == len(results) else 'running',
+            'total': len(results),
+            'finished': len(finished),
+            'succeeded': succeeded,
+            'failed': len(finished) - succeeded,
+            'results': results
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        logger.error(f"Bulk scrape job status error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': f'An error occurred while reading the job status: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    parameters=[TourScrapingStreamRequestSerializer],
+    responses={200: TourScrapingResponseSerializer},
+    description="Scrape tour details from a URL and stream progress as Server-Sent Events. "
+                "Emits a 'stage' event per pipeline stage, a 'preview' event with the cheap fields "
+                "(title, summary, duration, contact) as soon as they are parsed, and a final 'result' event.",
+    tags=["Tour Management"]
+)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def stream_scrape_tour_details(request):
+    """Scrape tour details from a URL and stream the progress as Server-Sent Events."""
+    serializer = TourScrapingStreamRequestSerializer(data=request.query_params)
+    if not serializer.is_valid():
+        return scraping_request_error_response(serializer, request.query_params)
+    
+    url = serializer.validated_data['url']
+    force_refresh = serializer.validated_data['force_refresh']
+    
+    def stream_events():
+        for event, payload in iter_extraction_events(url, force_refresh=force_refresh):
+            if event == 'keepalive':
+                yield ': keepalive\n\n'
+                continue
+            if event == 'result':
+                if payload.get('success'):
+                    payload = {
+                        'success': True,
+                        'message': 'Tour details extracted successfully',
+                        'data': payload['data'],
+                        'cached': payload.get('cached', False)
+                    }
+                else:
+                    payload = {
+                        'success': False,
+                        'message': payload.get('error', 'Failed to extract tour details'),
+                        'data': {}
+                    }
+            yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    
+    response = StreamingHttpResponse(stream_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@extend_schema(
+    responses={200: ScrapingHealthResponseSerializer},
+    description="Get the circuit breaker state (closed, open, half_open) and call counters of every scraping provider, and the LLM response cache counters. Admin only.",
+    tags=["Tour Management"]
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def scraping_health(request):
+    """Get the health state of the scraping providers."""
+    try:
+        return Response({
+            'success': True,
+            'data': get_circuit_breaker_states(),
+            'llm_cache': get_llm_cache_stats()
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Scraping health error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': f'An error occurred: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    responses={200: ScrapingStatsResponseSerializer},
+    description="Get scrape run telemetry aggregated by day, by domain, by provider path and by pipeline stage (p50/p95 seconds), with LLM token counts. Admin only.",
+    parameters=[
+        {
+            'name': 'days',
+            'in': 'query',
+            'description': 'Number of days to look back (default 7, maximum 90)',
+            'required': False,
+            'schema': {'type': 'integer'}
+        },
+        {
+            'name': 'domain',
+            'in': 'query',
+            'description': 'Only include runs of this domain',
+            'required': False,
+            'schema': {'type': 'string'}
+        }
+    ],
+    tags=["Tour Management"]
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def scraping_stats(request):
+    """Get aggregated scrape run telemetry."""
+    try:
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), 90)
+        except ValueError:
+            return Response({
+                'success': False,
+                'message': 'days must be an integer.'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'success': True,
+            'data': get_scrape_run_stats(days=days, domain=request.query_params.get('domain'))
+        }, status=status.HTTP_200_OK)
+    except Exception as e:
+        logger.error(f"Scraping stats error: {str(e)}")
+        return Response({
+            'success': False,
+            'message': f'An error occurred: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
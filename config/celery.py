@@ -0,0 +1,16 @@
+"""
+Celery application for the config project.
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('config')
+
+# Read all CELERY_* options from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Load tasks.py modules from all installed apps
+app.autodiscover_tasks()
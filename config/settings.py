@@ -6,6 +6,7 @@ from pathlib import Path
 from decouple import config
 import os
 import dj_database_url
+from celery.schedules import crontab
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +45,7 @@ THIRD_PARTY_APPS = [
     'django_filters',
     'import_export',
     'admin_honeypot',
+    'django_celery_beat',
 ]
 
 LOCAL_APPS = [
@@ -183,6 +185,9 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = DEBUG
 
+# Let the dashboard read the validators for conditional GETs (If-None-Match / If-Modified-Since)
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+
 # Spectacular Configuration (API Documentation)
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Travel Partner API',
@@ -366,6 +371,21 @@ CELERY_RESULT_BACKEND = config('REDIS_URL', default='redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TASK_TRACK_STARTED = True
+CELERY_RESULT_EXPIRES = 60 * 60 * 24  # Keep job results for 1 day
+# Scrape jobs run on their own queue so slow partner sites cannot block other tasks:
+#   celery -A config worker -Q scraping --concurrency=4
+CELERY_TASK_ROUTES = {
+    'partner.scrape_tour_details': {'queue': 'scraping'},
+    'partner.refresh_tour': {'queue': 'scraping'},
+}
+# Long-running jobs: only fetch one at a time and ack after completion
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+
+# Background scrape job limits (seconds)
+SCRAPE_JOB_SOFT_TIME_LIMIT = config('SCRAPE_JOB_SOFT_TIME_LIMIT', default=180, cast=int)
+SCRAPE_JOB_TIME_LIMIT = config('SCRAPE_JOB_TIME_LIMIT', default=210, cast=int)
 
 # OTP Configuration
 OTP_LENGTH = 6
@@ -378,13 +398,24 @@ MOBILE_OTP_ENABLED = config('MOBILE_OTP_ENABLED', default=False, cast=bool)  # T
 RATE_LIMIT_OTP_REQUESTS = 3  # Maximum OTP requests per hour
 RATE_LIMIT_OTP_WINDOW = 3600  # Time window in seconds (1 hour)
 
-# Cache Configuration for Rate Limiting
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+# Cache Configuration for Rate Limiting and scrape results
+# Set CACHE_REDIS_URL to share the cache between all gunicorn/Celery workers
+CACHE_REDIS_URL = config('CACHE_REDIS_URL', default=None)
+
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unique-snowflake',
+        }
     }
-}
 
 # OpenAI Configuration (optional - for enhanced scraping)
 OPENAI_API_KEY = config('OPENAI_API_KEY', default=None)
@@ -394,3 +425,118 @@ GEMINI_API_KEY = config('GEMINI_API_KEY', default=None)
 
 # Firecrawl Configuration (for enhanced web scraping)
 FIRECRAWL_API_KEY = config('FIRECRAWL_API_KEY', default=None)
+
+# Scrape result cache (seconds)
+SCRAPE_CACHE_TTL = config('SCRAPE_CACHE_TTL', default=6 * 60 * 60, cast=int)  # URL-keyed results
+SCRAPE_CONTENT_CACHE_TTL = config('SCRAPE_CONTENT_CACHE_TTL', default=7 * 24 * 60 * 60, cast=int)  # Content-hash keyed data
+
+# Bulk scrape results stream: seconds between checks of the unfinished jobs, and when to stop streaming
+SCRAPE_BULK_STREAM_POLL_INTERVAL = config('SCRAPE_BULK_STREAM_POLL_INTERVAL', default=1, cast=float)
+SCRAPE_BULK_STREAM_TIMEOUT = config('SCRAPE_BULK_STREAM_TIMEOUT', default=30 * 60, cast=int)
+
+# Hedged extraction: start the local fetch path if Firecrawl has not answered
+# within SCRAPE_HEDGE_DELAY seconds and never wait beyond SCRAPE_EXTRACTION_DEADLINE
+SCRAPE_HEDGE_ENABLED = config('SCRAPE_HEDGE_ENABLED', default=True, cast=bool)
+SCRAPE_HEDGE_DELAY = config('SCRAPE_HEDGE_DELAY', default=8, cast=float)
+SCRAPE_EXTRACTION_DEADLINE = config('SCRAPE_EXTRACTION_DEADLINE', default=90, cast=int)
+
+# Circuit breakers for Firecrawl, OpenAI and Gemini (state is kept in the default cache)
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = config('CIRCUIT_BREAKER_FAILURE_THRESHOLD', default=0.5, cast=float)  # Failed + slow share of calls
+CIRCUIT_BREAKER_MIN_CALLS = config('CIRCUIT_BREAKER_MIN_CALLS', default=5, cast=int)  # Calls in the window before the breaker can trip
+CIRCUIT_BREAKER_WINDOW = config('CIRCUIT_BREAKER_WINDOW', default=60, cast=int)  # Seconds
+CIRCUIT_BREAKER_RESET_TIMEOUT = config('CIRCUIT_BREAKER_RESET_TIMEOUT', default=30, cast=int)  # Seconds before a half-open probe
+CIRCUIT_BREAKER_SLOW_CALL_SECONDS = {
+    'firecrawl': 45,
+    'openai': 20,
+    'gemini': 20,
+}
+
+# Skip the LLM when JSON-LD/OpenGraph markup provides this share of the key tour fields
+SCRAPE_STRUCTURED_DATA_MIN_COVERAGE = config('SCRAPE_STRUCTURED_DATA_MIN_COVERAGE', default=0.8, cast=float)
+
+# Convert server-rendered pages to markdown locally instead of calling Firecrawl
+SCRAPE_LOCAL_MARKDOWN_ENABLED = config('SCRAPE_LOCAL_MARKDOWN_ENABLED', default=True, cast=bool)
+SCRAPE_LOCAL_MARKDOWN_MIN_TEXT = config('SCRAPE_LOCAL_MARKDOWN_MIN_TEXT', default=1500, cast=int)
+
+# Token budgets for the page content sent to the LLM; the most relevant sections are packed in
+SCRAPE_PROMPT_TOKEN_BUDGET = config('SCRAPE_PROMPT_TOKEN_BUDGET', default=1000, cast=int)
+SCRAPE_ENHANCE_TOKEN_BUDGET = config('SCRAPE_ENHANCE_TOKEN_BUDGET', default=750, cast=int)
+
+# LLM response cache keyed on provider + model + prompt hash: 'disk' (development), 'django' (shared cache) or 'none'
+LLM_CACHE_BACKEND = config('LLM_CACHE_BACKEND', default='disk' if DEBUG else 'django')
+LLM_CACHE_DIR = config('LLM_CACHE_DIR', default=str(BASE_DIR / '.llm_cache'))
+LLM_CACHE_MAX_ENTRIES = config('LLM_CACHE_MAX_ENTRIES', default=5000, cast=int)  # Disk backend only
+LLM_CACHE_TTL = config('LLM_CACHE_TTL', default=7 * 24 * 60 * 60, cast=int)  # 7 days
+
+# Page text collected by the manual scraping fallback, enough for the relevance ranking of the prompt sections
+SCRAPE_PAGE_TEXT_MAX_CHARS = config('SCRAPE_PAGE_TEXT_MAX_CHARS', default=100000, cast=int)
+
+# Pages are streamed and cut off at this many (decompressed) bytes; non-HTML content types are rejected
+SCRAPE_MAX_PAGE_BYTES = config('SCRAPE_MAX_PAGE_BYTES', default=5 * 1024 * 1024, cast=int)  # 5MB
+
+# Pooled HTTP connections for page fetches: keep-alive pool size and connection-error retries with exponential backoff
+SCRAPE_HTTP_POOL_CONNECTIONS = config('SCRAPE_HTTP_POOL_CONNECTIONS', default=20, cast=int)
+SCRAPE_HTTP_POOL_MAXSIZE = config('SCRAPE_HTTP_POOL_MAXSIZE', default=32, cast=int)
+SCRAPE_HTTP_RETRIES = config('SCRAPE_HTTP_RETRIES', default=2, cast=int)
+SCRAPE_HTTP_BACKOFF = config('SCRAPE_HTTP_BACKOFF', default=0.5, cast=float)
+
+# Follow-up prompt for only the fields that are still empty after extraction
+SCRAPE_GAP_FILL_ENABLED = config('SCRAPE_GAP_FILL_ENABLED', default=True, cast=bool)
+SCRAPE_GAP_FILL_TOKEN_BUDGET = config('SCRAPE_GAP_FILL_TOKEN_BUDGET', default=400, cast=int)
+
+# Deterministic pattern extraction (prices, durations, months, inclusions); the LLM is skipped when it is confident enough
+SCRAPE_PATTERN_EXTRACTION_ENABLED = config('SCRAPE_PATTERN_EXTRACTION_ENABLED', default=True, cast=bool)
+SCRAPE_PATTERN_MIN_CONFIDENCE = config('SCRAPE_PATTERN_MIN_CONFIDENCE', default=0.85, cast=float)
+
+# Single flight: concurrent scrapes of one URL share the first caller's result
+SCRAPE_SINGLE_FLIGHT_ENABLED = config('SCRAPE_SINGLE_FLIGHT_ENABLED', default=True, cast=bool)
+SCRAPE_SINGLE_FLIGHT_TIMEOUT = config('SCRAPE_SINGLE_FLIGHT_TIMEOUT', default=120, cast=int)  # Lock expiry and maximum wait, above SCRAPE_EXTRACTION_DEADLINE
+SCRAPE_SINGLE_FLIGHT_POLL_INTERVAL = config('SCRAPE_SINGLE_FLIGHT_POLL_INTERVAL', default=0.5, cast=float)
+SCRAPE_SINGLE_FLIGHT_RESULT_TTL = config('SCRAPE_SINGLE_FLIGHT_RESULT_TTL', default=60, cast=int)
+
+# Politeness towards operator websites for bulk and background scrapes: per-host concurrency and start rate
+# (shared by all workers through the cache), robots.txt rules and Crawl-delay
+SCRAPE_POLITENESS_ENABLED = config('SCRAPE_POLITENESS_ENABLED', default=True, cast=bool)
+SCRAPE_HOST_MAX_CONCURRENCY = config('SCRAPE_HOST_MAX_CONCURRENCY', default=2, cast=int)  # Background and bulk scrape jobs
+SCRAPE_HOST_MIN_INTERVAL = config('SCRAPE_HOST_MIN_INTERVAL', default=1.0, cast=float)  # Seconds between scrape starts per host
+SCRAPE_HOST_POLL_INTERVAL = config('SCRAPE_HOST_POLL_INTERVAL', default=0.5, cast=float)
+SCRAPE_HOST_MAX_DEFERRALS = config('SCRAPE_HOST_MAX_DEFERRALS', default=20, cast=int)  # Celery retries while the host is busy
+SCRAPE_HOST_MAX_DEFER_DELAY = config('SCRAPE_HOST_MAX_DEFER_DELAY', default=60, cast=int)  # Longest wait between those retries
+SCRAPE_ROBOTS_ENABLED = config('SCRAPE_ROBOTS_ENABLED', default=True, cast=bool)
+SCRAPE_ROBOTS_TIMEOUT = config('SCRAPE_ROBOTS_TIMEOUT', default=5, cast=int)
+SCRAPE_ROBOTS_TTL = config('SCRAPE_ROBOTS_TTL', default=24 * 60 * 60, cast=int)
+SCRAPE_ROBOTS_ERROR_TTL = config('SCRAPE_ROBOTS_ERROR_TTL', default=10 * 60, cast=int)  # Unreachable robots.txt
+
+# Nightly re-scrape of saved tours: conditional GETs with the stored ETag/Last-Modified and content hashes,
+# extraction only for changed pages. Run the scheduler with: celery -A config beat
+TOUR_REFRESH_ENABLED = config('TOUR_REFRESH_ENABLED', default=True, cast=bool)
+TOUR_REFRESH_HOUR = config('TOUR_REFRESH_HOUR', default=2, cast=int)
+TOUR_REFRESH_BATCH_SIZE = config('TOUR_REFRESH_BATCH_SIZE', default=1000, cast=int)  # Tours per nightly run
+TOUR_REFRESH_MIN_AGE_HOURS = config('TOUR_REFRESH_MIN_AGE_HOURS', default=20, cast=int)  # Hours between checks of a tour
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'refresh-saved-tours': {
+        'task': 'partner.refresh_saved_tours',
+        'schedule': crontab(hour=TOUR_REFRESH_HOUR, minute=0),
+    },
+}
+
+# Scrape run telemetry (ScrapeRun): buffered per process and bulk-inserted by a background thread
+SCRAPE_TELEMETRY_ENABLED = config('SCRAPE_TELEMETRY_ENABLED', default=True, cast=bool)
+SCRAPE_TELEMETRY_BATCH_SIZE = config('SCRAPE_TELEMETRY_BATCH_SIZE', default=50, cast=int)  # Runs per insert
+SCRAPE_TELEMETRY_FLUSH_INTERVAL = config('SCRAPE_TELEMETRY_FLUSH_INTERVAL', default=5, cast=float)  # Seconds
+SCRAPE_TELEMETRY_MAX_BUFFER = config('SCRAPE_TELEMETRY_MAX_BUFFER', default=5000, cast=int)  # Oldest runs are dropped beyond this
+SCRAPE_TELEMETRY_STATS_SAMPLE = config('SCRAPE_TELEMETRY_STATS_SAMPLE', default=10000, cast=int)  # Recent runs used for latency percentiles
+
+# Serialized tour lists and details cached per partner; any Tour save/delete bumps the partner's cache version
+TOUR_CACHE_ENABLED = config('TOUR_CACHE_ENABLED', default=True, cast=bool)
+TOUR_CACHE_TTL = config('TOUR_CACHE_TTL', default=300, cast=int)  # Safety net for changes made without signals (QuerySet.update)
+TOUR_CACHE_LOCK_TIMEOUT = config('TOUR_CACHE_LOCK_TIMEOUT', default=10, cast=int)  # Longest wait for another request's rebuild
+TOUR_CACHE_POLL_INTERVAL = config('TOUR_CACHE_POLL_INTERVAL', default=0.05, cast=float)
+
+# Bulk tour create/update (POST user/<id>/tours/bulk/): rows per INSERT/UPDATE statement
+TOUR_BULK_BATCH_SIZE = config('TOUR_BULK_BATCH_SIZE', default=500, cast=int)
+
+# Streaming tour export/import (user/<id>/tours/export/ and tours/import/)
+TOUR_EXPORT_CHUNK_SIZE = config('TOUR_EXPORT_CHUNK_SIZE', default=2000, cast=int)  # Rows fetched per database round trip
+TOUR_IMPORT_CHUNK_SIZE = config('TOUR_IMPORT_CHUNK_SIZE', default=500, cast=int)  # Rows validated and written per transaction